@@ -0,0 +1,3 @@
+#!/bin/bash
+
+cd src && python3 -m benchmarks.stages "$@"
\ No newline at end of file
@@ -0,0 +1,3 @@
+#!/bin/bash
+
+python3 src/build_client.py "$@"
\ No newline at end of file
@@ -0,0 +1,3 @@
+#!/bin/bash
+
+python3 src/build_daemon.py "$@"
\ No newline at end of file
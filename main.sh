@@ -1,4 +1,4 @@
 #!/bin/bash
 
 python3 src/main.py
-cd docs && python3 -m http.server 8888
\ No newline at end of file
+python3 src/dev_server.py --port 8888
\ No newline at end of file
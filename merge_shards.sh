@@ -0,0 +1,3 @@
+#!/bin/bash
+
+python3 src/merge_shards.py "$@"
\ No newline at end of file
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+
+from build_manifest import hash_file
+from get_file_paths import get_file_paths
+
+ASSET_MAP_PATH = "./.asset_map.json"
+ASSET_MAP_VERSION = 1
+HASH_LENGTH = 12
+
+# files browsers or crawlers request by a fixed name (favicon.ico, robots.txt, ...) are never renamed
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".map",
+    ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif",
+    ".woff", ".woff2", ".ttf", ".otf",
+    ".mp3", ".mp4", ".webm", ".pdf",
+}
+
+def fingerprinted_name(relative_path: str, content_hash: str) -> str:
+    """Inserts the start of `content_hash` before the extension: `images/tom.png` becomes `images/tom.1f2e3d4c5b6a.png`."""
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{content_hash[:HASH_LENGTH]}{ext}"
+
+class AssetMap:
+    """Content-hashed names for the static assets, built once per build:
+    ```
+    {
+        "index.css": {"size": 1234, "mtime_ns": 1700000000000000000, "hash": "..."},
+        "images/tom.png": {...},
+    }
+    ```
+    `names` maps each asset's path (relative to `static/`) to its fingerprinted path. Like `BuildManifest`, the map is saved between builds so an asset whose size and mtime are unchanged is not hashed again, and only rewritten once an asset was added, changed or removed.
+    """
+    def __init__(self, path: str, entries: dict = None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.names = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "AssetMap":
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != ASSET_MAP_VERSION:
+            return cls(path)
+        return cls(path, data.get("assets", {}))
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": ASSET_MAP_VERSION, "assets": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def update(self, static_path: str) -> dict[str, str]:
+        """Hashes every new or changed asset under `static_path`, forgets removed ones and returns the new `names`."""
+        entries = {}
+        for file_path in get_file_paths(static_path):
+            relative_path = os.path.relpath(file_path, static_path)
+            if os.path.splitext(relative_path)[1].lower() not in FINGERPRINT_EXTENSIONS:
+                continue
+            stat = os.stat(file_path)
+            entry = self.entries.get(relative_path)
+            if entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+                entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": hash_file(file_path)}
+            entries[relative_path] = entry
+        if entries != self.entries:
+            self.entries = entries
+            self.dirty = True
+        self.names = {relative_path: fingerprinted_name(relative_path, entry["hash"]) for relative_path, entry in entries.items()}
+        return self.names
+
+    def digest(self) -> str:
+        """Identifies the whole mapping; it changes whenever any asset's content does."""
+        return hashlib.sha256(json.dumps(self.names, sort_keys=True).encode()).hexdigest()[:HASH_LENGTH]
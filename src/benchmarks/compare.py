@@ -0,0 +1,39 @@
+"""Compares two result files written by `benchmarks.stages`.
+
+Run from `src/`:
+```
+python3 -m benchmarks.compare BASELINE.json CANDIDATE.json
+```
+"""
+import argparse
+import json
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+def compare(baseline: dict, candidate: dict) -> list[tuple[str, float, float, float]]:
+    """Returns `(stage, baseline seconds, candidate seconds, speedup)` for every stage present in both runs."""
+    before = {result["stage"]: result["seconds"] for result in baseline["results"]}
+    rows = []
+    for result in candidate["results"]:
+        stage = result["stage"]
+        if stage not in before:
+            continue
+        speedup = before[stage] / result["seconds"] if result["seconds"] else float("inf")
+        rows.append((stage, before[stage], result["seconds"], speedup))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    print(f"{'stage':<24}{baseline.get('commit') or 'baseline':>12}{candidate.get('commit') or 'candidate':>12}{'speedup':>10}")
+    for stage, before, after, speedup in compare(baseline, candidate):
+        print(f"{stage:<24}{before:>11.4f}s{after:>11.4f}s{speedup:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Generates synthetic `content/` and `static/` trees for benchmarking.
+
+Run from `src/`:
+```
+python3 -m benchmarks.corpus OUTPUT_DIR [--pages N] [--seed S]
+```
+"""
+import argparse
+import os
+import random
+from typing import NamedTuple
+
+WORDS = (
+    "the ring of power was forged in the fires of mount doom by sauron "
+    "who sought dominion over middle earth and all the free peoples elves "
+    "dwarves men hobbits wizards gandalf frodo samwise aragorn legolas gimli"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+class CorpusConfig(NamedTuple):
+    """Shape of the generated site.
+    - `block_mix`: relative weight of each block kind on a page
+    - `link_density`: chance that any given word is wrapped in a link (images, bold, italic and code spans use a fraction of it)
+    - `list_length`: items per ordered/unordered list
+    - `code_lines`: lines per fenced code block
+    """
+    pages: int = 1000
+    blocks_per_page: int = 40
+    words_per_paragraph: int = 60
+    link_density: float = 0.05
+    list_length: int = 8
+    code_lines: int = 12
+    block_mix: tuple = (
+        ("paragraph", 6),
+        ("heading", 2),
+        ("unordered_list", 1),
+        ("ordered_list", 1),
+        ("code", 1),
+        ("quote", 1),
+    )
+    static_files: int = 50
+    static_size: int = 64 * 1024
+    seed: int = 0
+
+DEFAULTS = CorpusConfig()
+
+def inline_text(rng: random.Random, words: int, link_density: float) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < link_density:
+            parts.append(f"[{word}](/{rng.choice(WORDS)}/{rng.choice(WORDS)})")
+        elif roll < link_density * 1.5:
+            parts.append(f"**{word}**")
+        elif roll < link_density * 2:
+            parts.append(f"_{word}_")
+        elif roll < link_density * 2.5:
+            parts.append(f"`{word}`")
+        elif roll < link_density * 2.6:
+            parts.append(f"![{word}](/images/{word}.png)")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+def generate_block(rng: random.Random, kind: str, config: CorpusConfig) -> str:
+    match kind:
+        case "paragraph":
+            return inline_text(rng, config.words_per_paragraph, config.link_density)
+        case "heading":
+            return f"{'#' * rng.randint(2, 6)} {inline_text(rng, 5, config.link_density)}"
+        case "unordered_list":
+            return "\n".join(f"- {inline_text(rng, 8, config.link_density)}" for _ in range(config.list_length))
+        case "ordered_list":
+            return "\n".join(f"{i}. {inline_text(rng, 8, config.link_density)}" for i in range(1, config.list_length + 1))
+        case "code":
+            lines = [f"    {' '.join(rng.choices(WORDS, k=6))}" for _ in range(config.code_lines)]
+            return "```\n" + "\n".join(lines) + "\n```"
+        case "quote":
+            return "\n".join(f"> {inline_text(rng, 12, 0)}" for _ in range(3))
+        case _:
+            raise ValueError(f"unknown block kind: {kind}")
+
+def generate_markdown(rng: random.Random, config: CorpusConfig) -> str:
+    kinds = [kind for kind, _ in config.block_mix]
+    weights = [weight for _, weight in config.block_mix]
+    blocks = [f"# {' '.join(rng.choices(WORDS, k=4)).title()}"]
+    for kind in rng.choices(kinds, weights, k=config.blocks_per_page):
+        blocks.append(generate_block(rng, kind, config))
+    return "\n\n".join(blocks) + "\n"
+
+def generate_corpus(root: str, config: CorpusConfig = DEFAULTS) -> list[str]:
+    """Writes `content/`, `static/` and `template.html` under `root` and returns the markdown paths. The same config always produces the same tree."""
+    rng = random.Random(config.seed)
+    content_dir = os.path.join(root, "content")
+    paths = []
+    for i in range(config.pages):
+        section = f"section{i % 20}"
+        page_dir = os.path.join(content_dir, section, f"page{i}")
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, "index.md")
+        with open(path, "w") as f:
+            f.write(generate_markdown(rng, config))
+        paths.append(path)
+
+    static_dir = os.path.join(root, "static", "images")
+    os.makedirs(static_dir, exist_ok=True)
+    with open(os.path.join(root, "static", "index.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n" * 50)
+    for i in range(config.static_files):
+        with open(os.path.join(static_dir, f"image{i}.png"), "wb") as f:
+            f.write(rng.randbytes(config.static_size))
+
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(TEMPLATE)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic site for benchmarking.")
+    parser.add_argument("output")
+    parser.add_argument("--pages", type=int, default=DEFAULTS.pages)
+    parser.add_argument("--blocks", type=int, default=DEFAULTS.blocks_per_page)
+    parser.add_argument("--link-density", type=float, default=DEFAULTS.link_density)
+    parser.add_argument("--list-length", type=int, default=DEFAULTS.list_length)
+    parser.add_argument("--code-lines", type=int, default=DEFAULTS.code_lines)
+    parser.add_argument("--seed", type=int, default=DEFAULTS.seed)
+    args = parser.parse_args()
+    config = CorpusConfig(
+        pages=args.pages,
+        blocks_per_page=args.blocks,
+        link_density=args.link_density,
+        list_length=args.list_length,
+        code_lines=args.code_lines,
+        seed=args.seed,
+    )
+    paths = generate_corpus(args.output, config)
+    print(f"Generated {len(paths)} pages in {args.output}")
+
+if __name__ == "__main__":
+    main()
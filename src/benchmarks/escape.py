@@ -0,0 +1,87 @@
+"""Measures the cost of HTML escaping on the render path.
+
+Run from `src/`:
+```
+python3 -m benchmarks.escape [--pages N] [--repeat N]
+```
+`escape_text` is timed on every inline string of a synthetic corpus against the alternatives it was chosen over (`html.escape` and a `str.translate` table), and against not escaping at all. It then renders the corpus with `to_html`, and again with the unescaped leaf and attribute rendering used before escaping was added, which gives the overhead a real build pays.
+"""
+import argparse
+import html
+import tempfile
+from unittest import mock
+
+import htmlnode
+from benchmarks.corpus import CorpusConfig, DEFAULTS, generate_corpus
+from benchmarks.stages import best_of
+from markdown_to_html_node import markdown_to_html_node
+from textnode import TextType
+from markdown_split import markdown_to_blocks, text_to_textnodes
+
+TRANSLATE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+ESCAPERS = [
+    ("none", lambda text: text),
+    ("escape_text", htmlnode.escape_text),
+    ("html.escape", lambda text: html.escape(text, quote=False)),
+    ("str.translate", lambda text: text.translate(TRANSLATE_TABLE)),
+]
+
+def unescaped_leaf_to_html(self) -> str:
+    if self.value is None:
+        raise ValueError("LeafNode must have a value")
+    if self.tag is None:
+        return f"{self.value}"
+    return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+def unescaped_props_to_html(self) -> str:
+    if not self.props:
+        return ""
+    return "".join(f' {k}="{v}"' for k, v in self.props.items())
+
+def corpus_strings(documents: list[str]) -> list[str]:
+    """The text of every plain text node in the corpus, plus a copy of each with markup characters mixed in so the slow path is exercised too."""
+    strings = []
+    for document in documents:
+        for block in markdown_to_blocks(document):
+            for node in text_to_textnodes(block.replace("\n", " ")):
+                if node.text_type == TextType.TEXT:
+                    strings.append(node.text)
+    return strings + [f"a < b && {text} > c" for text in strings[::10]]
+
+def run(config: CorpusConfig, repeat: int) -> list[dict]:
+    with tempfile.TemporaryDirectory() as workdir:
+        documents = []
+        for path in generate_corpus(workdir, config):
+            with open(path) as f:
+                documents.append(f.read())
+
+    results = []
+    strings = corpus_strings(documents)
+    for name, escape in ESCAPERS:
+        seconds = best_of(repeat, lambda: [escape(s) for s in strings])
+        results.append({"case": name, "items": len(strings), "unit": "strings", "per_second": round(len(strings) / seconds)})
+
+    trees = [markdown_to_html_node(document) for document in documents]
+    for name, patched in (("to_html", False), ("to_html unescaped", True)):
+        if patched:
+            with mock.patch.object(htmlnode.LeafNode, "to_html", unescaped_leaf_to_html), \
+                    mock.patch.object(htmlnode.HTMLNode, "props_to_html", unescaped_props_to_html):
+                seconds = best_of(repeat, lambda: [tree.to_html() for tree in trees])
+        else:
+            seconds = best_of(repeat, lambda: [tree.to_html() for tree in trees])
+        results.append({"case": name, "items": len(trees), "unit": "pages", "per_second": round(len(trees) / seconds)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML escaping.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    config = DEFAULTS._replace(pages=args.pages)
+    print(f"{'case':<20}{'items':>10}{'unit':>9}{'per second':>14}")
+    for result in run(config, args.repeat):
+        print(f"{result['case']:<20}{result['items']:>10}{result['unit']:>9}{result['per_second']:>14,}")
+
+if __name__ == "__main__":
+    main()
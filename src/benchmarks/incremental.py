@@ -0,0 +1,85 @@
+"""Measures an incremental build after a one-page edit, with and without the block cache.
+
+Run from `src/`:
+```
+python3 -m benchmarks.incremental [--pages N] [--runs N] [--tolerance 0.25] [--output incremental.json]
+```
+A synthetic site is built once from scratch (filling the block cache), then one page is edited and the site rebuilt `--runs` times, each build in a fresh process like a user's. The same is done with `--no-block-cache` in a second copy of the site. The run fails (exit status 1) if the fastest rebuild with the cache takes longer than the fastest without it by more than `--tolerance`: the cache exists to make edits cheaper, so its own loading and saving must never cost more than the blocks it saves rendering.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import DEFAULTS, generate_corpus
+from make_runner import SRC_DIR
+
+MODES = {
+    "block_cache": [],
+    "no_block_cache": ["--no-block-cache"],
+}
+
+def run_build(workdir: str, *flags: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(SRC_DIR, "main.py"), "/", *flags],
+        cwd=workdir, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - start
+
+def measure(name: str, flags: list[str], pages: int, runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = generate_corpus(workdir, DEFAULTS._replace(pages=pages))
+        cold = run_build(workdir, *flags)
+        seconds = []
+        for run in range(runs):
+            with open(paths[0], "a") as f:
+                f.write(f"\nAn edit, number {run}.\n")
+            seconds.append(run_build(workdir, *flags))
+        state = sum(
+            os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir) if name.startswith(".block_cache")
+        )
+    return {
+        "mode": name,
+        "cold_ms": round(cold * 1000, 1),
+        "median_ms": round(statistics.median(seconds) * 1000, 1),
+        "min_ms": round(min(seconds) * 1000, 1),
+        "cache_bytes": state,
+    }
+
+def check(results: list[dict], tolerance: float) -> list[str]:
+    by_mode = {result["mode"]: result for result in results}
+    # the fastest run is the least noisy, and a single edited page renders in a few milliseconds either way
+    cached, uncached = by_mode["block_cache"]["min_ms"], by_mode["no_block_cache"]["min_ms"]
+    if cached > uncached * (1 + tolerance):
+        return [f"block_cache: min_ms {cached} exceeds no_block_cache {uncached} by more than {tolerance:.0%}"]
+    return []
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rebuilding a site after a one-page edit.")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown of the cached rebuild (default: 0.25)")
+    args = parser.parse_args()
+
+    results = [measure(name, flags, args.pages, args.runs) for name, flags in MODES.items()]
+    print(f"{'mode':<16}{'cold ms':>10}{'median ms':>11}{'min ms':>9}{'cache bytes':>13}")
+    for result in results:
+        print(f"{result['mode']:<16}{result['cold_ms']:>10}{result['median_ms']:>11}{result['min_ms']:>9}{result['cache_bytes']:>13}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    failures = check(results, args.tolerance)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measures the memory footprint and creation rate of the node classes.
+
+Run from `src/`:
+```
+python3 -m benchmarks.nodes [--count N]
+```
+Each slotted class is compared against a plain class holding the same attributes in a per-instance `__dict__`, which is how every node was stored before `__slots__` was added.
+"""
+import argparse
+import time
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+class DictNode:
+    """Stand-in for the pre-`__slots__` node layout: the same attributes, stored in an instance `__dict__`."""
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+class DictLeafNode(DictNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag=tag, value=value, props=props)
+
+class DictParentNode(DictNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag=tag, children=children, props=props)
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+def make_leaf(cls, i):
+    return cls("b", "bold text")
+
+def make_parent(cls, i):
+    return cls("p", [])
+
+def make_text(cls, i):
+    return cls("some text", TextType.TEXT)
+
+CASES = [
+    ("LeafNode", LeafNode, DictLeafNode, make_leaf),
+    ("ParentNode", ParentNode, DictParentNode, make_parent),
+    ("TextNode", TextNode, DictTextNode, make_text),
+]
+
+def bytes_per_node(cls, factory, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(cls, i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the nodes costs one pointer per node
+    return (after - before) / len(nodes) - 8
+
+def nodes_per_second(cls, factory, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        factory(cls, i)
+    return count / (time.perf_counter() - start)
+
+def run(count: int = 200_000) -> list[dict]:
+    results = []
+    for name, slotted, unslotted, factory in CASES:
+        for variant, cls in (("slots", slotted), ("dict", unslotted)):
+            results.append({
+                "node": name,
+                "variant": variant,
+                "bytes_per_node": round(bytes_per_node(cls, factory, count), 1),
+                "nodes_per_second": round(nodes_per_second(cls, factory, count)),
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark node memory and creation rate.")
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+    print(f"{'node':<12}{'variant':<9}{'bytes/node':>12}{'nodes/s':>14}")
+    for result in run(args.count):
+        print(f"{result['node']:<12}{result['variant']:<9}{result['bytes_per_node']:>12}{result['nodes_per_second']:>14,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Times each stage of the build over a synthetic corpus and emits the results as JSON.
+
+Run from `src/`:
+```
+python3 -m benchmarks.stages [--pages N] [--repeat R] [--output results.json]
+```
+Every stage is run `--repeat` times and the fastest run is reported, so results from two commits can be compared directly.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import CorpusConfig, DEFAULTS, generate_corpus
+from blocktype import BlockType, block_to_block_type
+from markdown_split import markdown_to_blocks, scan_blocks, text_to_textnodes
+from markdown_to_html_node import markdown_to_html_node
+from markdown_generate import generate_page
+from static_to_public import sync_source_dir_to_destination_dir
+import site_build
+
+def inline_texts(block: str, block_type: BlockType) -> list[str]:
+    """The strings `markdown_to_html_node` hands to `text_to_textnodes` for a block."""
+    lines = block.split("\n")
+    match block_type:
+        case BlockType.PARAGRAPH:
+            return [" ".join(lines)]
+        case BlockType.HEADING:
+            return [block.lstrip("#").strip()]
+        case BlockType.UNORDERED_LIST:
+            return [line[2:] for line in lines]
+        case BlockType.ORDERED_LIST:
+            return [line.split(". ", 1)[1] for line in lines]
+        case BlockType.QUOTE:
+            return [" ".join(line.lstrip(">").strip() for line in lines)]
+        case _:
+            return []
+
+def best_of(repeat: int, func, setup=None) -> float:
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(config: CorpusConfig, repeat: int, workdir: str) -> list[dict]:
+    results = []
+
+    def record(stage: str, seconds: float, items: int, unit: str):
+        results.append({
+            "stage": stage,
+            "seconds": round(seconds, 6),
+            "items": items,
+            "unit": unit,
+            "per_second": round(items / seconds, 1) if seconds else None,
+        })
+
+    paths = generate_corpus(workdir, config)
+    documents = []
+    for path in paths:
+        with open(path) as f:
+            documents.append(f.read())
+    total_bytes = sum(len(document) for document in documents)
+
+    record("markdown_to_blocks", best_of(repeat, lambda: [markdown_to_blocks(d) for d in documents]), total_bytes, "bytes")
+
+    record("scan_blocks", best_of(repeat, lambda: [scan_blocks(d) for d in documents]), total_bytes, "bytes")
+
+    blocks = [block for document in documents for block in markdown_to_blocks(document)]
+    record("block_to_block_type", best_of(repeat, lambda: [block_to_block_type(b) for b in blocks]), len(blocks), "blocks")
+
+    texts = [text for block in blocks for text in inline_texts(block, block_to_block_type(block))]
+    record("text_to_textnodes", best_of(repeat, lambda: [text_to_textnodes(t) for t in texts]), len(texts), "strings")
+
+    record("markdown_to_html_node", best_of(repeat, lambda: [markdown_to_html_node(d) for d in documents]), len(documents), "pages")
+
+    trees = [markdown_to_html_node(document) for document in documents]
+    record("to_html", best_of(repeat, lambda: [tree.to_html() for tree in trees]), len(trees), "pages")
+
+    output_dir = os.path.join(workdir, "generate_page")
+    template = os.path.join(workdir, "template.html")
+    outputs = [os.path.join(output_dir, f"{i}.html") for i in range(len(paths))]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        seconds = best_of(repeat, lambda: [generate_page(p, template, o, "/") for p, o in zip(paths, outputs)])
+    record("generate_page", seconds, len(paths), "pages")
+
+    static_dir = os.path.join(workdir, "static")
+    static_out = os.path.join(workdir, "static_out")
+    static_files = config.static_files + 1
+    record("static_sync_cold", best_of(
+        repeat,
+        lambda: sync_source_dir_to_destination_dir(static_dir, static_out),
+        setup=lambda: shutil.rmtree(static_out, ignore_errors=True),
+    ), static_files, "files")
+    record("static_sync_warm", best_of(repeat, lambda: sync_source_dir_to_destination_dir(static_dir, static_out)), static_files, "files")
+
+    def clean_build():
+        shutil.rmtree(site_build.PUBLIC_PATH, ignore_errors=True)
+        if os.path.exists(site_build.BLOCK_CACHE_PATH):
+            os.remove(site_build.BLOCK_CACHE_PATH)
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            record("build_cold", best_of(
+                repeat,
+                lambda: site_build.build_site("/", force=True),
+                setup=clean_build,
+            ), len(paths), "pages")
+            record("build_no_change", best_of(repeat, lambda: site_build.build_site("/")), len(paths), "pages")
+    finally:
+        os.chdir(cwd)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each build stage on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--blocks", type=int, default=DEFAULTS.blocks_per_page)
+    parser.add_argument("--link-density", type=float, default=DEFAULTS.link_density)
+    parser.add_argument("--list-length", type=int, default=DEFAULTS.list_length)
+    parser.add_argument("--code-lines", type=int, default=DEFAULTS.code_lines)
+    parser.add_argument("--seed", type=int, default=DEFAULTS.seed)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    config = CorpusConfig(
+        pages=args.pages,
+        blocks_per_page=args.blocks,
+        link_density=args.link_density,
+        list_length=args.list_length,
+        code_lines=args.code_lines,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run(config, args.repeat, workdir)
+
+    for result in results:
+        print(f"{result['stage']:<24}{result['seconds']:>10.4f}s{result['per_second']:>14,.1f} {result['unit']}/s", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": config._asdict(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
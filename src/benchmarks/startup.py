@@ -0,0 +1,123 @@
+"""Measures cold-start cost of a no-change build, from source and from the zipapp runner.
+
+Run from `src/`:
+```
+python3 -m benchmarks.startup [--pages N] [--runs N] [--max-ms 100] [--output startup.json]
+python3 -m benchmarks.startup --baseline startup.json [--tolerance 0.25]
+```
+A synthetic site is built once, then each entry point is timed on builds where nothing changed, and run once more under `-X importtime` to total the import cost and list what was imported. The run fails (exit status 1) if a no-change build imported any of the rendering modules, if its median wall time exceeds `--max-ms` (`DEFAULT_MAX_MS` unless given; 0 disables it), or if, given a `--baseline` from an earlier run, wall or import time grew by more than `--tolerance`.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import DEFAULTS, generate_corpus
+from make_runner import SRC_DIR, make_runner
+
+# modules that only rendering a page needs; a no-change build must not import them
+RENDER_MODULES = {"markdown_generate", "minify", "markdown_to_html_node", "markdown_split", "blocktype", "textnode", "htmlnode", "textwrap"}
+# ceiling on a no-change build of the default corpus, interpreter startup included; such builds take 60-70 ms on a
+# typical machine, about 12 ms of it the bare interpreter and most of the rest importing `argparse`, `json`,
+# `hashlib` and the other standard modules the build itself needs
+DEFAULT_MAX_MS = 100
+
+def import_times(stderr: str) -> dict[str, int]:
+    """Parses `-X importtime` output into self time (microseconds) per module."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+def run_build(command: list[str], workdir: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, *command, "/"],
+        cwd=workdir, capture_output=True, text=True, check=True,
+    )
+
+def measure(name: str, command: list[str], workdir: str, runs: int) -> dict:
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_build(command, workdir)
+        seconds.append(time.perf_counter() - start)
+    imports = import_times(run_build(command, workdir, "-X", "importtime").stderr)
+    return {
+        "entry": name,
+        "median_ms": round(statistics.median(seconds) * 1000, 1),
+        "min_ms": round(min(seconds) * 1000, 1),
+        "import_ms": round(sum(imports.values()) / 1000, 1),
+        "modules": len(imports),
+        "render_modules": sorted(RENDER_MODULES & imports.keys()),
+    }
+
+def run(pages: int, runs: int) -> list[dict]:
+    with tempfile.TemporaryDirectory() as workdir:
+        generate_corpus(workdir, DEFAULTS._replace(pages=pages))
+        runner = os.path.join(workdir, "ssg.pyz")
+        make_runner(runner)
+        entries = [
+            ("interpreter", ["-c", "pass"]),
+            ("main.py", [os.path.join(SRC_DIR, "main.py")]),
+            ("ssg.pyz", [runner]),
+        ]
+        # the first build renders everything; every measured build after it has nothing to do
+        run_build(entries[1][1], workdir)
+        return [measure(name, command, workdir, runs) for name, command in entries]
+
+def check(results: list[dict], baseline: list[dict], tolerance: float, max_ms: float = DEFAULT_MAX_MS) -> list[str]:
+    failures = []
+    previous = {result["entry"]: result for result in baseline or []}
+    for result in results:
+        if result["render_modules"]:
+            failures.append(f"{result['entry']}: no-change build imported {', '.join(result['render_modules'])}")
+        if result["entry"] == "interpreter":
+            continue
+        if max_ms and result["median_ms"] > max_ms:
+            failures.append(f"{result['entry']}: median_ms {result['median_ms']} exceeds {max_ms}")
+        before = previous.get(result["entry"])
+        if before is None:
+            continue
+        for key in ("median_ms", "import_ms"):
+            if result[key] > before[key] * (1 + tolerance):
+                failures.append(f"{result['entry']}: {key} {result[key]} exceeds baseline {before[key]} by more than {tolerance:.0%}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold start of a no-change build.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--baseline", default=None, help="fail if slower than the results in this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline (default: 0.25)")
+    parser.add_argument("--max-ms", type=float, default=DEFAULT_MAX_MS,
+                        help=f"fail if a no-change build takes longer, 0 to disable (default: {DEFAULT_MAX_MS})")
+    args = parser.parse_args()
+
+    results = run(args.pages, args.runs)
+    print(f"{'entry':<14}{'median ms':>11}{'min ms':>9}{'import ms':>11}{'modules':>9}")
+    for result in results:
+        print(f"{result['entry']:<14}{result['median_ms']:>11}{result['min_ms']:>9}{result['import_ms']:>11}{result['modules']:>9}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = check(results, baseline, args.tolerance, args.max_ms)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
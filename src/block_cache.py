@@ -0,0 +1,184 @@
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# what an entry holds: a block's rendered HTML, or its plain text for the search index (see `search_index`)
+HTML = b"block"
+TEXT = b"text"
+
+SCHEMA = """
+CREATE TABLE meta (namespace TEXT NOT NULL, tick INTEGER NOT NULL, entries INTEGER NOT NULL, bytes INTEGER NOT NULL);
+CREATE TABLE blocks (key TEXT PRIMARY KEY, used INTEGER NOT NULL, size INTEGER NOT NULL, html TEXT NOT NULL);
+CREATE INDEX blocks_used ON blocks (used);
+"""
+
+class BlockCache:
+    """A size-capped LRU cache from a markdown block's text to its rendered HTML.
+
+    Keys are hashes of the block text and of what is stored for it (`HTML`, or `TEXT` for its plain text). The whole cache belongs to a `namespace` (the generator version): a cache saved under another namespace is discarded on load, so a change to the parser or renderer never serves stale HTML. Sizes are UTF-8 bytes, and least-recently-used blocks are evicted once they add up to more than `max_bytes`. Only `HTML` lookups count towards `hits` and `misses`: `TEXT` is only looked up for blocks whose HTML was just found, so counting it would inflate the hit rate.
+
+    A cache made by `load` is backed by a SQLite database, so it survives between builds without ever being read or written whole: a lookup that misses memory reads that one entry, and `save` inserts the entries added since, marks the ones used as recent and evicts the least recently used. Editing one page of a large site touches a few rows, however big the cache has grown. Entries read or added are also kept in memory (within `max_bytes`), where a long-running process (see `build_daemon`) finds them again. A cache made directly lives in memory only.
+    """
+    def __init__(self, namespace: str = "", max_bytes: int = DEFAULT_MAX_BYTES):
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # only for caches from `load`: the database, and what `save` has to write to it
+        self.db = None
+        self.persistent = False
+        self.reset = False
+        self.stored = (0, 0)
+        self.pending = {}
+        self.used = set()
+
+    def key(self, block: str, kind: bytes = HTML) -> str:
+        return hashlib.blake2b(block.encode(), digest_size=16, person=kind).hexdigest()
+
+    def get(self, block: str, kind: bytes = HTML) -> str:
+        key = self.key(block, kind)
+        html = self.entries.get(key)
+        if html is not None:
+            self.entries.move_to_end(key)
+        elif self.db is not None:
+            row = self.db.execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                html = row[0]
+                self._remember(key, html)
+        if html is None:
+            if kind == HTML:
+                self.misses += 1
+            return None
+        if kind == HTML:
+            self.hits += 1
+        if self.persistent:
+            self.used.add(key)
+        return html
+
+    def put(self, block: str, html: str, kind: bytes = HTML):
+        self.merge([(self.key(block, kind), html)])
+
+    def merge(self, entries: list[tuple[str, str]]):
+        """Adds entries by key, as returned by `take_added`; an entry without HTML was only used."""
+        for key, html in entries:
+            if html is None:
+                if self.persistent:
+                    self.used.add(key)
+                continue
+            self._remember(key, html)
+            if self.persistent:
+                self.pending[key] = html
+
+    def take_added(self) -> list[tuple[str, str]]:
+        """Returns (and forgets) the entries added since the last call, and the keys used as `(key, None)`, so a worker process can ship them back to the build to `merge` and save."""
+        added = list(self.pending.items())
+        added.extend((key, None) for key in self.used)
+        self.pending = {}
+        self.used = set()
+        return added
+
+    def totals(self) -> tuple[int, int]:
+        """The number of entries and bytes the cache holds: in its database as of the last `load` or `save`, or in memory."""
+        return self.stored if self.persistent else (len(self.entries), self.size)
+
+    def _remember(self, key: str, html: str):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= _encoded_size(previous)
+        self.entries[key] = html
+        self.size += _encoded_size(html)
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= _encoded_size(evicted)
+            if not self.persistent:
+                self.evictions += 1
+
+    @classmethod
+    def load(cls, path: str, namespace: str = "", max_bytes: int = DEFAULT_MAX_BYTES) -> "BlockCache":
+        """Opens the cache database at `path`; nothing is read until a lookup needs it. A missing or corrupt database, or one written for another namespace, gives an empty cache, replaced on `save`."""
+        cache = cls(namespace, max_bytes)
+        cache.persistent = True
+        if not os.path.exists(path):
+            cache.reset = True
+            return cache
+        try:
+            db = sqlite3.connect(path)
+            (version,) = db.execute("PRAGMA user_version").fetchone()
+            row = db.execute("SELECT namespace, entries, bytes FROM meta").fetchone() if version == CACHE_VERSION else None
+        except sqlite3.Error:
+            cache.reset = True
+            return cache
+        if row is None or row[0] != namespace:
+            db.close()
+            cache.reset = True
+            return cache
+        cache.db = db
+        cache.stored = (row[1], row[2])
+        return cache
+
+    def save(self, path: str):
+        """Writes the entries added and the uses recorded since the last save, then evicts least-recently-used entries until the database holds at most `max_bytes`."""
+        if not self.pending and not self.used and not self.reset:
+            return
+        created = self.reset
+        if created:
+            self._create(path)
+        db = self.db
+        with db:
+            tick, entries, size = db.execute("SELECT tick, entries, bytes FROM meta").fetchone()
+            tick += 1
+            rows = [(key, tick, _encoded_size(html), html) for key, html in self.pending.items()]
+            if not created:
+                # entries added again replace the stored ones, whose sizes no longer count
+                for key, *_ in rows:
+                    previous = db.execute("SELECT size FROM blocks WHERE key = ?", (key,)).fetchone()
+                    if previous is not None:
+                        entries -= 1
+                        size -= previous[0]
+            db.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?)", rows)
+            entries += len(rows)
+            size += sum(row[2] for row in rows)
+            db.executemany("UPDATE blocks SET used = ? WHERE key = ?", [(tick, key) for key in self.used - self.pending.keys()])
+            while size > self.max_bytes:
+                oldest = db.execute("SELECT key, size FROM blocks ORDER BY used LIMIT 256").fetchall()
+                if not oldest:
+                    break
+                for key, evicted_size in oldest:
+                    db.execute("DELETE FROM blocks WHERE key = ?", (key,))
+                    entries -= 1
+                    size -= evicted_size
+                    self.evictions += 1
+                    previous = self.entries.pop(key, None)
+                    if previous is not None:
+                        self.size -= _encoded_size(previous)
+                    if size <= self.max_bytes:
+                        break
+            db.execute("UPDATE meta SET tick = ?, entries = ?, bytes = ?", (tick, entries, size))
+        self.stored = (entries, size)
+        self.pending = {}
+        self.used = set()
+
+    def _create(self, path: str):
+        """Replaces whatever is at `path` with an empty database for this namespace."""
+        if self.db is not None:
+            self.db.close()
+        for stale_path in (path, f"{path}-journal"):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+        db = sqlite3.connect(path)
+        with db:
+            db.executescript(SCHEMA)
+            db.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+            db.execute("INSERT INTO meta VALUES (?, 0, 0, 0)", (self.namespace,))
+        self.db = db
+        self.reset = False
+
+def _encoded_size(html: str) -> int:
+    return len(html) if html.isascii() else len(html.encode())
@@ -9,23 +9,44 @@ class BlockType(Enum):
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
 
-HEADING_PREFIXES = [f"{'#' * i} " for i in range(6, 0, -1)]
 ORDERED_PATTERN = re.compile(r'^(?P<index>\d+)\.\s+(?P<text>.+)$')
+# the characters a heading, code block, quote or unordered list starts with (an ordered list starts with a digit)
+MARKERS = "#`>-"
 
 def block_to_block_type(block: str) -> BlockType:
-    lines = block.splitlines() or [""]
+    first = block[:1]
+    if first not in MARKERS and not first.isdecimal():
+        # most blocks are paragraphs, which need not be split into lines at all
+        return BlockType.PARAGRAPH
+    lines = block.split("\n")
+    return block_lines_to_block_type(lines, block)
+
+def block_lines_to_block_type(lines: list[str], block: str) -> BlockType:
+    """Classifies a block that has already been split into `lines`. The quote and list checks share a single pass over the lines, which stops as soon as none of them can still match."""
     first = lines[0]
+    if first[:1] not in MARKERS and not first[:1].isdecimal():
+        return BlockType.PARAGRAPH
+
+    if first.startswith("#"):
+        level = len(first) - len(first.lstrip("#"))
+        if level <= 6 and first[level:level + 1] == " ":
+            return BlockType.HEADING
+    if first.startswith("```") and block.endswith("```"):
+        return BlockType.CODE
 
-    checks = [
-        (lambda: any(first.startswith(pref) for pref in HEADING_PREFIXES),  BlockType.HEADING),
-        (lambda: first.startswith("```") and block.endswith("```"),         BlockType.CODE),
-        (lambda: all(line.startswith(">") for line in lines),               BlockType.QUOTE),
-        (lambda: all(line.startswith("- ") for line in lines),              BlockType.UNORDERED_LIST),
-        (lambda: all(ORDERED_PATTERN.match(line) for line in lines),        BlockType.ORDERED_LIST),
-    ]
+    is_quote = is_unordered = is_ordered = True
+    for line in lines:
+        if is_quote and not line.startswith(">"):
+            is_quote = False
+        if is_unordered and not line.startswith("- "):
+            is_unordered = False
+        if is_ordered and not ORDERED_PATTERN.match(line):
+            is_ordered = False
+        if not (is_quote or is_unordered or is_ordered):
+            return BlockType.PARAGRAPH
 
-    for predicate, block_type in checks:
-        if predicate():
-            return block_type
-    
-    return BlockType.PARAGRAPH
\ No newline at end of file
+    if is_quote:
+        return BlockType.QUOTE
+    if is_unordered:
+        return BlockType.UNORDERED_LIST
+    return BlockType.ORDERED_LIST
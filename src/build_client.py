@@ -0,0 +1,74 @@
+"""Thin client for `build_daemon`. Takes the same arguments as `main.py`:
+```
+python3 src/build_client.py /static-site-generator/ --jobs 4
+python3 src/build_client.py render content/index.md [basepath]
+python3 src/build_client.py ping
+python3 src/build_client.py stop
+```
+Only the standard library modules needed to talk to the socket are imported, so a build costs little more than interpreter startup plus the build itself. When no daemon is running (or it has to restart because the generator's code changed) the build runs in this process instead.
+"""
+import json
+import os
+import socket
+import sys
+
+SOCKET_PATH = "./.build_daemon.sock"
+# exit status for a request the daemon refused because it is running outdated code
+RESTART_STATUS = 75
+
+def request(message: dict, path: str = SOCKET_PATH, output=None) -> dict:
+    """Sends `message` to the daemon and returns its final reply. Build output sent along the way is written to `output` (default: stdout) as it arrives. Raises `OSError` if no daemon is listening on `path`."""
+    output = output if output is not None else sys.stdout
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("r") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "output" in reply:
+                    output.write(reply["output"])
+                    continue
+                return reply
+    raise ConnectionError("daemon closed the connection without a reply")
+
+def build_locally(argv: list[str]) -> int:
+    import main as build_main
+    try:
+        build_main.main(argv)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    return 0
+
+def main(argv: list[str] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else None
+    try:
+        if command == "ping":
+            reply = request({"command": "ping"})
+            print(f"build daemon {reply['pid']}: {reply['builds']} builds in {reply['uptime']:.0f}s")
+            return reply["status"]
+        if command == "stop":
+            return request({"command": "stop"})["status"]
+        if command == "render":
+            basepath = argv[2] if len(argv) > 2 else None
+            reply = request({"command": "render", "cwd": os.getcwd(), "source": argv[1], "basepath": basepath})
+            if reply["status"] == 0:
+                sys.stdout.write(reply["html"])
+            else:
+                print(reply["error"], file=sys.stderr)
+            return reply["status"]
+        reply = request({"command": "build", "cwd": os.getcwd(), "argv": argv})
+    except OSError:
+        if command in ("ping", "stop", "render"):
+            print("no build daemon is running", file=sys.stderr)
+            return 1
+        return build_locally(argv)
+    if reply["status"] == RESTART_STATUS:
+        print(reply["error"], file=sys.stderr)
+        return build_locally(argv)
+    if reply.get("error"):
+        print(reply["error"], file=sys.stderr)
+    return reply["status"]
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import argparse
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+import traceback
+
+import main as build_main
+from build_client import RESTART_STATUS, SOCKET_PATH
+from build_manifest import generator_version
+from markdown_generate import render_page_html
+from site_build import TEMPLATE_PATH, keep_worker_pools, release_worker_pools
+
+class ReplyWriter:
+    """A text stream that forwards everything written to it to the client as `{"output": ...}` messages, so build output shows up while the build runs."""
+    def __init__(self, send):
+        self.send = send
+
+    def write(self, text: str) -> int:
+        if text:
+            self.send(output=text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    """Handles one request per connection: a JSON line with a `command` (`build`, `render`, `ping` or `stop`), answered by any number of output messages and a final reply holding `status`."""
+    def send(self, **message):
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.readline())
+            command = getattr(self, f"do_{message['command']}")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self.send(status=2, error="invalid request")
+            return
+        try:
+            command(message)
+        except BrokenPipeError:
+            pass
+
+    def check_request(self, message: dict) -> bool:
+        """Refuses requests the daemon cannot serve correctly: ones from another project directory, and any request once the generator's own code changed on disk (the daemon would still be running the old code)."""
+        if os.path.realpath(message.get("cwd", "")) != os.getcwd():
+            self.send(status=2, error=f"build daemon serves {os.getcwd()}")
+            return False
+        if generator_version() != self.server.generator:
+            self.send(status=RESTART_STATUS, error="generator changed since the build daemon started; stopping it")
+            self.server.stop()
+            return False
+        return True
+
+    def do_ping(self, message: dict):
+        self.send(status=0, pid=os.getpid(), builds=self.server.builds, uptime=time.time() - self.server.started)
+
+    def do_stop(self, message: dict):
+        self.send(status=0)
+        self.server.stop()
+
+    def do_build(self, message: dict):
+        if not self.check_request(message):
+            return
+        start = time.perf_counter()
+        writer = ReplyWriter(self.send)
+        status = 0
+        with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+            try:
+                build_main.main(message.get("argv", []))
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception:
+                traceback.print_exc()
+                status = 1
+        self.server.builds += 1
+        self.send(status=status, seconds=time.perf_counter() - start)
+
+    def do_render(self, message: dict):
+        if not self.check_request(message):
+            return
+        base_path = build_main.base_path_from_arg(message.get("basepath"))
+        try:
+            html = render_page_html(message["source"], TEMPLATE_PATH, base_path)
+        except Exception as e:
+            self.send(status=1, error=f"cannot render {message.get('source')}: {e}")
+            return
+        self.send(status=0, html=html)
+
+class BuildDaemon(socketserver.UnixStreamServer):
+    """A long-lived build server for the project in the current directory, listening on a Unix socket.
+
+    Requests are handled one at a time, in this process, so everything a build warms up stays warm for the next one: imported modules and compiled regexes, compiled templates (`template.load_template`), the block cache (`site_build.load_block_cache`) and, for `--jobs` builds, the worker processes (`site_build.keep_worker_pools`). The daemon records the generator version it was started with and stops instead of building with outdated code; `build_client` then falls back to building in-process.
+    """
+    def __init__(self, path: str = SOCKET_PATH):
+        remove_stale_socket(path)
+        super().__init__(path, BuildRequestHandler)
+        self.path = path
+        self.generator = generator_version()
+        self.started = time.time()
+        self.builds = 0
+        keep_worker_pools()
+
+    def stop(self):
+        # shutdown() waits for serve_forever to return, so it cannot be called from a request handler's thread
+        threading.Thread(target=self.shutdown).start()
+
+    def server_close(self):
+        super().server_close()
+        release_worker_pools()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+
+def remove_stale_socket(path: str):
+    """Removes a socket file left behind by a daemon that is gone. Raises `OSError` if a daemon is still listening on it."""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+    raise OSError(f"a build daemon is already listening on {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a warm build process for build_client.py to talk to.")
+    parser.add_argument("--socket", default=SOCKET_PATH, help=f"Unix socket to listen on (default: {SOCKET_PATH})")
+    args = parser.parse_args()
+    with BuildDaemon(args.socket) as daemon:
+        print(f"Build daemon {os.getpid()} listening on {args.socket}")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def generator_version() -> str:
+    """Hashes the generator's own modules so that any change to the parser or renderer invalidates every page built by an older version."""
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    if not os.path.isdir(src_dir):
+        # running from a zipapp (see `make_runner`), which records the version of the sources it was built from
+        from _build_info import GENERATOR_VERSION
+        return GENERATOR_VERSION
+    return source_version(src_dir)
+
+def source_version(src_dir: str) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(src_dir)):
+        if not name.endswith(".py") or name.startswith("test_"):
+            continue
+        digest.update(name.encode())
+        with open(os.path.join(src_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+class BuildManifest:
+    """Maps each output path to the inputs it was generated from:
+    ```
+    {
+        "docs/blog/tom/index.html": {
+            "source": "content/blog/tom/index.md",
+            "size": 1234,
+            "mtime_ns": 1700000000000000000,
+            "source_hash": "...",
+            "template_hash": "...",
+            "base_path": "/",
+            "generator": "...",
+        },
+    }
+    ```
+    A page is up to date when its output still exists and every recorded input matches. `size` and `mtime_ns` let an untouched source skip hashing entirely - it costs a single `stat`. `save` only rewrites the file once an entry was recorded or pruned, so a build where nothing changed writes nothing.
+    """
+    def __init__(self, path: str, entries: dict = None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        """Reads a manifest from disk. A missing, corrupt or out-of-date manifest is treated as empty so the next build regenerates everything."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("pages", {}))
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "pages": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def source_hash(self, output_path: str, source_path: str, stat: os.stat_result) -> str:
+        """Returns the hash of `source_path`, reusing the recorded hash when size and mtime are unchanged."""
+        entry = self.entries.get(output_path)
+        if (
+            entry is not None
+            and entry.get("source") == source_path
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return entry["source_hash"]
+        return hash_file(source_path)
+
+    def make_entry(self, output_path: str, source_path: str, template_hash: str, base_path: str, generator: str) -> dict:
+        stat = os.stat(source_path)
+        return {
+            "source": source_path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "source_hash": self.source_hash(output_path, source_path, stat),
+            "template_hash": template_hash,
+            "base_path": base_path,
+            "generator": generator,
+        }
+
+    def is_fresh(self, output_path: str, entry: dict) -> bool:
+        if not os.path.exists(output_path):
+            return False
+        recorded = self.entries.get(output_path)
+        if recorded is None:
+            return False
+        keys = ("source", "source_hash", "template_hash", "base_path", "generator")
+        return all(recorded.get(key) == entry[key] for key in keys)
+
+    def record(self, output_path: str, entry: dict):
+        if self.entries.get(output_path) != entry:
+            self.entries[output_path] = entry
+            self.dirty = True
+
+    def prune(self, output_paths: set[str]):
+        """Drops entries for pages whose source no longer exists."""
+        for output_path in list(self.entries):
+            if output_path not in output_paths:
+                del self.entries[output_path]
+                self.dirty = True
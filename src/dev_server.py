@@ -0,0 +1,476 @@
+"""Serves `docs/` for previews, in place of `python3 -m http.server`:
+```
+python3 src/dev_server.py [--port 8888] [--directory docs]
+python3 src/dev_server.py --load-test [--connections 16] [--requests 20000] [--revalidate]
+python3 src/dev_server.py --load-test http://preview.example.com:8888/
+python3 src/dev_server.py --render [--base-path /]
+```
+Requests are handled on a thread each, over keep-alive HTTP/1.1 connections. Files are kept in an in-memory cache (checked against the file's mtime and size on every request, so rebuilt pages are picked up at once), compressible ones together with a gzip variant: the `.gz` written by `main.py --gzip` when it is current, otherwise one compressed on first use. Files over `MAX_CACHED_FILE_BYTES` are streamed from disk instead, and so is their `.gz`; without one, only their gzip variant is kept in memory. Every response carries an `ETag`, and a matching `If-None-Match` gets a `304`. Fingerprinted assets (`main.py --fingerprint`) are served as immutable.
+
+`--render` serves the project itself instead of a build, rendering each page when it is first requested (see `page_server`).
+
+`--load-test` starts a server in a child process (or targets the given URL), requests every file under the directory from `--connections` keep-alive connections and reports throughput and latency.
+"""
+import argparse
+import email.utils
+import gzip
+import io
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+from assets import HASH_LENGTH
+from precompress import GZIP_SUFFIX, is_compressed, is_compressible
+
+DEFAULT_PORT = 8888
+DEFAULT_DIRECTORY = "./docs"
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+# larger files are streamed from disk on every request instead of taking up the cache
+MAX_CACHED_FILE_BYTES = 8 * 1024 * 1024
+# for gzip variants made on the fly; `main.py --gzip` writes better ones ahead of time
+MEMORY_GZIP_LEVEL = 6
+
+FINGERPRINT_PATTERN = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}\.[^./]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+# anything else may change with the next build, so browsers revalidate it (cheaply, thanks to the ETag)
+REVALIDATE = "no-cache"
+
+class FileBody:
+    """A body too large to keep in memory: the `size` bytes of the file at `path`, sent straight from disk."""
+    __slots__ = ("path", "size")
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+class CachedFile(NamedTuple):
+    # bytes, or a `FileBody` for large files
+    body: bytes
+    gzip_body: bytes
+    etag: str
+    content_type: str
+    last_modified: str
+    # `FileCache.stamp` of the file `body` was read from
+    stamp: tuple
+
+class FileCache:
+    """Files by path, least recently used first, up to `max_bytes` of bodies and gzip variants held in memory. An entry is only used while the file on disk still has the mtime and size it was read with. Files over `MAX_CACHED_FILE_BYTES` are cached as a `FileBody` (and the gzip variant made for them, if any), so they cost a `stat` per request rather than a read and a compression. `html_filter`, if given, rewrites every HTML body as it is loaded (e.g. `watch.inject_live_reload`); gzip files from disk are not used for HTML then, since they hold the unfiltered page."""
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES, html_filter=None):
+        self.max_bytes = max_bytes
+        self.html_filter = html_filter
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path: str) -> CachedFile:
+        """Returns the cached file at `path`, reading it first if it is new or changed. Returns None if `path` is not a regular file."""
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry.stamp == self.stamp(path, file_stat):
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        try:
+            entry = self.load(path)
+        except OSError:
+            return None
+        cost = _cost(entry)
+        with self.lock:
+            previous = self.entries.pop(path, None)
+            if previous is not None:
+                self.size -= _cost(previous)
+            self.entries[path] = entry
+            self.size += cost
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= _cost(evicted)
+        return entry
+
+    def stamp(self, path: str, file_stat: os.stat_result) -> tuple:
+        """What an entry read from `path` must have been read with to still be used."""
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def load(self, path: str) -> CachedFile:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        # the filter needs the whole page, so filtered pages are always read into memory
+        filtered = content_type == "text/html" and self.html_filter is not None
+        compressible = is_compressible(path)
+        precompressed = compressible and not filtered and is_compressed(path)
+        gzip_body = None
+        # stat the open file, not the path: a build may replace the file in between
+        with open(path, "rb") as f:
+            file_stat = os.fstat(f.fileno())
+            large = file_stat.st_size > MAX_CACHED_FILE_BYTES and not filtered
+            if large:
+                body = FileBody(path, file_stat.st_size)
+                if compressible and not precompressed:
+                    gzip_body = _compress_file(f, file_stat.st_size)
+            else:
+                body = f.read()
+        if filtered:
+            body = self.html_filter(body.decode()).encode()
+
+        if precompressed:
+            gzip_path = path + GZIP_SUFFIX
+            if large:
+                gzip_body = FileBody(gzip_path, os.stat(gzip_path).st_size)
+            else:
+                with open(gzip_path, "rb") as f:
+                    gzip_body = f.read()
+        return cached_file(
+            body, content_type, f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"', file_stat,
+            self.stamp(path, file_stat), compress=compressible and (gzip_body is not None or not large), gzip_body=gzip_body,
+        )
+
+def cached_file(
+        body: bytes, content_type: str, etag: str, file_stat: os.stat_result, stamp: tuple,
+        compress: bool = True, gzip_body: bytes = None,
+) -> CachedFile:
+    """Builds a cache entry for `body` (bytes, or a `FileBody`), taking `Last-Modified` from `file_stat`. With `compress`, a gzip variant is made in memory unless one is given; it is dropped if it would not be smaller."""
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    if compress:
+        if gzip_body is None:
+            gzip_body = gzip.compress(body, compresslevel=MEMORY_GZIP_LEVEL, mtime=0)
+        if len(gzip_body) >= len(body):
+            gzip_body = None
+    else:
+        gzip_body = None
+    return CachedFile(
+        body, gzip_body, etag=etag, content_type=content_type,
+        last_modified=email.utils.formatdate(file_stat.st_mtime, usegmt=True), stamp=stamp,
+    )
+
+def _cost(entry: CachedFile) -> int:
+    """The bytes `entry` holds in memory; bodies sent from disk cost nothing."""
+    return sum(len(body) for body in (entry.body, entry.gzip_body) if isinstance(body, bytes))
+
+def _compress_file(f, size: int) -> bytes:
+    """Compresses the rest of the open file `f` (of `size` bytes) in chunks, giving up (None) once the result grows past `MAX_CACHED_FILE_BYTES` or the original size."""
+    out = io.BytesIO()
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=MEMORY_GZIP_LEVEL, mtime=0) as compressor:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            compressor.write(chunk)
+            if out.tell() > min(MAX_CACHED_FILE_BYTES, size):
+                return None
+    return out.getvalue()
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ssg-dev-server"
+    # headers and body go out in separate writes; with Nagle's algorithm the body would wait for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_file(head=False)
+
+    def do_HEAD(self):
+        self.send_file(head=True)
+
+    def send_file(self, head: bool):
+        url = urllib.parse.urlsplit(self.path)
+        path = self.server.translate_path(url.path)
+        if path is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        if os.path.isdir(path):
+            if not url.path.endswith("/"):
+                # like http.server: relative links inside the page need the trailing slash
+                location = url.path + "/" + (f"?{url.query}" if url.query else "")
+                self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+                self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                return self.end_headers()
+            path = os.path.join(path, "index.html")
+        entry = self.server.open_file(path)
+        if entry is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+
+        compressed = entry.gzip_body is not None and accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        # each representation needs its own strong validator
+        etag = entry.etag[:-1] + '-gz"' if compressed else entry.etag
+        cache_control = IMMUTABLE if FINGERPRINT_PATTERN.search(path) else REVALIDATE
+        if etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_validators(etag, entry, cache_control)
+            return self.end_headers()
+
+        body = entry.gzip_body if compressed else entry.body
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", entry.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_validators(etag, entry, cache_control)
+        self.end_headers()
+        if head:
+            return
+        if isinstance(body, FileBody):
+            self.send_file_body(body)
+        else:
+            self.wfile.write(body)
+
+    def send_file_body(self, body: FileBody):
+        with open(body.path, "rb") as f:
+            sent = self.connection.sendfile(f, 0, body.size)
+        if sent < body.size:
+            # the file shrank since it was cached; the response is short, so the connection cannot be reused
+            self.close_connection = True
+
+    def send_validators(self, etag: str, entry: CachedFile, cache_control: str):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", entry.last_modified)
+        self.send_header("Cache-Control", cache_control)
+        if entry.gzip_body is not None:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class DevServer(ThreadingHTTPServer):
+    """Serves the files under `directory` through a shared `FileCache`, one thread per connection."""
+    daemon_threads = True
+    # previews are shared by whole teams; the default backlog of 5 drops connections under bursts
+    request_queue_size = 128
+
+    def __init__(
+            self, address: tuple[str, int], directory: str = DEFAULT_DIRECTORY, cache_bytes: int = DEFAULT_CACHE_BYTES,
+            html_filter=None, handler=DevRequestHandler, verbose: bool = False,
+    ):
+        super().__init__(address, handler)
+        self.directory = os.path.abspath(directory)
+        self.cache = FileCache(cache_bytes, html_filter)
+        self.verbose = verbose
+
+    def translate_path(self, url_path: str) -> str:
+        """Maps a URL path to a path under `directory`, or None if it would leave it."""
+        parts = [part for part in urllib.parse.unquote(url_path).split("/") if part and part != "."]
+        if any(part == ".." or "\0" in part or os.sep in part or (os.altsep and os.altsep in part) for part in parts):
+            return None
+        return os.path.join(self.directory, *parts)
+
+    def open_file(self, path: str) -> CachedFile:
+        """The entry to send for `path` (as returned by `translate_path`), or None if there is no such file."""
+        return self.cache.get(path)
+
+def site_paths(directory: str) -> list[str]:
+    """The URL path of every file under `directory`: pages by their directory (`/blog/tom/`) and everything else by name. `.gz` siblings are skipped; they are served through content negotiation."""
+    paths = []
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in sorted(filenames):
+            if filename.endswith(GZIP_SUFFIX):
+                continue
+            relative_path = os.path.relpath(os.path.join(dirpath, filename), directory).replace(os.sep, "/")
+            if filename == "index.html":
+                relative_path = posixpath.dirname(relative_path) + "/"
+            paths.append("/" + relative_path.lstrip("/"))
+    return sorted(paths)
+
+class LoadTestResult(NamedTuple):
+    requests: int
+    seconds: float
+    statuses: dict[int, int]
+    errors: int
+    bytes: int
+    latencies: list[float]
+
+    def format(self) -> str:
+        latencies = sorted(self.latencies) or [0.0]
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items()))
+        return "\n".join([
+            f"{self.requests} requests in {self.seconds:.2f}s: {self.requests / self.seconds:.0f} requests/s, "
+            f"{self.bytes / self.seconds / 1024 / 1024:.1f} MB/s",
+            f"latency: p50 {percentile(0.5):.2f} ms, p90 {percentile(0.9):.2f} ms, p99 {percentile(0.99):.2f} ms, max {latencies[-1] * 1000:.2f} ms",
+            f"statuses: {statuses or 'none'}; {self.errors} errors",
+        ])
+
+def load_test(
+        url: str, paths: list[str], connections: int = 16, requests: int = 20000,
+        compressed: bool = True, revalidate: bool = False,
+) -> LoadTestResult:
+    """Requests `paths` round-robin from `connections` threads, each on its own keep-alive connection to `url`, until `requests` have been made. With `revalidate`, requests carry the ETag from the first response for their path, as browsers do when they revalidate. The client threads share one interpreter, so past a few thousand requests per second they, not the server, are the limit."""
+    import http.client
+
+    target = urllib.parse.urlsplit(url)
+    prefix = target.path.rstrip("/")
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    statuses = {}
+    latencies = []
+    totals = {"errors": 0, "bytes": 0}
+    etags = {}
+
+    def worker():
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        local_latencies = []
+        local_statuses = {}
+        errors = received = 0
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                break
+            path = prefix + paths[index % len(paths)]
+            headers = {"Accept-Encoding": "gzip"} if compressed else {}
+            if revalidate and path in etags:
+                headers["If-None-Match"] = etags[path]
+            start = time.perf_counter()
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+                continue
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+            received += len(body)
+            etag = response.getheader("ETag")
+            if etag is not None:
+                etags.setdefault(path, etag)
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            totals["errors"] += errors
+            totals["bytes"] += received
+
+    threads = [threading.Thread(target=worker) for _ in range(connections)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    return LoadTestResult(len(latencies), seconds, statuses, totals["errors"], totals["bytes"], latencies)
+
+def start_server_process(directory: str, cache_bytes: int = DEFAULT_CACHE_BYTES, server_class=None):
+    """Runs a server for `directory` (a `DevServer` unless another `server_class` is given) on a free port in a child process, so the load test does not compete with it for the GIL. Returns the process and the server's URL once it accepts connections."""
+    import multiprocessing
+
+    ready = multiprocessing.SimpleQueue()
+    process = multiprocessing.Process(
+        target=_serve_child, args=(server_class or DevServer, directory, cache_bytes, ready), daemon=True,
+    )
+    process.start()
+    return process, ready.get()
+
+def _serve_child(server_class, directory: str, cache_bytes: int, ready):
+    with server_class(("127.0.0.1", 0), directory, cache_bytes) as server:
+        ready.put(f"http://127.0.0.1:{server.server_address[1]}/")
+        server.serve_forever()
+
+def serve(server: DevServer, description: str):
+    with server:
+        print(f"Serving {description} on http://localhost:{server.server_address[1]}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Serve docs/ with caching, compression and ETags.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--directory", default=None, help=f"what to serve (default: {DEFAULT_DIRECTORY}, or . with --render)")
+    parser.add_argument("--render", action="store_true",
+                        help="render pages from the project's content/ as they are requested instead of serving a build")
+    parser.add_argument("--base-path", default="/", help="URL prefix for root-relative links, with --render")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024), metavar="MB",
+                        help="memory for cached files (default: %(default)s)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--load-test", nargs="?", const="", default=None, metavar="URL",
+                        help="load-test a server (default: start one for --directory) and exit")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--identity", action="store_true", help="load test without Accept-Encoding: gzip")
+    parser.add_argument("--revalidate", action="store_true", help="load test with If-None-Match, as a reloading browser would")
+    args = parser.parse_args(argv)
+
+    cache_bytes = args.cache_size * 1024 * 1024
+    server_class = DevServer
+    paths_for = site_paths
+    if args.render:
+        # imported only here: serving a build never needs the markdown and HTML modules
+        from page_server import PageServer, page_paths
+        server_class = PageServer
+        paths_for = page_paths
+    directory = args.directory or ("." if args.render else DEFAULT_DIRECTORY)
+
+    if args.load_test is None:
+        if args.render:
+            server = PageServer(("", args.port), directory, cache_bytes, args.base_path, verbose=args.verbose)
+            serve(server, f"pages rendered on demand from {os.path.join(directory, 'content')}")
+        else:
+            serve(DevServer(("", args.port), directory, cache_bytes, verbose=args.verbose), directory)
+        return
+    paths = paths_for(directory)
+    if not paths:
+        raise SystemExit(f"nothing to request: {directory} is empty")
+    process = None
+    url = args.load_test
+    if not url:
+        process, url = start_server_process(directory, cache_bytes, server_class)
+    try:
+        print(f"Load testing {url}: {len(paths)} paths, {args.connections} connections, {args.requests} requests")
+        result = load_test(url, paths, args.connections, args.requests, not args.identity, args.revalidate)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+    print(result.format())
+
+if __name__ == "__main__":
+    main()
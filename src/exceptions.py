@@ -2,4 +2,13 @@ class InvalidMarkdownError(Exception):
     pass
 
 class InvalidHTMLError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class TemplateError(Exception):
+    pass
+
+class ShardError(Exception):
+    pass
+
+class RenderError(Exception):
+    pass
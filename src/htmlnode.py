@@ -1,8 +1,34 @@
 from exceptions import InvalidHTMLError
 
+# "&" must come first so the entities added for the other characters are not escaped again
+TEXT_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"))
+ATTRIBUTE_ESCAPES = TEXT_ESCAPES + (('"', "&quot;"),)
+
+def escape_text(text: str) -> str:
+    """Escapes `&`, `<` and `>` so `text` can be placed between tags. Almost all text has none of them, which is checked first with plain substring scans; only text that needs it is run through `TEXT_ESCAPES`, applying just the replacements whose character occurs."""
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    for char, entity in TEXT_ESCAPES:
+        if char in text:
+            text = text.replace(char, entity)
+    return text
+
+def escape_attribute(value: str) -> str:
+    """Like `escape_text`, but also escapes `"` so `value` can be placed inside a double-quoted attribute."""
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    for char, entity in ATTRIBUTE_ESCAPES:
+        if char in value:
+            value = value.replace(char, entity)
+    return value
+
 class HTMLNode:
     """Represents a "node" in an HTML document tree (like a `<p>` tag and its contents, or an `<a>` tag and its contents). It can be block level or inline, and is designed to only output HTML.
+
+    Nodes are created for every inline fragment of every page, so the class (and its subclasses) use `__slots__` instead of a per-instance `__dict__`. A node without attributes shares the `None` singleton as its `props` rather than owning an empty dict.
     """
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
             self, tag: str = None, value: str = None, children: list = None, props: dict = None
             ):
@@ -53,12 +79,16 @@ class HTMLNode:
          href="https://www.google.com" target="_blank"
         ```
         Notice the leading space character before `href` and `target`. _This_ _is_ _important_.
-        HTML attributes are always separated by spaces.
+        HTML attributes are always separated by spaces. Values are escaped with `escape_attribute`.
         """
         if not self.props:
             return ""
         atts = []
         for k, v in self.props.items():
+            # like `LeafNode` values, non-string attributes (`width=100`) are rendered with `str`
+            v = str(v)
+            if '"' in v or "&" in v or "<" in v or ">" in v:
+                v = escape_attribute(v)
             atts.append(f' {k}="{v}"')
         return "".join(atts)
     
@@ -79,18 +109,23 @@ class LeafNode(HTMLNode):
     </p>
     ```
     """
+    __slots__ = ()
+
     def __init__(
             self, tag: str, value: str, props: dict = None
     ):
         """Differs from the `HTMLNode` class because:
         - It should _not_ allow for any children
         - The `value` data member should be required (and `tag` even though the tag's value may be `None`), while `props` can remain optional."""
-        super().__init__(tag=tag, value=value, props=props)
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
 
     def to_html(self) -> str:
         """Renders a leaf node as an HTML string (by returning a string).
         - If the leaf node has no `value`, it should raise a ValueError. All leaf nodes _must_ have a value.
-        - If there is no `tag` (e.g. it's `None`), the `value` should be returned as raw text.
+        - If there is no `tag` (e.g. it's `None`), the `value` should be returned as plain (escaped) text.
         - Otherwise, it should render an HTML tag. For example, these leaf nodes:
 
         ```
@@ -102,15 +137,37 @@ class LeafNode(HTMLNode):
         LeafNode("a", "Click me!", {"href": "https://www.google.com"}).to_html()
         "<a href="https://www.google.com">Click me!</a>"
         ```
+
+        The value is text, not markup: it is escaped with `escape_text` (use `RawNode` for HTML that is already rendered).
         """
-        if self.value is None:
+        value = self.value
+        if value is None:
             raise ValueError("LeafNode must have a value")
+        if type(value) is not str:
+            value = str(value)
+        # the fast path of `escape_text`, inlined since this runs for every leaf of every page
+        if "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
         if self.tag is None:
-            return f"{self.value}"
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        if self.props:
+            return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
+        return f"<{self.tag}>{value}</{self.tag}>"
     
+class RawNode(LeafNode):
+    """A leaf holding markup that has already been rendered (e.g. a block served from `BlockCache`). Its value is written out verbatim, without escaping."""
+    __slots__ = ()
+
+    def __init__(self, html: str):
+        super().__init__(None, html)
+
+    def to_html(self) -> str:
+        return self.value
+
 class ParentNode(HTMLNode):
     """Handles the nesting of HTML nodes inside of one another. Any HTML node that's not a "leaf" node (i.e. it _has_ children) is a "parent" node."""
+    __slots__ = ()
+
     def __init__(
             self, tag: str, children: list, props: dict = None
     ):
@@ -120,13 +177,16 @@ class ParentNode(HTMLNode):
         - `props` is optional
         - (It's the exact opposite of the `LeafNode` class)
         """
-        super().__init__(tag=tag, children=children, props=props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
 
     def to_html(self) -> str:
         """
         - If the object doesn't have a `tag`, raise a ValueError
         - If children is a missing value, raise a ValueError
-        - Otherwise, return a string representing the HTML tag of the node _and_ _its_ _children_. This is a recursive method (each recursion is called on a nested child node).
+        - Otherwise, return a string representing the HTML tag of the node _and_ _its_ _children_. Nested children are rendered by `write_html`, which walks the tree iteratively.
 
         For example, this node and its children:
         ```
@@ -147,13 +207,27 @@ class ParentNode(HTMLNode):
         <p><b>Bold text</b>Normal text<i>Italic text</i>Normal text</p>
         ```
         """
-        if self.tag is None:
-            raise ValueError("ParentNode must have a tag")
-        if self.children is None:
-            raise ValueError("ParentNode must have children")
-        
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
+        parts = []
+        write_html(self, parts.append)
+        return "".join(parts)
 
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
\ No newline at end of file
+def write_html(node: HTMLNode, write):
+    """Renders `node` by passing its HTML to `write` piece by piece (e.g. `file.write` or `list.append`), so the document is never built up by string concatenation.
+
+    The tree is walked with an explicit stack rather than recursion: a `ParentNode` writes its opening tag and pushes its closing tag followed by its children (in reverse, so the first child is popped next). Leaf nodes write their own `to_html()`. Extra memory is bounded by the tree's depth plus the width of the widest node, not by the size of the output.
+    """
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            write(item)
+        elif isinstance(item, ParentNode):
+            if item.tag is None:
+                raise ValueError("ParentNode must have a tag")
+            if item.children is None:
+                raise ValueError("ParentNode must have children")
+            write(f"<{item.tag}{item.props_to_html()}>")
+            stack.append(f"</{item.tag}>")
+            stack.extend(reversed(item.children))
+        else:
+            write(item.to_html())
\ No newline at end of file
@@ -1,27 +1,68 @@
+import argparse
 import os
-import sys
 
-from get_file_paths import get_file_paths
-from static_to_public import copy_source_dir_to_destination_dir
-from markdown_generate import generate_page
+from site_build import build_site
+from precompress import DEFAULT_GZIP_LEVEL
+from profiling import Profiler
+from sharding import parse_shard
 
-STATIC_PATH = "./static"
-PUBLIC_PATH = "./docs"
-CONTENT_PATH = "./content"
-TEMPLATE_PATH = "./template.html"
+def shard_arg(text: str) -> tuple[int, int]:
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
 
-def main():
-    if len(sys.argv) < 2:
-        basepath = "./"
-    else:
-        basepath = "." + sys.argv[1]
-    copy_source_dir_to_destination_dir(STATIC_PATH, PUBLIC_PATH)
-    content_files = get_file_paths(CONTENT_PATH)
-    for content in content_files:
-        relative_path = os.path.relpath(content, "content")
-        html_path = relative_path.replace(".md", ".html")
-        output_path = os.path.join(PUBLIC_PATH, html_path)
-        generate_page(content, TEMPLATE_PATH, output_path, basepath)
+def parse_args(argv: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the site from content/ into docs/.")
+    parser.add_argument("basepath", nargs="?", default=None, help="URL prefix for root-relative links")
+    parser.add_argument("--force", action="store_true", help="ignore the build manifest and regenerate every page")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                        help="render pages across N worker processes (0 = one per CPU)")
+    parser.add_argument("--checksum", action="store_true",
+                        help="compare static files by content hash when their mtime differs")
+    parser.add_argument("--no-block-cache", dest="block_cache", action="store_false",
+                        help="render every block instead of reusing cached HTML")
+    parser.add_argument("--block-cache-size", type=int, default=64, metavar="MB",
+                        help="cap on the on-disk block cache (default: 64)")
+    parser.add_argument("--shard", type=shard_arg, default=None, metavar="I/N",
+                        help="build only shard I of N into shards/I (combine them with merge_shards.py)")
+    parser.add_argument("--shard-costs", default=None, metavar="MANIFEST",
+                        help="balance shards by the page timings in a shard or merged manifest")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="copy static assets under content-hashed names and rewrite links to them")
+    parser.add_argument("--gzip", nargs="?", type=int, const=DEFAULT_GZIP_LEVEL, default=None, choices=range(1, 10), metavar="LEVEL",
+                        help=f"write a .gz next to every text output (level 1-9, default: {DEFAULT_GZIP_LEVEL})")
+    parser.add_argument("--profile", nargs="?", const="build_profile.json", default=None, metavar="TRACE",
+                        help="print per-stage and per-page timings and write a Chrome trace (default: build_profile.json)")
+    parser.add_argument("--minify", action="store_true",
+                        help="strip comments and redundant whitespace from pages as they are written")
+    parser.add_argument("--search", action="store_true",
+                        help="write a full-text search index of the pages to search/")
+    args = parser.parse_args(argv)
+    if args.shard is not None and args.gzip is not None:
+        parser.error("--gzip applies to the merged site; pass it to merge_shards.py instead of the shard builds")
+    if args.shard is not None and args.search:
+        parser.error("--search is not supported for shard builds")
+    return args
+
+def base_path_from_arg(basepath: str) -> str:
+    return "./" if basepath is None else "." + basepath
+
+def main(argv: list[str] = None):
+    args = parse_args(argv)
+    basepath = base_path_from_arg(args.basepath)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    profiler = Profiler() if args.profile else None
+    build_site(
+        basepath, force=args.force, jobs=jobs, checksum=args.checksum, profiler=profiler,
+        block_cache=args.block_cache, block_cache_bytes=args.block_cache_size * 1024 * 1024,
+        shard=args.shard, shard_costs=args.shard_costs, fingerprint=args.fingerprint,
+        gzip_level=args.gzip, minify=args.minify, search=args.search,
+    )
+    if profiler is not None:
+        print(profiler.format_summary())
+        profiler.export(args.profile)
+        print(f"Wrote trace to {args.profile}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,82 @@
+"""Packages the generator into a single-file zipapp:
+```
+python3 src/make_runner.py              # writes dist/ssg.pyz
+python3 dist/ssg.pyz /static-site-generator/ --jobs 4
+python3 dist/ssg.pyz watch | merge | daemon | client | serve ...
+```
+Every module is stored as precompiled bytecode, so nothing is compiled at startup (Python cannot write a bytecode cache into a zip, so a zipapp of sources would recompile on every run), and all imports are served from the one archive instead of searching the source directory. Run from the project root, like `src/main.py`.
+"""
+import argparse
+import os
+import py_compile
+import tempfile
+import zipapp
+
+from build_manifest import source_version
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNNER_PATH = "./dist/ssg.pyz"
+
+# `python3 ssg.pyz <command> ...` runs these modules' `main()` instead of a build
+COMMANDS = {
+    "watch": "watch",
+    "merge": "merge_shards",
+    "daemon": "build_daemon",
+    "client": "build_client",
+    "serve": "dev_server",
+}
+
+ENTRY_POINT = f"""import sys
+
+COMMANDS = {COMMANDS!r}
+
+if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+    module = __import__(COMMANDS[sys.argv.pop(1)])
+else:
+    import main as module
+sys.exit(module.main())
+"""
+
+def runner_modules(src_dir: str = SRC_DIR) -> list[str]:
+    """The modules that go into the runner: everything in `src_dir` except tests, this script and the benchmarks package."""
+    return sorted(
+        name for name in os.listdir(src_dir)
+        if name.endswith(".py") and not name.startswith("test_") and name != "make_runner.py"
+    )
+
+def make_runner(output: str = RUNNER_PATH, src_dir: str = SRC_DIR) -> str:
+    """Writes the zipapp to `output` and returns the generator version baked into it. Bytecode uses unchecked hash-based pycs, since there is no source next to it to check against."""
+    with tempfile.TemporaryDirectory() as staging:
+        for name in runner_modules(src_dir):
+            py_compile.compile(
+                os.path.join(src_dir, name),
+                cfile=os.path.join(staging, name + "c"),
+                dfile=name,
+                doraise=True,
+                invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+            )
+        version = source_version(src_dir)
+        build_info = os.path.join(staging, "_build_info.py")
+        with open(build_info, "w") as f:
+            f.write(f"GENERATOR_VERSION = {version!r}\n")
+        py_compile.compile(build_info, cfile=build_info + "c", dfile="_build_info.py", doraise=True,
+                           invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        os.remove(build_info)
+        with open(os.path.join(staging, "__main__.py"), "w") as f:
+            f.write(ENTRY_POINT)
+
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        tmp_path = f"{output}.tmp"
+        zipapp.create_archive(staging, tmp_path, interpreter="/usr/bin/env python3")
+        os.replace(tmp_path, output)
+    return version
+
+def main():
+    parser = argparse.ArgumentParser(description="Package the generator as a single-file zipapp.")
+    parser.add_argument("--output", "-o", default=RUNNER_PATH, help=f"where to write the runner (default: {RUNNER_PATH})")
+    args = parser.parse_args()
+    version = make_runner(args.output)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes, generator {version[:12]})")
+
+if __name__ == "__main__":
+    main()
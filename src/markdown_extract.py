@@ -12,7 +12,11 @@ def extract_markdown_links(text: str) -> list[tuple]:
 
 def extract_title(markdown: str) -> str:
     """Pulls the h1 header (`# `) from the markdown file and returns it - raises an exception if no h1 header is present."""
-    for line in markdown.splitlines():
+    return extract_title_from_lines(markdown.split("\n"))
+
+def extract_title_from_lines(lines) -> str:
+    """Like `extract_title`, but takes any iterable of lines (such as an open file) and stops reading at the first h1 header."""
+    for line in lines:
         if line.startswith("# "):
             return line.replace("# ", "").strip()
     raise InvalidHTMLError("No h1 header present")
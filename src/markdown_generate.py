@@ -1,28 +1,92 @@
-from markdown_extract import extract_title
-from markdown_to_html_node import markdown_to_html_node
+from markdown_extract import extract_title, extract_title_from_lines
+from markdown_to_html_node import markdown_to_html_node, write_markdown_html
+from htmlnode import escape_text, write_html
+from template import load_template
+from profiling import stage
+from block_cache import BlockCache
+from output_writer import AtomicOutput
+from url_resolver import resolver_for_base_path
+from minify import HtmlMinifier, MinifyStats
 
 import os
 
+# sources at least this large are streamed block by block instead of being read whole
+STREAM_THRESHOLD = 4 * 1024 * 1024
 
-def generate_page(from_path: str, template_path: str, dest_path: str, base_path: str):
+def generate_page(
+        from_path: str, template_path: str, dest_path: str, base_path: str,
+        cache: BlockCache = None, stream: bool = None, resolve_url=None, minify: MinifyStats = None, text=None,
+) -> bool:
+    """Renders the markdown at `from_path` into the template at `template_path`. The template is compiled once per process (see `template.load_template`). The template is given `{{ Title }}` and `{{ Content }}`. An optional block `cache` is handed to `markdown_to_html_node`.
+
+    Links and images are pointed at `base_path` as they are rendered, by `resolve_url` (by default the shared `UrlResolver` for `base_path`); the template's own URLs are resolved once when it is compiled. Nothing searches the finished page.
+
+    The page is streamed straight into `dest_path`: the content tree is rendered by `write_html` into the open file between the template's literal chunks, so the full document is never held as one string.
+
+    With `minify` the stream passes through an `HtmlMinifier` on its way to the file, which adds the bytes it removed to the given `MinifyStats`.
+
+    A `text` object (a `search_index.PageText`) receives the page's title and the plain text of its content, collected from the `TextNode`s as they are parsed rather than from the finished HTML.
+
+    The output goes through `AtomicOutput`, so an unchanged page keeps its bytes and mtime. Returns whether `dest_path` was modified.
+
+    With `stream` (the default for sources of `STREAM_THRESHOLD` bytes or more) the markdown is not read whole either: the title is found in a first pass that stops at the h1, then blocks are read, rendered and written one at a time by `write_markdown_html`, so peak memory is bounded by the largest block."""
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    dest_dir = os.path.dirname(dest_path)
-    
-    with open(from_path) as f:
-        md_file = f.read()
-    with open(template_path) as f:
-        template_file = f.read()
-    
-    html = markdown_to_html_node(md_file).to_html()
-    title = extract_title(md_file)
-
-    template_file = template_file.replace("{{ Title }}", title)
-    template_file = template_file.replace("{{ Content }}", html)
-    template_file = template_file.replace('href="/', f'href="{base_path}')
-    template_file = template_file.replace('src="/', f'src="{base_path}')
-
-    if dest_dir and not os.path.exists(dest_dir):
-        os.makedirs(dest_dir)
-
-    with open(dest_path, 'w') as w:
-        w.write(template_file)
\ No newline at end of file
+    with stage("page", page=from_path):
+        if stream is None:
+            stream = os.path.getsize(from_path) >= STREAM_THRESHOLD
+        if resolve_url is None:
+            resolve_url = resolver_for_base_path(base_path)
+        template, context = _page_context(from_path, template_path, cache, stream, resolve_url, text)
+        with stage("render_write"):
+            output = AtomicOutput(dest_path)
+            with output as w:
+                if minify is not None:
+                    minifier = HtmlMinifier(w.write, minify)
+                    template.stream(minifier.write, context)
+                    minifier.close()
+                else:
+                    template.stream(w.write, context)
+        return output.changed
+
+def render_page_html(
+        from_path: str, template_path: str, base_path: str, cache: BlockCache = None, resolve_url=None,
+) -> str:
+    """Like `generate_page`, but returns the finished page instead of writing it anywhere (e.g. for a preview)."""
+    with stage("page", page=from_path):
+        if resolve_url is None:
+            resolve_url = resolver_for_base_path(base_path)
+        template, context = _page_context(from_path, template_path, cache, False, resolve_url)
+        parts = []
+        with stage("render_write"):
+            template.stream(parts.append, context)
+        return "".join(parts)
+
+def _page_context(
+        from_path: str, template_path: str, cache: BlockCache, stream: bool, resolve_url, text=None,
+):
+    """Loads the template and builds the variables for it. `Content` is a callable that writes the rendered body, so the page is only rendered once the caller streams the template (and only then is a streamed page's plain text in `text`)."""
+    plain_text = text.parts if text is not None else None
+    with stage("template_load"):
+        template = load_template(template_path, resolve_url)
+
+    if stream:
+        with stage("read"):
+            with open(from_path) as f:
+                title = extract_title_from_lines(f)
+
+        def content(write):
+            with open(from_path) as f:
+                write_markdown_html(f, write, cache, resolve_url, plain_text)
+    else:
+        with stage("read"):
+            with open(from_path) as f:
+                md_file = f.read()
+        node = markdown_to_html_node(md_file, cache, resolve_url, plain_text)
+        title = extract_title(md_file)
+
+        def content(write):
+            write_html(node, write)
+
+    if text is not None:
+        text.title = title
+    return template, {"Title": escape_text(title), "Content": content}
@@ -1,4 +1,8 @@
+import re
+from typing import Iterable, Iterator
+
 from textnode import TextNode, TextType
+from blocktype import BlockType, block_lines_to_block_type, block_to_block_type
 from exceptions import InvalidMarkdownError
 from markdown_extract import extract_markdown_images, extract_markdown_links
 
@@ -81,15 +85,44 @@ def split_nodes_link(old_nodes: list["TextNode"]) -> list[TextNode]:
                 node_list.append(TextNode(text, TextType.TEXT))
     return node_list
 
+INLINE_PATTERN = re.compile(r"\*\*|_|`|(!?)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+DELIMITER_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
 def text_to_textnodes(text: str) -> list[TextNode]:
-    nodes = [TextNode(text, TextType.TEXT)]
-    
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    
+    """Splits a line of inline markdown into `TextNode`s in a single left-to-right scan. Each match of `INLINE_PATTERN` is either an opening delimiter (`**`, `_`, `` ` ``), whose content runs to the next matching delimiter, or a complete image/link. Text with none of the markup characters is returned as a single node without scanning.
+    """
+    if not text:
+        return []
+    if "*" not in text and "_" not in text and "`" not in text and "[" not in text:
+        return [TextNode(text, TextType.TEXT)]
+
+    nodes = []
+    position = 0
+    while True:
+        match = INLINE_PATTERN.search(text, position)
+        if match is None:
+            break
+        if match.start() > position:
+            nodes.append(TextNode(text[position:match.start()], TextType.TEXT))
+        token = match.group()
+        text_type = DELIMITER_TYPES.get(token)
+        if text_type is not None:
+            close = text.find(token, match.end())
+            if close == -1:
+                raise InvalidMarkdownError("that's invalid Markdown syntax")
+            if close > match.end():
+                nodes.append(TextNode(text[match.end():close], text_type))
+            position = close + len(token)
+        else:
+            bang, anchor_text, url = match.groups()
+            nodes.append(TextNode(anchor_text, TextType.IMAGE if bang else TextType.LINK, url))
+            position = match.end()
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
     return nodes
 
 def markdown_to_blocks(markdown: str) -> list[str]:
@@ -100,4 +133,86 @@ def markdown_to_blocks(markdown: str) -> list[str]:
         if block != "":
             blocks.append(block.strip())
     
-    return blocks
\ No newline at end of file
+    return blocks
+
+def _block(lines: list[str]) -> tuple[BlockType, str]:
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    block = "\n".join(lines)
+    return block_lines_to_block_type(lines, block), block
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[tuple[BlockType, str]]:
+    """Groups lines into blocks and yields each as a `(BlockType, text)` pair as soon as it is complete, classifying it from the lines already in hand.
+
+    Blocks are separated by blank (or whitespace-only) lines, except inside a fenced code block: a block whose first line opens a ``` fence runs until a line that closes it, blank lines included. A fence that is never closed falls back to ordinary blank-line splitting.
+
+    `lines` may be any iterable - a list, or an open file to read the document lazily - and trailing newlines are ignored."""
+    current = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if in_fence:
+            current.append(line)
+            if line.rstrip().endswith("```"):
+                in_fence = False
+            continue
+        if not line.strip():
+            if current:
+                yield _block(current)
+                current = []
+            continue
+        if not current:
+            opening = line.strip()
+            in_fence = opening.startswith("```") and (len(opening) < 6 or not opening.endswith("```"))
+        current.append(line)
+
+    if in_fence:
+        # unterminated fence: split what was buffered on blank lines instead
+        block = []
+        for line in current:
+            if line.strip():
+                block.append(line)
+            elif block:
+                yield _block(block)
+                block = []
+        current = block
+    if current:
+        yield _block(current)
+
+# a newline and the blank (or whitespace-only) lines after it; captured, so that fenced code keeps them
+BLANK_LINES = re.compile(r"(\n(?:[^\S\n]*\n)+)")
+FENCE_CLOSE = re.compile(r"```[^\S\n]*$", re.MULTILINE)
+
+def scan_blocks(markdown: str) -> list[tuple[BlockType, str]]:
+    """Splits a whole document into typed blocks, with the same result as `iter_blocks(markdown.split("\\n"))`. Rather than visiting every line, it cuts the document at runs of blank lines in one `re.split`, then rejoins the chunks of any fenced code block that has blank lines in it (see `_join_fences`).
+
+    Only "\\n" ends a line, as when a file is read line by line: `str.splitlines` would also break at form feeds, `\\x1c`-`\\x1e`, `\\x85` and `\\u2028`/`\\u2029`, and a document would parse differently when streamed."""
+    parts = BLANK_LINES.split(markdown)
+    chunks = [part.strip() for part in parts[::2]]
+    if "```" in markdown:
+        _join_fences(parts, chunks)
+    return [(block_to_block_type(block), block) for block in chunks if block]
+
+def _join_fences(parts: list[str], chunks: list[str]):
+    """Joins each chunk that opens a ``` fence with the chunks after it, up to the one holding the closing fence, leaving those empty. `parts` is the split document, with the blank lines between chunks. An unterminated fence leaves the rest of the document split on blank lines."""
+    for i in [i for i, chunk in enumerate(chunks) if chunk.startswith("```")]:
+        chunk = chunks[i]
+        if not chunk:
+            # joined into an earlier fence
+            continue
+        newline = chunk.find("\n")
+        if newline != -1 and chunk.endswith("```"):
+            # the usual case: the fence closes on the chunk's last line
+            continue
+        opening = chunk[:newline].rstrip() if newline != -1 else chunk
+        if len(opening) >= 6 and opening.endswith("```"):
+            continue
+        if newline != -1 and FENCE_CLOSE.search(chunk, newline + 1):
+            continue
+        for end in range(i + 1, len(chunks)):
+            if FENCE_CLOSE.search(parts[2 * end]):
+                break
+        else:
+            return
+        chunks[i] = "".join(parts[2 * i:2 * end + 1]).strip()
+        chunks[i + 1:end + 1] = [""] * (end - i)
@@ -1,58 +1,99 @@
-from htmlnode import HTMLNode, ParentNode
+from htmlnode import HTMLNode, ParentNode, RawNode, write_html
+from block_cache import TEXT, BlockCache
 from textnode import TextNode, TextType, text_node_to_html_node
 from blocktype import BlockType, block_to_block_type
-from markdown_split import markdown_to_blocks, text_to_textnodes
+from markdown_split import iter_blocks, scan_blocks, text_to_textnodes
+from profiling import stage
 import textwrap
 
-def markdown_to_html_node(markdown: str) -> ParentNode:
-    blocks = markdown_to_blocks(markdown)
+def markdown_to_html_node(markdown: str, cache: BlockCache = None, resolve_url=None, plain_text: list = None) -> ParentNode:
+    """Converts a whole markdown document into a `<div>` of block nodes. With a `cache`, blocks whose text was rendered before are spliced in as `RawNode`s without being classified or tokenized again, and newly rendered blocks are added to it. The cache must only ever be used with one `resolve_url` mapping (see `UrlResolver.key`), since resolved URLs are baked into the cached HTML.
+
+    If a `plain_text` list is given, the text of every run of inline markdown (a heading, paragraph, list item...; link text and image alt text included, markup left out) is appended to it as the blocks are parsed, for the caller to join with spaces. Cached blocks keep their plain text in the cache next to their HTML."""
+    with stage("split_blocks"):
+        blocks = scan_blocks(markdown)
     children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    with stage("parse_blocks"):
+        for block_type, block in blocks:
+            if cache is None:
+                children.append(block_to_html_node(block, block_type, resolve_url, plain_text))
+                continue
+            children.append(RawNode(_cached_block_html(block, block_type, cache, resolve_url, plain_text)))
     return ParentNode("div", children, None)
 
-def block_to_html_node(block: str) -> BlockType:
-    block_type = block_to_block_type(block)
+def write_markdown_html(lines, write, cache: BlockCache = None, resolve_url=None, plain_text: list = None):
+    """Streaming counterpart of `markdown_to_html_node(...).to_html()`: reads blocks lazily from `lines` (e.g. an open file), renders each one as soon as it is complete and passes the HTML to `write`. Only one block's text and node tree are alive at a time, so memory is bounded by the largest block rather than the document. `plain_text` is collected as in `markdown_to_html_node`."""
+    write("<div>")
+    for block_type, block in iter_blocks(lines):
+        if cache is None:
+            write_html(block_to_html_node(block, block_type, resolve_url, plain_text), write)
+        else:
+            write(_cached_block_html(block, block_type, cache, resolve_url, plain_text))
+    write("</div>")
+
+def _cached_block_html(block: str, block_type: BlockType, cache: BlockCache, resolve_url, plain_text: list) -> str:
+    """Returns the block's HTML from `cache`, rendering it on a miss. When `plain_text` is collected, a block is also rendered again if only its HTML was cached (by a build without the search index)."""
+    html = cache.get(block)
+    text = cache.get(block, TEXT) if plain_text is not None and html is not None else None
+    if html is None or (plain_text is not None and text is None):
+        parts = [] if plain_text is not None else None
+        node = block_to_html_node(block, block_type, resolve_url, parts)
+        if html is None:
+            html = node.to_html()
+            cache.put(block, html)
+        if parts is not None:
+            text = " ".join(parts)
+            cache.put(block, text, TEXT)
+    if plain_text is not None:
+        plain_text.append(text)
+    return html
+
+def block_to_html_node(block: str, block_type: BlockType = None, resolve_url=None, plain_text: list = None) -> HTMLNode:
+    """Renders one block. Callers that already know the block's type (e.g. from `scan_blocks`) pass it in to skip classifying the block again. `resolve_url` is applied to every link and image URL in the block, and its plain text is appended to `plain_text` if given, one string per run of inline text."""
+    if block_type is None:
+        block_type = block_to_block_type(block)
     match block_type:
         case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
+            return paragraph_to_html_node(block, resolve_url, plain_text)
         case BlockType.HEADING:
-            return heading_to_html_node(block)
+            return heading_to_html_node(block, resolve_url, plain_text)
         case BlockType.CODE:
-            return code_to_html_node(block)
+            return code_to_html_node(block, plain_text)
         case BlockType.ORDERED_LIST:
-            return olist_to_html_node(block)
+            return olist_to_html_node(block, resolve_url, plain_text)
         case BlockType.UNORDERED_LIST:
-            return ulist_to_html_node(block)
+            return ulist_to_html_node(block, resolve_url, plain_text)
         case BlockType.QUOTE:
-            return quote_to_html_node(block)
+            return quote_to_html_node(block, resolve_url, plain_text)
         case _:
             raise ValueError("invalid BlockType:", block)
         
-def text_to_children(text: str) -> list[HTMLNode]:
+def text_to_children(text: str, resolve_url=None, plain_text: list = None) -> list[HTMLNode]:
     text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, resolve_url)
         children.append(html_node)
+    if plain_text is not None:
+        # inline markup can fall mid-word (`un_believ_able`), so the nodes of one run of text are joined without spaces
+        plain_text.append("".join(text_node.text for text_node in text_nodes))
     return children
 
-def paragraph_to_html_node(block: str) -> ParentNode:
+def paragraph_to_html_node(block: str, resolve_url=None, plain_text: list = None) -> ParentNode:
     lines = block.split("\n")
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, resolve_url, plain_text)
     return ParentNode("p", children)
 
-def heading_to_html_node(block: str) -> ParentNode:
+def heading_to_html_node(block: str, resolve_url=None, plain_text: list = None) -> ParentNode:
     level = block.count("#")
     if level + 1 >= len(block):
         raise ValueError("Invalid heading level:", level)
     text = block[level + 1:]
-    children = text_to_children(text)
+    children = text_to_children(text, resolve_url, plain_text)
     return ParentNode(f"h{level}", children)
 
-def code_to_html_node(block: str) -> ParentNode:
+def code_to_html_node(block: str, plain_text: list = None) -> ParentNode:
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("Invalid code block:", block)
     text = block.strip("```").strip("\n")
@@ -60,29 +101,31 @@ def code_to_html_node(block: str) -> ParentNode:
     if not text.endswith("\n"):
         text += "\n"
     raw_text = TextNode(text, TextType.TEXT)
+    if plain_text is not None:
+        plain_text.append(text)
     child = text_node_to_html_node(raw_text)
     code = ParentNode("code", [child])
     return ParentNode("pre", [code])
 
-def olist_to_html_node(block: str) -> ParentNode:
+def olist_to_html_node(block: str, resolve_url=None, plain_text: list = None) -> ParentNode:
     items = block.split("\n")
     html_items = []
     for item in items:
         text = item[3:]
-        children = text_to_children(text)
+        children = text_to_children(text, resolve_url, plain_text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ol", html_items)
 
-def ulist_to_html_node(block: str) -> ParentNode:
+def ulist_to_html_node(block: str, resolve_url=None, plain_text: list = None) -> ParentNode:
     items = block.split("\n")
     html_items = []
     for item in items:
         text = item[2:]
-        children = text_to_children(text)
+        children = text_to_children(text, resolve_url, plain_text)
         html_items.append(ParentNode("li", children))
     return ParentNode("ul", html_items)
 
-def quote_to_html_node(block: str) -> ParentNode:
+def quote_to_html_node(block: str, resolve_url=None, plain_text: list = None) -> ParentNode:
     lines = block.split("\n")
     new_lines = []
     for line in lines:
@@ -90,5 +133,5 @@ def quote_to_html_node(block: str) -> ParentNode:
             raise ValueError("invalid quote block:", block)
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
-    children = text_to_children(content)
+    children = text_to_children(content, resolve_url, plain_text)
     return ParentNode("blockquote", children)
\ No newline at end of file
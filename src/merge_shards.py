@@ -0,0 +1,125 @@
+import argparse
+import glob
+import os
+
+from assets import AssetMap
+from build_manifest import hash_file
+from exceptions import ShardError
+from output_writer import write_if_changed
+from precompress import DEFAULT_GZIP_LEVEL, compress_outputs
+from site_build import CONTENT_PATH, PUBLIC_PATH, STATIC_PATH, collect_pages
+from sharding import (
+    SHARD_MANIFEST_NAME, SHARD_OUTPUT_PATH, format_shard, load_shard_manifest, write_shard_manifest,
+)
+from static_to_public import sync_source_dir_to_destination_dir, remove_orphans
+
+MERGED_MANIFEST_PATH = "./.shard_manifest.json"
+
+class MergeResult:
+    def __init__(self):
+        self.pages = 0
+        self.copied = []
+        self.removed = []
+        self.compressed = None
+
+def check_shards(shard_dirs: list[str], content_path: str = CONTENT_PATH) -> tuple[dict, dict]:
+    """Verifies that `shard_dirs` hold one complete, consistent build: every shard of the same partition is present exactly once, all of them were built from the same template, base path and generator, each page of `content_path` was built by exactly one shard, and every output still matches the hash its shard recorded. Raises `ShardError` listing every problem found.
+
+    Returns the page entries by output path, and the shard directory each page comes from."""
+    manifests = [(shard_dir, load_shard_manifest(os.path.join(shard_dir, SHARD_MANIFEST_NAME))) for shard_dir in shard_dirs]
+    if not manifests:
+        raise ShardError("no shards to merge")
+    problems = []
+
+    counts = {manifest["count"] for _, manifest in manifests}
+    if len(counts) != 1 or None in counts:
+        problems.append(f"shards come from different partitions: {sorted(counts, key=str)}")
+    else:
+        count = counts.pop()
+        indexes = [manifest["index"] for _, manifest in manifests]
+        for index in range(count):
+            found = indexes.count(index)
+            if found == 0:
+                problems.append(f"missing shard {format_shard((index, count))}")
+            elif found > 1:
+                problems.append(f"shard {format_shard((index, count))} given {found} times")
+    for field in ("base_path", "template_hash", "generator"):
+        if len({manifest[field] for _, manifest in manifests}) > 1:
+            problems.append(f"shards were built with different {field} values")
+    assets = [manifest.get("assets") for _, manifest in manifests]
+    if any(names != assets[0] for names in assets):
+        problems.append("shards were built with different fingerprinted assets")
+
+    pages = {}
+    owners = {}
+    for shard_dir, manifest in manifests:
+        for relative_path, entry in manifest["pages"].items():
+            if relative_path in owners:
+                problems.append(f"{relative_path} built by both {owners[relative_path]} and {shard_dir}")
+                continue
+            owners[relative_path] = shard_dir
+            pages[relative_path] = entry
+            output = os.path.join(shard_dir, relative_path)
+            if not os.path.isfile(output):
+                problems.append(f"{output} is listed in its shard manifest but missing")
+            elif hash_file(output) != entry["hash"]:
+                problems.append(f"{output} does not match its shard manifest")
+
+    expected = {os.path.relpath(output, PUBLIC_PATH) for _, output in collect_pages(content_path, PUBLIC_PATH)}
+    for relative_path in sorted(expected - owners.keys()):
+        problems.append(f"{relative_path} was not built by any shard")
+    for relative_path in sorted(owners.keys() - expected):
+        problems.append(f"{relative_path} has no source in {content_path}")
+
+    if problems:
+        raise ShardError("cannot merge shards:\n  " + "\n  ".join(problems))
+    return pages, owners
+
+def merge_shards(
+        shard_dirs: list[str], public_path: str = PUBLIC_PATH, content_path: str = CONTENT_PATH,
+        static_path: str = STATIC_PATH, manifest_path: str = MERGED_MANIFEST_PATH, checksum: bool = False,
+        gzip_level: int = None,
+) -> MergeResult:
+    """Combines shard builds into `public_path` once `check_shards` passes: static assets are synced (also under the fingerprinted names the shards link to, if they were built with `--fingerprint`), each page is copied from its shard (pages whose bytes are unchanged are left alone), and anything else in `public_path` is removed. A merged manifest with every page's render time is written to `manifest_path`, ready to be passed to `--shard-costs` by the next build. With a `gzip_level`, text outputs get `.gz` siblings as in `site_build.build_site`."""
+    pages, owners = check_shards(shard_dirs, content_path)
+    first = load_shard_manifest(os.path.join(shard_dirs[0], SHARD_MANIFEST_NAME))
+    assets = first.get("assets")
+    if assets is not None and AssetMap(None).update(static_path) != assets:
+        raise ShardError(f"cannot merge shards: {static_path} changed since the shards were built")
+    result = MergeResult()
+    synced = sync_source_dir_to_destination_dir(static_path, public_path, checksum, rename=assets)
+    for relative_path, shard_dir in sorted(owners.items()):
+        with open(os.path.join(shard_dir, relative_path), "rb") as f:
+            data = f.read()
+        if write_if_changed(os.path.join(public_path, relative_path), data):
+            result.copied.append(relative_path)
+    result.pages = len(pages)
+    keep = synced.files | owners.keys()
+    if gzip_level is not None:
+        result.compressed = compress_outputs(public_path, keep, gzip_level, os.cpu_count())
+        keep |= result.compressed.files
+    result.removed = remove_orphans(public_path, keep)
+
+    write_shard_manifest(manifest_path, None, pages, first["base_path"], first["template_hash"], first["generator"], assets)
+    return result
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Merge shard builds (see main.py --shard) into docs/.")
+    parser.add_argument("shards", nargs="*", help=f"shard output directories (default: every directory in {SHARD_OUTPUT_PATH})")
+    parser.add_argument("--checksum", action="store_true",
+                        help="compare static files by content hash when their mtime differs")
+    parser.add_argument("--gzip", nargs="?", type=int, const=DEFAULT_GZIP_LEVEL, default=None, choices=range(1, 10), metavar="LEVEL",
+                        help=f"write a .gz next to every text output (level 1-9, default: {DEFAULT_GZIP_LEVEL})")
+    args = parser.parse_args(argv)
+    shard_dirs = args.shards or sorted(path for path in glob.glob(os.path.join(SHARD_OUTPUT_PATH, "*")) if os.path.isdir(path))
+    try:
+        result = merge_shards(shard_dirs, checksum=args.checksum, gzip_level=args.gzip)
+    except ShardError as e:
+        raise SystemExit(str(e)) from None
+    print(f"Merged {len(shard_dirs)} shards: {result.pages} pages, {len(result.copied)} outputs modified, {len(result.removed)} removed")
+    if result.compressed is not None:
+        print(f"Gzip: {len(result.compressed.compressed)} compressed, {result.compressed.unchanged} unchanged")
+    print(f"Wrote page timings to {MERGED_MANIFEST_PATH}")
+
+if __name__ == "__main__":
+    main()
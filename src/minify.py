@@ -0,0 +1,197 @@
+import re
+
+BUFFER_SIZE = 16 * 1024
+
+# whitespace next to these tags is never rendered, so it can be dropped instead of collapsed to one space
+BLOCK_TAGS = {
+    "!doctype", "html", "head", "body", "title", "meta", "link", "style", "base",
+    "article", "aside", "section", "nav", "header", "footer", "main", "div", "p",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "blockquote", "pre", "hr", "br",
+    "table", "thead", "tbody", "tfoot", "tr", "th", "td", "figure", "figcaption", "details", "summary",
+}
+
+# content of these tags is copied as-is; `code_to_html_node` renders code blocks as `<pre><code>`. Inline `<code>` is
+# not preserved: like any other inline text, browsers collapse its whitespace anyway
+PRESERVE_TAGS = {"pre", "textarea", "script", "style"}
+
+# HTML whitespace only: collapsing `\s` would also eat non-breaking spaces
+WHITESPACE = " \t\n\r\f"
+
+# the only markup that needs more than whitespace handling: comments, and tags whose content is preserved
+SPECIAL_PATTERN = re.compile(rf"<!--|<({'|'.join(sorted(PRESERVE_TAGS))})\b", re.I)
+CLOSE_PATTERNS = {name: re.compile(rf"</{name}\s*>", re.I) for name in PRESERVE_TAGS}
+TAG_NAME_PATTERN = re.compile(r"</?([a-zA-Z!][^\s/>]*)")
+
+# Whitespace that may change: runs, and whitespace other than a plain space. A lone space is the bulk of all text and is
+# always kept; `_collapse` decides what each match becomes.
+COLLAPSIBLE_PATTERN = re.compile(r"[\t\n\r\f ][\t\n\r\f ]+|[\t\n\r\f]")
+# substrings every match of `COLLAPSIBLE_PATTERN` contains; most chunks have none of them and skip the regex
+COLLAPSIBLE_HINTS = ("  ", "\n", "\t", "\r", "\f")
+
+class MinifyStats:
+    """What one or more `HtmlMinifier`s removed, in bytes of UTF-8 output: only ASCII whitespace and comments are ever removed, and comments are counted by their encoded size."""
+    def __init__(self):
+        self.saved = 0
+
+class HtmlMinifier:
+    """Removes comments and redundant whitespace from HTML as it is written, without ever holding the whole document:
+    ```
+    minifier = HtmlMinifier(f.write)
+    template.stream(minifier.write, context)
+    minifier.close()
+    ```
+    Runs of whitespace (and any newline or tab) collapse to one space, or disappear entirely next to a block-level tag (`BLOCK_TAGS`), where they are never rendered; a single plain space is always kept as is. Content of `pre`, `textarea`, `script` and `style` is passed through untouched, as are attribute values and conditional comments.
+
+    Chunks are collected into buffers of about `BUFFER_SIZE` characters, each minified as soon as it fills up; only an unfinished tag or comment at the end of a buffer is held back until the next one completes it.
+    """
+    def __init__(self, write, stats: MinifyStats = None):
+        self._write = write
+        self.stats = stats if stats is not None else MinifyStats()
+        # renderers write many tiny chunks; they are minified a buffer at a time rather than one by one
+        self._chunks = []
+        self._buffered = 0
+        self._pending = ""
+        # whitespace seen but not written yet: whether it becomes a space depends on what follows
+        self._space = ""
+        # whether the last thing written was a block-level tag (or the start of the document)
+        self._after_block = True
+        # the tag whose content is being copied as-is, until its closing tag
+        self._preserve = None
+
+    def write(self, text: str):
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered >= BUFFER_SIZE:
+            self._process()
+
+    def close(self):
+        """Flushes anything held back. Trailing whitespace at the end of the document is dropped."""
+        self._process()
+        if self._pending:
+            text, self._pending = self._pending, ""
+            self._feed(text)
+        self.stats.saved += len(self._space)
+        self._space = ""
+
+    def _process(self):
+        text = self._pending + "".join(self._chunks)
+        self._chunks.clear()
+        self._buffered = 0
+        hold = _unfinished_markup(text)
+        if hold != -1:
+            self._pending = text[hold:]
+            text = text[:hold]
+        else:
+            self._pending = ""
+        if text:
+            self._feed(text)
+
+    def _feed(self, text: str):
+        write = self._write
+        position, end = 0, len(text)
+        while position < end:
+            if self._preserve is not None:
+                match = CLOSE_PATTERNS[self._preserve].search(text, position)
+                if match is None:
+                    write(text[position:])
+                    return
+                write(text[position:match.end()])
+                self._after_block = self._preserve in BLOCK_TAGS
+                self._preserve = None
+                position = match.end()
+                continue
+
+            match = SPECIAL_PATTERN.search(text, position)
+            if match is None:
+                self._text(text[position:])
+                return
+            self._text(text[position:match.start()])
+            name = match[1]
+            if name is None:
+                close = text.find("-->", match.end())
+                close = end if close == -1 else close + 3
+                comment = text[match.start():close]
+                if comment.startswith("<!--[if"):
+                    self._flush_space(False)
+                    write(comment)
+                    self._after_block = False
+                else:
+                    self.stats.saved += len(comment.encode())
+            else:
+                name = name.lower()
+                close = text.find(">", match.end())
+                close = end if close == -1 else close + 1
+                tag = text[match.start():close]
+                self._flush_space(name in BLOCK_TAGS)
+                write(tag)
+                if tag.endswith("/>"):
+                    self._after_block = name in BLOCK_TAGS
+                else:
+                    self._preserve = name
+            position = close
+
+    def _text(self, text: str):
+        """Writes markup outside of comments and preserved tags. Whitespace at either end is kept in `_space` until what is on its other side is known."""
+        core = text.strip(WHITESPACE)
+        if not core:
+            self._space += text
+            return
+        leading = len(text) - len(text.lstrip(WHITESPACE))
+        self._space += text[:leading]
+        self._flush_space(core[0] == "<" and _tag_name(core, 0) in BLOCK_TAGS)
+        if any(hint in core for hint in COLLAPSIBLE_HINTS):
+            collapsed = COLLAPSIBLE_PATTERN.sub(lambda match: _collapse(match, core), core)
+            self.stats.saved += len(core) - len(collapsed)
+            self._write(collapsed)
+        else:
+            self._write(core)
+        self._after_block = core[-1] == ">" and _tag_name(core, core.rfind("<")) in BLOCK_TAGS
+        self._space = text[leading + len(core):]
+
+    def _flush_space(self, before_block: bool):
+        space = self._space
+        if not space:
+            return
+        self._space = ""
+        # a lone plain space is kept like one in the middle of a chunk, which `COLLAPSIBLE_PATTERN` never matches, so the
+        # output does not depend on where buffer boundaries fall
+        if space != " " and (self._after_block or before_block):
+            self.stats.saved += len(space)
+        else:
+            self.stats.saved += len(space) - 1
+            self._write(" ")
+
+def _tag_name(text: str, start: int) -> str:
+    match = TAG_NAME_PATTERN.match(text, start)
+    return match[1].lower() if match is not None else None
+
+def _collapse(match: re.Match, text: str) -> str:
+    """Replaces a whitespace run inside `text`: nothing next to a block-level tag, one space anywhere else. Runs inside a tag are kept, since they may belong to an attribute value."""
+    start, end = match.span()
+    if text.rfind("<", 0, start) > text.rfind(">", 0, start):
+        return match[0]
+    if text[start - 1] == ">" and _tag_name(text, text.rfind("<", 0, start)) in BLOCK_TAGS:
+        return ""
+    if text[end] == "<" and _tag_name(text, end) in BLOCK_TAGS:
+        return ""
+    return " "
+
+def _unfinished_markup(text: str) -> int:
+    """Returns where an unfinished tag or comment starts at the end of `text`, or -1 if everything can be processed now."""
+    start = text.rfind("<")
+    if start != -1 and text.find(">", start) == -1:
+        hold = start
+    else:
+        hold = -1
+    comment = text.rfind("<!--")
+    if comment != -1 and text.find("-->", comment + 4) == -1 and (hold == -1 or comment < hold):
+        hold = comment
+    return hold
+
+def minify_html(html: str) -> str:
+    """Minifies a whole document at once; see `HtmlMinifier`."""
+    parts = []
+    minifier = HtmlMinifier(parts.append)
+    minifier.write(html)
+    minifier.close()
+    return "".join(parts)
@@ -0,0 +1,60 @@
+import filecmp
+import os
+import tempfile
+
+def _default_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+DEFAULT_MODE = _default_mode()
+
+class AtomicOutput:
+    """Writes a file through a temporary sibling and only replaces the destination when the new bytes differ:
+    ```
+    with AtomicOutput("docs/index.html") as f:
+        f.write(html)
+    ```
+    If the content is identical the temporary file is discarded and the existing file (and its mtime) is left alone; otherwise it is moved into place with an atomic `os.replace`, so readers never see a half-written page. `changed` tells which happened. If the block raises, the destination is untouched.
+    """
+    def __init__(self, path: str, mode: str = "w"):
+        self.path = path
+        self.mode = mode
+        self.changed = False
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        self._file = os.fdopen(fd, self.mode)
+        return self._file
+
+    def __exit__(self, exc_type, exc, traceback):
+        self._file.close()
+        if exc_type is not None:
+            os.remove(self._tmp_path)
+            return False
+        if os.path.isfile(self.path) and filecmp.cmp(self._tmp_path, self.path, shallow=False):
+            os.remove(self._tmp_path)
+            self.changed = False
+            return False
+        os.chmod(self._tmp_path, DEFAULT_MODE)
+        os.replace(self._tmp_path, self.path)
+        self.changed = True
+        return False
+
+def write_if_changed(path: str, data) -> bool:
+    """Writes `data` (str or bytes) to `path` unless the file already holds exactly those bytes. Returns whether the file changed."""
+    if isinstance(data, str):
+        data = data.encode()
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    with AtomicOutput(path, "wb") as f:
+        f.write(data)
+    return True
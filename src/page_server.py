@@ -0,0 +1,110 @@
+"""Previews a site without building it: pages are rendered from `content/` the first time they are requested.
+```
+python3 src/dev_server.py --render [--port 8888] [--base-path /]
+```
+A request for `/blog/tom/` renders `content/blog/tom/index.md` (and `/about.html` renders `content/about.md`) into the template; anything else is served from `static/`. Nothing is scanned or rendered up front, so the first page is up as fast on a site of a hundred thousand pages as on one of ten.
+
+Rendered pages are cached like files in `dev_server.FileCache`, stamped with the source's mtime and size and the template's digest. A page whose stamp changed is only rendered again if the hash of its source (or the template) changed too, so touching a file or saving it unmodified costs a read and a hash.
+"""
+import hashlib
+import os
+import posixpath
+import threading
+from http import HTTPStatus
+
+from block_cache import BlockCache
+from dev_server import DEFAULT_CACHE_BYTES, CachedFile, DevRequestHandler, DevServer, FileCache, cached_file, site_paths
+from exceptions import RenderError
+from markdown_generate import render_page_html
+from site_build import CONTENT_PATH, STATIC_PATH, TEMPLATE_PATH
+from template import load_template
+from url_resolver import resolver_for_base_path
+
+class PageCache(FileCache):
+    """Rendered pages by source path, least recently used first. `get(source)` renders the markdown at `source` into the template at `template_path` on a miss. Renders share one in-memory `BlockCache` and run one at a time (the renderer's caches are not thread-safe); cached pages are served concurrently."""
+    def __init__(self, template_path: str, base_path: str = "/", max_bytes: int = DEFAULT_CACHE_BYTES):
+        super().__init__(max_bytes)
+        self.template_path = template_path
+        self.resolver = resolver_for_base_path(base_path)
+        self.block_cache = BlockCache()
+        self.render_lock = threading.Lock()
+        self.renders = 0
+
+    def stamp(self, path: str, file_stat: os.stat_result) -> tuple:
+        # `load_template` recompiles the template (and its partials) once they change, so every page renders again
+        template = load_template(self.template_path, self.resolver)
+        return (file_stat.st_mtime_ns, file_stat.st_size, template.digest)
+
+    def load(self, path: str) -> CachedFile:
+        with self.render_lock:
+            file_stat = os.stat(path)
+            stamp = self.stamp(path, file_stat)
+            digest = hashlib.blake2b(stamp[2].encode(), digest_size=16, person=b"page")
+            with open(path, "rb") as f:
+                digest.update(f.read())
+            etag = f'"{digest.hexdigest()}"'
+            with self.lock:
+                previous = self.entries.get(path)
+            if previous is not None and previous.etag == etag:
+                return previous._replace(stamp=stamp)
+            html = render_page_html(
+                path, self.template_path, self.resolver.base_path, cache=self.block_cache, resolve_url=self.resolver,
+            )
+            self.renders += 1
+        return cached_file(html.encode(), "text/html", etag, file_stat, stamp)
+
+class PageRequestHandler(DevRequestHandler):
+    def send_file(self, head: bool):
+        try:
+            super().send_file(head)
+        except RenderError as e:
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, explain=str(e))
+
+class PageServer(DevServer):
+    """Serves the site under `root` (its `content/`, `static/` and `template.html`) by rendering pages on demand into a `PageCache`; static files go through the usual `FileCache`."""
+    def __init__(
+            self, address: tuple[str, int], root: str = ".", cache_bytes: int = DEFAULT_CACHE_BYTES,
+            base_path: str = "/", verbose: bool = False,
+    ):
+        super().__init__(address, os.path.join(root, CONTENT_PATH), cache_bytes, handler=PageRequestHandler, verbose=verbose)
+        self.static_path = os.path.abspath(os.path.join(root, STATIC_PATH))
+        self.pages = PageCache(os.path.join(root, TEMPLATE_PATH), base_path, cache_bytes)
+
+    def translate_path(self, url_path: str) -> str:
+        """Maps a URL path to a directory or page under `content/` if there is one, otherwise to a path under `static/`. Page paths keep their `.html` name; `open_file` renders them from the markdown."""
+        path = super().translate_path(url_path)
+        if path is None:
+            return None
+        if os.path.isdir(path) or os.path.isfile(_source_path(path)):
+            return path
+        return self.static_path + path[len(self.directory):]
+
+    def open_file(self, path: str) -> CachedFile:
+        if path.startswith(self.directory + os.sep) and path.endswith(".html"):
+            source = _source_path(path)
+            try:
+                return self.pages.get(source)
+            except Exception as e:
+                # the page is not cached, so the next request tries again: fixing the source is enough
+                raise RenderError(f"cannot render {source}: {e}") from e
+        return self.cache.get(path)
+
+def _source_path(path: str) -> str:
+    """The markdown a page is rendered from: `blog/tom/index.html` from `blog/tom/index.md`, like `site_build.collect_pages`."""
+    return path[:-len(".html")] + ".md" if path.endswith(".html") else ""
+
+def page_paths(root: str = ".") -> list[str]:
+    """The URL path of every page under `root`'s `content/` and every file under its `static/` (see `dev_server.site_paths`). Only used to load-test a `PageServer`; serving never walks the site."""
+    content_path = os.path.join(root, CONTENT_PATH)
+    paths = []
+    for dirpath, _, filenames in os.walk(content_path):
+        for filename in filenames:
+            if not filename.endswith(".md"):
+                continue
+            relative_path = os.path.relpath(os.path.join(dirpath, filename), content_path).replace(os.sep, "/")
+            if filename == "index.md":
+                relative_path = posixpath.dirname(relative_path) + "/"
+            else:
+                relative_path = relative_path[:-len(".md")] + ".html"
+            paths.append("/" + relative_path.lstrip("/"))
+    return sorted(paths) + site_paths(os.path.join(root, STATIC_PATH))
@@ -0,0 +1,74 @@
+import os
+
+from output_writer import write_if_changed
+
+GZIP_SUFFIX = ".gz"
+DEFAULT_GZIP_LEVEL = 9
+
+# text formats worth compressing; images, fonts and media are compressed already
+COMPRESSIBLE_EXTENSIONS = {
+    ".html", ".htm", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".xml", ".md",
+}
+
+class CompressResult:
+    """What a compression pass did: `files` holds every `.gz` path (relative to the output directory) that belongs next to its source, `compressed` the ones rewritten this time."""
+    def __init__(self):
+        self.files = set()
+        self.compressed = []
+        self.unchanged = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+def is_compressible(relative_path: str) -> bool:
+    return os.path.splitext(relative_path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+def is_compressed(path: str) -> bool:
+    """A `.gz` sibling is current when it carries the exact mtime of the file it was compressed from (see `compress_file`). Pages and static copies are only rewritten when their bytes change, so an unchanged output keeps its mtime and costs two `stat`s here."""
+    try:
+        return os.stat(path + GZIP_SUFFIX).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def compress_file(path: str, level: int = DEFAULT_GZIP_LEVEL) -> tuple[int, int]:
+    """Writes `path` + `.gz` and stamps it with the source's mtime. The gzip header's own timestamp is zeroed, so the same input always gives the same bytes. Returns the sizes before and after."""
+    # imported here (like the thread pool below) so that builds without --gzip do not pay for it at startup
+    import gzip
+
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = gzip.compress(data, compresslevel=level, mtime=0)
+    gz_path = path + GZIP_SUFFIX
+    write_if_changed(gz_path, compressed)
+    os.utime(gz_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return len(data), len(compressed)
+
+def compress_outputs(
+        public_path: str, relative_paths: set[str], level: int = DEFAULT_GZIP_LEVEL, workers: int = None,
+) -> CompressResult:
+    """Gives every compressible file of `relative_paths` under `public_path` an up-to-date `.gz` sibling, for servers that can send precompressed files (e.g. nginx `gzip_static`). Only files changed since their `.gz` was written are compressed, across a thread pool of `workers` threads (zlib releases the GIL while compressing)."""
+    result = CompressResult()
+    stale = []
+    for relative_path in sorted(relative_paths):
+        if not is_compressible(relative_path):
+            continue
+        result.files.add(relative_path + GZIP_SUFFIX)
+        path = os.path.join(public_path, relative_path)
+        if is_compressed(path):
+            result.unchanged += 1
+        else:
+            stale.append(relative_path)
+    if not stale:
+        return result
+
+    paths = [os.path.join(public_path, relative_path) for relative_path in stale]
+    if len(paths) == 1 or workers == 1:
+        sizes = [compress_file(path, level) for path in paths]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(workers) as executor:
+            sizes = list(executor.map(compress_file, paths, [level] * len(paths)))
+    result.compressed = stale
+    result.bytes_in = sum(size for size, _ in sizes)
+    result.bytes_out = sum(size for _, size in sizes)
+    return result
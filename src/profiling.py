@@ -0,0 +1,127 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+class Profiler:
+    """Records wall and CPU time for named build stages. Each recorded stage is an event:
+    ```
+    {
+        "name": "parse_blocks",
+        "page": "./content/index.md",
+        "pid": 1234,
+        "start_ns": 1700000000000,
+        "wall_ns": 52000,
+        "cpu_ns": 51000,
+    }
+    ```
+    `page` is the page being generated when the stage ran (or `None` for build-wide stages). Hooks added with `add_hook` are called with every event as it is recorded, including events merged in from worker processes.
+    """
+    def __init__(self):
+        self.events = []
+        self.hooks = []
+        self.current_page = None
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def record(self, event: dict):
+        self.events.append(event)
+        for hook in self.hooks:
+            hook(event)
+
+    def merge(self, events: list[dict]):
+        for event in events:
+            self.record(event)
+
+    @contextmanager
+    def stage(self, name: str, page: str = None):
+        previous_page = self.current_page
+        if page is not None:
+            self.current_page = page
+        start_ns = time.perf_counter_ns()
+        cpu_start_ns = time.process_time_ns()
+        try:
+            yield
+        finally:
+            self.record({
+                "name": name,
+                "page": self.current_page,
+                "pid": os.getpid(),
+                "start_ns": start_ns,
+                "wall_ns": time.perf_counter_ns() - start_ns,
+                "cpu_ns": time.process_time_ns() - cpu_start_ns,
+            })
+            self.current_page = previous_page
+
+    def summary(self) -> list[dict]:
+        """Totals per stage, in the order stages were first seen."""
+        stages = {}
+        for event in self.events:
+            row = stages.setdefault(event["name"], {"name": event["name"], "calls": 0, "wall_ns": 0, "cpu_ns": 0, "max_wall_ns": 0})
+            row["calls"] += 1
+            row["wall_ns"] += event["wall_ns"]
+            row["cpu_ns"] += event["cpu_ns"]
+            row["max_wall_ns"] = max(row["max_wall_ns"], event["wall_ns"])
+        return list(stages.values())
+
+    def slowest_pages(self, count: int = 10) -> list[tuple[str, int]]:
+        pages = [(event["page"], event["wall_ns"]) for event in self.events if event["name"] == "page"]
+        return sorted(pages, key=lambda page: page[1], reverse=True)[:count]
+
+    def format_summary(self, pages: int = 10) -> str:
+        lines = [f"{'stage':<16}{'calls':>8}{'wall ms':>12}{'cpu ms':>12}{'mean ms':>10}{'max ms':>10}"]
+        for row in self.summary():
+            lines.append(
+                f"{row['name']:<16}{row['calls']:>8}{row['wall_ns'] / 1e6:>12.2f}{row['cpu_ns'] / 1e6:>12.2f}"
+                f"{row['wall_ns'] / row['calls'] / 1e6:>10.3f}{row['max_wall_ns'] / 1e6:>10.3f}"
+            )
+        slowest = self.slowest_pages(pages)
+        if slowest:
+            lines.append("")
+            lines.append("slowest pages:")
+            for page, wall_ns in slowest:
+                lines.append(f"{wall_ns / 1e6:>10.3f} ms  {page}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict:
+        """The events in Chrome's trace event format, viewable in `chrome://tracing` or Perfetto."""
+        trace_events = []
+        for event in self.events:
+            args = {"cpu_ms": event["cpu_ns"] / 1e6}
+            if event["page"] is not None:
+                args["page"] = event["page"]
+            trace_events.append({
+                "name": event["name"],
+                "cat": "build",
+                "ph": "X",
+                "ts": event["start_ns"] / 1000,
+                "dur": event["wall_ns"] / 1000,
+                "pid": event["pid"],
+                "tid": event["pid"],
+                "args": args,
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+_active = None
+
+@contextmanager
+def activate(profiler: Profiler):
+    """Makes `profiler` the one `stage` records into for the duration of the block."""
+    global _active
+    previous = _active
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+
+def stage(name: str, page: str = None):
+    """Times a block against the active profiler. With no profiler active this is a no-op, so instrumented code pays almost nothing when profiling is off."""
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name, page)
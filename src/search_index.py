@@ -0,0 +1,293 @@
+"""A full-text search index built while pages render, written next to the site for client-side search.
+
+Pages hand their plain text over as it is parsed (see `markdown_generate.generate_page`); nothing reads the finished HTML. The index is written under `docs/search/`:
+```
+search/index.json   {"version": 1, "prefix_length": 2, "min_term_length": 2, "shards": ["ab", "ac", ..., "_c3a9"]}
+search/pages.json   [["/blog/tom/", "Tom"], null, ...]   # page id -> [url, title]; null for a free id
+search/ab.json      {"about": [0, 2, 5, 1], ...}         # term -> postings
+```
+Terms are split into shards by their first `PREFIX_LENGTH` characters, so a client looking up a word loads `index.json` and `pages.json` once and then only the shard the word falls in. Postings are flat lists of (id gap, count) pairs: `[0, 2, 5, 1]` means page 0 has the term twice and page 5 once.
+
+`SearchIndex` keeps every page's term counts in `.search_index.json` between builds. A build only tokenizes the pages it renders, and only rewrites the shards holding terms those pages gained or lost; page ids are stable, so one edited page never shifts the postings of another.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+
+from output_writer import write_if_changed
+
+SEARCH_STATE_PATH = "./.search_index.json"
+SEARCH_VERSION = 1
+SEARCH_DIRECTORY = "search"
+META_NAME = "index.json"
+PAGES_NAME = "pages.json"
+
+PREFIX_LENGTH = 2
+# single letters and digits match too much to be worth indexing; very long "words" are hashes, URLs and the like
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+
+TERM_PATTERN = re.compile(r"\w+")
+# the same split for ASCII text, which most pages are, at a fraction of the regex's cost: everything `\w` does not match
+# becomes a space
+ASCII_SEPARATORS = str.maketrans({chr(c): " " for c in range(128) if not (chr(c).isalnum() or chr(c) == "_")})
+
+class PageText:
+    """The title and plain text of one page, as collected by `markdown_generate.generate_page`."""
+    def __init__(self):
+        self.title = None
+        self.parts = []
+
+def _words(text: str) -> list[str]:
+    text = text.lower()
+    if text.isascii():
+        return text.translate(ASCII_SEPARATORS).split()
+    return TERM_PATTERN.findall(text)
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words of `text` between `MIN_TERM_LENGTH` and `MAX_TERM_LENGTH` characters long."""
+    return [term for term in _words(text) if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH]
+
+def term_counts(text: str) -> dict[str, int]:
+    return {term: count for term, count in Counter(_words(text)).items() if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH}
+
+def shard_name(prefix: str) -> str:
+    """The file name (without `.json`) of the shard for terms starting with `prefix`: the prefix itself when it is ASCII letters and digits, otherwise `_` and its UTF-8 bytes in hex, so names are safe in any file system and URL."""
+    if prefix.isascii() and prefix.isalnum():
+        return prefix
+    return "_" + prefix.encode().hex()
+
+def encode_postings(postings: dict[int, int]) -> list[int]:
+    """`{page id: count}` as a flat list of (gap from the previous id, count) pairs, in id order."""
+    encoded = []
+    previous = 0
+    for page_id in sorted(postings):
+        encoded += (page_id - previous, postings[page_id])
+        previous = page_id
+    return encoded
+
+def decode_postings(encoded: list[int]) -> dict[int, int]:
+    postings = {}
+    page_id = 0
+    for index in range(0, len(encoded), 2):
+        page_id += encoded[index]
+        postings[page_id] = encoded[index + 1]
+    return postings
+
+def _dump(data) -> str:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+class SearchResult:
+    """What writing the index did: `files` holds every file of the index (relative to the output directory), `written` the shards rewritten this time."""
+    def __init__(self):
+        self.files = set()
+        self.written = []
+        self.shards = 0
+
+class SearchIndex:
+    """Every indexed page's term counts, by output path, saved between builds:
+    ```
+    {
+        "docs/blog/tom/index.html": {"id": 3, "source_hash": "...", "title": "Tom", "terms": {"tom": 4, ...}},
+    }
+    ```
+    A page is current while its source hash matches the build manifest's. The saved state also names the shards written from it, so that the next build can patch just the shards its changes touch; a state saved by another generator version is discarded (the tokenizer may have changed), and the whole index is written again.
+    """
+    def __init__(self, path: str, generator: str, pages: dict = None, shards: list[str] = None):
+        self.path = path
+        self.generator = generator
+        self.pages = pages if pages is not None else {}
+        # prefixes with a shard on disk; None until the index has been written once from this state
+        self.shards = set(shards) if shards is not None else None
+        # ids whose postings changed since the last write, and the prefixes of every term they had or have
+        self._changed_ids = set()
+        self._changed_prefixes = set()
+        self._free_ids = None
+        self._next_id = 0
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str, generator: str) -> "SearchIndex":
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, generator)
+        if not isinstance(data, dict) or data.get("version") != SEARCH_VERSION or data.get("generator") != generator:
+            return cls(path, generator)
+        return cls(path, generator, data.get("pages", {}), data.get("shards"))
+
+    def save(self):
+        """Writes the state back if anything changed since it was loaded."""
+        if not self.dirty:
+            return
+        data = {"version": SEARCH_VERSION, "generator": self.generator, "pages": self.pages}
+        if self.shards is not None:
+            data["shards"] = sorted(self.shards)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            # `json.dumps` encodes in C; `json.dump` streams through the pure-Python encoder, several times slower
+            f.write(json.dumps(data, separators=(",", ":"), sort_keys=True))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def is_current(self, output: str, source_hash: str) -> bool:
+        page = self.pages.get(output)
+        return page is not None and page["source_hash"] == source_hash
+
+    def update(self, output: str, source_hash: str, title: str, terms: dict[str, int]):
+        """Records the page rendered to `output`. Only a change to its terms marks any shard for rewriting."""
+        page = self.pages.get(output)
+        if page is None:
+            page_id = self._new_id()
+        else:
+            page_id = page["id"]
+            if page["terms"] != terms:
+                self._forget(page)
+        if page is None or page["terms"] != terms:
+            self._changed_ids.add(page_id)
+            self._changed_prefixes.update(term[:PREFIX_LENGTH] for term in terms)
+        self.pages[output] = {"id": page_id, "source_hash": source_hash, "title": title, "terms": terms}
+        self.dirty = True
+
+    def prune(self, outputs: set[str]):
+        """Drops the pages whose output is not in `outputs`; their ids are reused by pages added later."""
+        for output in [output for output in self.pages if output not in outputs]:
+            page = self.pages.pop(output)
+            self._forget(page)
+            self.dirty = True
+            if self._free_ids is not None:
+                self._free_ids.append(page["id"])
+                self._free_ids.sort(reverse=True)
+
+    def _forget(self, page: dict):
+        self._changed_ids.add(page["id"])
+        self._changed_prefixes.update(term[:PREFIX_LENGTH] for term in page["terms"])
+
+    def _new_id(self) -> int:
+        if self._free_ids is None:
+            used = {page["id"] for page in self.pages.values()}
+            self._next_id = max(used, default=-1) + 1
+            self._free_ids = sorted(set(range(self._next_id)) - used, reverse=True)
+        if self._free_ids:
+            return self._free_ids.pop()
+        self._next_id += 1
+        return self._next_id - 1
+
+    def write(self, public_path: str, resolve_url) -> SearchResult:
+        """Writes the index under `public_path`/`SEARCH_DIRECTORY`, pointing pages at `resolve_url("/" + path)`. Only shards with changed postings are rewritten, unless the state has not been written before or any file of the index on disk is missing (or damaged), in which case every shard is."""
+        search_path = os.path.join(public_path, SEARCH_DIRECTORY)
+        result = SearchResult()
+        intact = self.shards is not None and all(
+            os.path.isfile(os.path.join(public_path, path)) for path in self._files()
+        )
+        if intact and not self.dirty:
+            return self._result(result)
+        patched = self._patch_shards(search_path) if intact else None
+        if patched is None:
+            patched = self._all_shards()
+            self.shards = set()
+            self.dirty = True
+        for prefix, terms in sorted(patched.items()):
+            name = shard_name(prefix)
+            if terms:
+                self.shards.add(prefix)
+                data = {term: encode_postings(postings) for term, postings in terms.items()}
+                if write_if_changed(os.path.join(search_path, f"{name}.json"), _dump(data)):
+                    result.written.append(name)
+            else:
+                # removed with the other orphans, once it is left out of `files`
+                self.shards.discard(prefix)
+        self._changed_ids.clear()
+        self._changed_prefixes.clear()
+
+        pages = [None] * (max((page["id"] for page in self.pages.values()), default=-1) + 1)
+        for output, page in self.pages.items():
+            relative_path = os.path.relpath(output, public_path).replace(os.sep, "/")
+            if relative_path == "index.html" or relative_path.endswith("/index.html"):
+                relative_path = relative_path[:-len("index.html")]
+            pages[page["id"]] = [resolve_url("/" + relative_path), page["title"]]
+        meta = {
+            "version": SEARCH_VERSION, "prefix_length": PREFIX_LENGTH, "min_term_length": MIN_TERM_LENGTH,
+            "pages": PAGES_NAME, "shards": sorted(shard_name(prefix) for prefix in self.shards),
+        }
+        write_if_changed(os.path.join(search_path, PAGES_NAME), _dump(pages))
+        write_if_changed(os.path.join(search_path, META_NAME), _dump(meta))
+        return self._result(result)
+
+    def _files(self) -> list[str]:
+        """Every file of the index written from this state, relative to the output directory."""
+        names = [META_NAME, PAGES_NAME] + [f"{shard_name(prefix)}.json" for prefix in self.shards]
+        return [os.path.join(SEARCH_DIRECTORY, name) for name in names]
+
+    def _result(self, result: SearchResult) -> SearchResult:
+        result.files = set(self._files())
+        result.shards = len(self.shards)
+        return result
+
+    def _all_shards(self) -> dict[str, dict[str, dict[int, int]]]:
+        shards = {}
+        for page in self.pages.values():
+            for term, count in page["terms"].items():
+                shards.setdefault(term[:PREFIX_LENGTH], {}).setdefault(term, {})[page["id"]] = count
+        return shards
+
+    def _patch_shards(self, search_path: str) -> dict[str, dict[str, dict[int, int]]]:
+        """Reads the shards of the changed prefixes back, drops the changed pages' postings and adds their current ones. Returns None if a shard cannot be read."""
+        additions = {}
+        for page in self.pages.values():
+            if page["id"] not in self._changed_ids:
+                continue
+            for term, count in page["terms"].items():
+                additions.setdefault(term[:PREFIX_LENGTH], {}).setdefault(term, {})[page["id"]] = count
+
+        shards = {}
+        for prefix in self._changed_prefixes:
+            terms = {}
+            if prefix in self.shards:
+                try:
+                    with open(os.path.join(search_path, f"{shard_name(prefix)}.json")) as f:
+                        terms = {term: decode_postings(encoded) for term, encoded in json.load(f).items()}
+                except (OSError, ValueError, TypeError, AttributeError, IndexError):
+                    return None
+            for term in list(terms):
+                postings = terms[term]
+                for page_id in self._changed_ids.intersection(postings):
+                    del postings[page_id]
+                if not postings:
+                    del terms[term]
+            for term, postings in additions.get(prefix, {}).items():
+                terms.setdefault(term, {}).update(postings)
+            shards[prefix] = terms
+        return shards
+
+def search(search_path: str, query: str, limit: int = 10) -> list[tuple[str, str]]:
+    """Looks `query` up in the index written to `search_path`, the way a client would: only the shards of the query's terms are read. Returns `(url, title)` for the pages holding every term, best first (by term count, weighted by how rare each term is)."""
+    with open(os.path.join(search_path, META_NAME)) as f:
+        meta = json.load(f)
+    with open(os.path.join(search_path, PAGES_NAME)) as f:
+        pages = json.load(f)
+    total = sum(page is not None for page in pages)
+    shards = set(meta["shards"])
+    loaded = {}
+    scores = None
+    for term in set(tokenize(query)):
+        name = shard_name(term[:meta["prefix_length"]])
+        if name not in shards:
+            return []
+        if name not in loaded:
+            with open(os.path.join(search_path, f"{name}.json")) as f:
+                loaded[name] = json.load(f)
+        postings = decode_postings(loaded[name].get(term, []))
+        weight = math.log(1 + total / len(postings)) if postings else 0.0
+        term_scores = {page_id: count * weight for page_id, count in postings.items()}
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {page_id: score + term_scores[page_id] for page_id, score in scores.items() if page_id in term_scores}
+    if not scores:
+        return []
+    ranked = sorted(scores, key=lambda page_id: (-scores[page_id], pages[page_id][0]))
+    return [tuple(pages[page_id]) for page_id in ranked[:limit]]
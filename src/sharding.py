@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+
+from build_manifest import hash_file
+from exceptions import ShardError
+
+SHARD_MANIFEST_NAME = ".shard_manifest.json"
+SHARD_MANIFEST_VERSION = 1
+SHARD_OUTPUT_PATH = "./shards"
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """Parses `"i/N"` (1-based, as written on the command line) into a 0-based `(index, count)` pair."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard {text!r}, expected i/N") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard {text!r}, expected 1 <= i <= N")
+    return index - 1, count
+
+def format_shard(shard: tuple[int, int]) -> str:
+    index, count = shard
+    return f"{index + 1}/{count}"
+
+def shard_path(path: str, shard: tuple[int, int]) -> str:
+    """Gives each shard its own copy of a per-build file (e.g. `.build_manifest.json` becomes `.build_manifest.shard-2-of-4.json`), so several shards can be built side by side in one checkout."""
+    root, ext = os.path.splitext(path)
+    index, count = shard
+    return f"{root}.shard-{index + 1}-of-{count}{ext}"
+
+def shard_output_path(shard: tuple[int, int]) -> str:
+    return os.path.join(SHARD_OUTPUT_PATH, str(shard[0] + 1))
+
+def page_key(source: str, content_path: str) -> str:
+    """The page's path relative to `content_path` with `/` separators, which is the same on every machine."""
+    return os.path.relpath(source, content_path).replace(os.sep, "/")
+
+def stable_hash(key: str) -> int:
+    # unlike hash(), this does not change between processes or machines
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+def assign_shards(keys: list[str], count: int, costs: dict[str, float] = None) -> dict[str, int]:
+    """Maps every page key to a shard index in `range(count)`.
+
+    Without `costs`, a page's shard is the stable hash of its key modulo `count`, so adding or removing a page never moves any other page. With `costs` (seconds per page from an earlier build), pages are assigned greedily, most expensive first, to the shard with the least total cost; pages with no recorded cost count as the average. Either way the result depends only on the keys and costs, so every machine computes the same partition - as long as they all read the same costs file.
+    """
+    if not costs:
+        return {key: stable_hash(key) % count for key in keys}
+    known = [costs[key] for key in keys if key in costs]
+    default = sum(known) / len(known) if known else 1.0
+    loads = [0.0] * count
+    assignment = {}
+    for key in sorted(keys, key=lambda key: (-costs.get(key, default), stable_hash(key), key)):
+        index = min(range(count), key=lambda i: (loads[i], i))
+        loads[index] += costs.get(key, default)
+        assignment[key] = index
+    return assignment
+
+def select_shard(
+        pages: list[tuple[str, str]], content_path: str, shard: tuple[int, int], costs: dict[str, float] = None,
+) -> list[tuple[str, str]]:
+    """Returns the `(source, output)` pairs from `pages` that belong to `shard`."""
+    index, count = shard
+    assignment = assign_shards([page_key(source, content_path) for source, _ in pages], count, costs)
+    return [(source, output) for source, output in pages if assignment[page_key(source, content_path)] == index]
+
+def load_shard_manifest(path: str) -> dict:
+    """Reads a shard (or merged) manifest. Unlike `BuildManifest.load` a bad file is an error, since a merge cannot be verified without it."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ShardError(f"cannot read shard manifest {path}: {e}") from e
+    if not isinstance(data, dict) or data.get("version") != SHARD_MANIFEST_VERSION:
+        raise ShardError(f"unsupported shard manifest {path}")
+    return data
+
+def load_costs(path: str) -> dict[str, float]:
+    """Per-page render seconds, keyed by page key, from a shard or merged manifest."""
+    costs = {}
+    for entry in load_shard_manifest(path)["pages"].values():
+        if entry.get("seconds") is not None:
+            costs[entry["source"]] = entry["seconds"]
+    return costs
+
+def write_shard_manifest(
+        path: str, shard: tuple[int, int], pages: dict, base_path: str, template_hash: str, generator: str,
+        assets: dict[str, str] = None,
+):
+    """Writes the manifest describing one shard's outputs (or, with `shard` None, a merged site):
+    ```
+    {
+        "version": 1,
+        "index": 1,
+        "count": 4,
+        "base_path": "/",
+        "template_hash": "...",
+        "generator": "...",
+        "assets": {"index.css": "index.1f2e3d4c5b6a.css"},
+        "pages": {
+            "blog/tom/index.html": {"source": "blog/tom/index.md", "hash": "...", "seconds": 0.004},
+        },
+    }
+    ```
+    `index` is 0-based, so this is shard 2/4. `base_path` is the URL resolver's key and `assets` its fingerprinted asset names (None unless fingerprinting). Output paths are relative to the shard's directory, `hash` is the output's content hash and `seconds` how long it took to render (kept from the previous manifest for pages that were up to date).
+    """
+    data = {
+        "version": SHARD_MANIFEST_VERSION,
+        "index": shard[0] if shard is not None else None,
+        "count": shard[1] if shard is not None else None,
+        "base_path": base_path,
+        "template_hash": template_hash,
+        "generator": generator,
+        "assets": assets,
+        "pages": pages,
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def shard_pages(
+        pages: list[tuple[str, str]], content_path: str, public_path: str, seconds: dict[str, float], previous: dict,
+) -> dict:
+    """Builds the `pages` section of a shard manifest for the `(source, output)` pairs that were just built into `public_path`. `seconds` holds render times by output path for the pages rendered in this build; `previous` is the last manifest's `pages`."""
+    entries = {}
+    for source, output in pages:
+        relative_path = os.path.relpath(output, public_path)
+        elapsed = seconds.get(output)
+        if elapsed is None:
+            elapsed = previous.get(relative_path, {}).get("seconds")
+        entries[relative_path] = {
+            "source": page_key(source, content_path),
+            "hash": hash_file(output),
+            "seconds": elapsed,
+        }
+    return entries
@@ -0,0 +1,394 @@
+import os
+import sys
+import time
+from typing import NamedTuple
+
+from get_file_paths import get_file_paths
+from static_to_public import SyncResult, sync_source_dir_to_destination_dir, remove_orphans
+from build_manifest import BuildManifest, generator_version
+from template import load_template
+from profiling import Profiler, activate, stage
+from block_cache import BlockCache, DEFAULT_MAX_BYTES
+from url_resolver import FingerprintResolver, resolver_for_base_path
+from assets import ASSET_MAP_PATH, AssetMap
+from precompress import compress_outputs
+from search_index import SEARCH_STATE_PATH, SearchIndex
+from exceptions import ShardError
+from sharding import (
+    SHARD_MANIFEST_NAME, format_shard, load_costs, load_shard_manifest, select_shard, shard_output_path,
+    shard_pages, shard_path, write_shard_manifest,
+)
+
+STATIC_PATH = "./static"
+PUBLIC_PATH = "./docs"
+CONTENT_PATH = "./content"
+TEMPLATE_PATH = "./template.html"
+MANIFEST_PATH = "./.build_manifest.json"
+BLOCK_CACHE_PATH = "./.block_cache.db"
+
+# the block cache and URL resolver used by `render_page` in this process (the build itself, or a pool worker)
+_block_cache = None
+_resolver = None
+
+# block caches loaded or saved by earlier builds in this process, by path: (cache, file mtime)
+_loaded_block_caches = {}
+
+# process pools kept alive between builds, once `keep_worker_pools` has been called
+_worker_pools = None
+
+class PageJob(NamedTuple):
+    source: str
+    output: str
+    template_path: str
+    base_path: str
+    profile: bool = False
+    minify: bool = False
+    search: bool = False
+
+class PageResult(NamedTuple):
+    source: str
+    output: str
+    worker: int
+    seconds: float
+    events: list = None
+    cache_entries: list = None
+    cache_hits: int = 0
+    cache_misses: int = 0
+    changed: bool = True
+    # only recorded for minified pages: the bytes written and the bytes `minify.HtmlMinifier` removed
+    size: int = 0
+    saved: int = 0
+    # only recorded for `search` jobs: the page's title and how often each term occurs in its text
+    title: str = None
+    terms: dict = None
+
+def collect_pages(content_path: str, public_path: str) -> list[tuple[str, str]]:
+    """Returns a `(source, output)` pair for every markdown file under `content_path`."""
+    pages = []
+    for content in get_file_paths(content_path):
+        relative_path = _relative_path(content, content_path)
+        html_path = relative_path.replace(".md", ".html")
+        pages.append((content, os.path.join(public_path, html_path)))
+    return pages
+
+def _relative_path(path: str, root: str) -> str:
+    """`os.path.relpath(path, root)` for a `path` joined onto `root`, without making both absolute on every call."""
+    prefix = os.path.join(root, "")
+    return path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, root)
+
+def render_page(job: PageJob) -> PageResult:
+    """Generates a single page. Runs in the calling process or in a pool worker, so it must stay a module-level function. When `job.profile` is set the page's stage events are recorded by a fresh profiler and shipped back with the result, when `job.minify` is set the page's size and the bytes minifying saved, and when `job.search` is set its title and term counts (tokenized here, so a pool spreads that work too)."""
+    # the rendering stack is only imported once a page actually needs rendering, so no-change builds start faster
+    from markdown_generate import generate_page
+    from minify import MinifyStats
+    from search_index import PageText, term_counts
+
+    start = time.perf_counter()
+    cache = _block_cache
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+    profiler = Profiler() if job.profile else None
+    minified = MinifyStats() if job.minify else None
+    text = PageText() if job.search else None
+    terms = None
+    with activate(profiler):
+        changed = generate_page(
+            job.source, job.template_path, job.output, job.base_path, cache=cache, resolve_url=_resolver, minify=minified,
+            text=text,
+        )
+        if text is not None:
+            with stage("tokenize"):
+                terms = term_counts(" ".join(text.parts))
+    seconds = time.perf_counter() - start
+    events = profiler.events if profiler is not None else None
+    size = os.path.getsize(job.output) if minified is not None else 0
+    saved = minified.saved if minified is not None else 0
+    title = text.title if text is not None else None
+    if cache is None:
+        return PageResult(
+            job.source, job.output, os.getpid(), seconds, events, changed=changed, size=size, saved=saved, title=title, terms=terms,
+        )
+    return PageResult(
+        job.source, job.output, os.getpid(), seconds, events,
+        cache.take_added(), cache.hits - hits, cache.misses - misses, changed, size, saved, title, terms,
+    )
+
+def init_worker(cache_path: str, namespace: str, max_bytes: int, resolver=None):
+    """Pool initializer: loads the on-disk block cache once per worker process and installs the build's URL resolver (None for the default one of each page's base path)."""
+    global _block_cache, _resolver
+    _block_cache = BlockCache.load(cache_path, namespace, max_bytes) if cache_path else None
+    _resolver = resolver
+
+def init_kept_worker(cache_path: str, namespace: str, max_bytes: int, resolver=None):
+    """Like `init_worker`, for pools kept by `WorkerPools`. Workers outlive the build that started them, so they write to the process's real stdout and stderr rather than to whatever they were redirected to during that build."""
+    sys.stdout = sys.__stdout__
+    sys.stderr = sys.__stderr__
+    init_worker(cache_path, namespace, max_bytes, resolver)
+
+class WorkerPools:
+    """Process pools that outlive a single build, keyed by worker count and block cache settings, so a long-running process (see `build_daemon`) does not start fresh workers - and reload the block cache in each - for every build."""
+    def __init__(self):
+        self.pools = {}
+
+    def get(self, workers: int, initargs: tuple) -> "ProcessPoolExecutor":
+        # resolvers with the same key map every URL the same way, so their workers can be shared
+        *cache_args, resolver = initargs
+        key = (workers, tuple(cache_args), getattr(resolver, "key", None))
+        pool = self.pools.get(key)
+        if pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = self.pools[key] = ProcessPoolExecutor(max_workers=workers, initializer=init_kept_worker, initargs=initargs)
+        return pool
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown()
+        self.pools.clear()
+
+def keep_worker_pools() -> WorkerPools:
+    """Makes every later `render_pages` call in this process reuse its process pools instead of starting and stopping one per build."""
+    global _worker_pools
+    if _worker_pools is None:
+        _worker_pools = WorkerPools()
+    return _worker_pools
+
+def release_worker_pools():
+    """Shuts down the pools kept since `keep_worker_pools`; later builds start a pool per build again."""
+    global _worker_pools
+    if _worker_pools is not None:
+        _worker_pools.shutdown()
+        _worker_pools = None
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def load_block_cache(path: str, namespace: str, max_bytes: int) -> BlockCache:
+    """Loads the block cache at `path`. A cache that an earlier build in this process loaded or saved is reused as-is (with its counters reset), as long as the file was not changed by anyone else since."""
+    loaded = _loaded_block_caches.get(path)
+    if loaded is not None:
+        cache, mtime_ns = loaded
+        if cache.namespace == namespace and cache.max_bytes == max_bytes and mtime_ns == _mtime_ns(path):
+            cache.hits = cache.misses = cache.evictions = 0
+            return cache
+    cache = BlockCache.load(path, namespace, max_bytes)
+    _loaded_block_caches[path] = (cache, _mtime_ns(path))
+    return cache
+
+def save_block_cache(cache: BlockCache, path: str):
+    cache.save(path)
+    _loaded_block_caches[path] = (cache, _mtime_ns(path))
+
+def render_pages(
+        jobs: list[PageJob], workers: int = 1, cache: BlockCache = None, cache_path: str = None, resolver=None,
+) -> list[PageResult]:
+    """Renders every job, serially when `workers` is 1 and across a process pool otherwise. Results come back in job order either way.
+
+    Serial renders share `cache` directly. Pool workers each load their own copy from `cache_path` and return the blocks they render with each result, for the caller to merge. A `resolver` replaces the default `UrlResolver` of each job's base path. After `keep_worker_pools`, pools (and the caches loaded by their workers) are reused across calls."""
+    global _block_cache, _resolver
+    if workers <= 1 or len(jobs) <= 1:
+        _block_cache, _resolver = cache, resolver
+        try:
+            return [render_page(job) for job in jobs]
+        finally:
+            _block_cache = _resolver = None
+    initargs = (cache_path, cache.namespace, cache.max_bytes) if cache is not None else (None, None, None)
+    initargs += (resolver,)
+    if _worker_pools is not None:
+        pool = _worker_pools.get(workers, initargs)
+        return list(pool.map(render_page, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    from concurrent.futures import ProcessPoolExecutor
+    workers = min(workers, len(jobs))
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as pool:
+        return list(pool.map(render_page, jobs, chunksize=chunksize))
+
+def worker_report(results: list[PageResult], elapsed: float) -> list[str]:
+    """Summarizes pages and throughput for each worker process."""
+    per_worker = {}
+    for result in results:
+        pages, busy = per_worker.get(result.worker, (0, 0.0))
+        per_worker[result.worker] = (pages + 1, busy + result.seconds)
+
+    lines = []
+    for worker, (pages, busy) in sorted(per_worker.items()):
+        rate = pages / busy if busy else 0.0
+        lines.append(f"  worker {worker}: {pages} pages in {busy:.3f}s ({rate:.1f} pages/s)")
+    if results and elapsed:
+        lines.append(f"  total: {len(results)} pages in {elapsed:.3f}s ({len(results) / elapsed:.1f} pages/s)")
+    return lines
+
+def minify_report(results: list[PageResult]) -> list[str]:
+    """Summarizes the bytes minifying saved, overall and for each rendered page."""
+    def line(label: str, size: int, saved: int) -> str:
+        before = size + saved
+        percent = 100 * saved / before if before else 0.0
+        return f"{label}: {before} -> {size} bytes, {saved} saved ({percent:.1f}%)"
+
+    lines = [line("Minify", sum(result.size for result in results), sum(result.saved for result in results))]
+    for result in results:
+        lines.append(line(f"  {result.output}", result.size, result.saved))
+    return lines
+
+def build_site(
+        base_path: str, force: bool = False, jobs: int = 1, checksum: bool = False, profiler: Profiler = None,
+        block_cache: bool = True, block_cache_bytes: int = DEFAULT_MAX_BYTES,
+        shard: tuple[int, int] = None, shard_costs: str = None, fingerprint: bool = False, gzip_level: int = None,
+        minify: bool = False, search: bool = False,
+) -> list[PageResult]:
+    """Syncs static assets, regenerates every page whose inputs changed since the last build and removes outputs that no longer have a source. With a `profiler`, build-wide stages and every page's stages (from whichever process rendered it) are recorded into it. Unless `block_cache` is off, rendered blocks are cached on disk (up to `block_cache_bytes`) and reused across builds.
+
+    With `shard` (a 0-based `(index, count)` pair, see `sharding.parse_shard`) only that shard's pages are built, into `shards/<index + 1>/` with a shard manifest next to them and without static assets; `merge_shards` combines the shards into `docs/`. `shard_costs` names a shard or merged manifest whose recorded page timings are used to balance the shards.
+
+    With `fingerprint`, static assets are also copied under content-hashed names (see `assets.AssetMap`) and every `href`/`src` pointing at one - in the template and in rendered pages - is rewritten to match by a `FingerprintResolver`. Changing any asset changes the resolver's key, so every page is rebuilt.
+
+    With a `gzip_level`, every text output (pages and static copies) gets a `.gz` sibling compressed at that level, redone only for outputs that changed (see `precompress.compress_outputs`). Shard builds leave this to `merge_shards`.
+
+    With `minify`, every page is written through a `minify.HtmlMinifier`, and the bytes saved are reported per page and overall.
+
+    With `search`, rendered pages also hand over their plain text, and a full-text index of the site is written to `search/` in the output (see `search_index`). Its state is kept in `.search_index.json`, so only pages that are rendered anyway are tokenized, plus any the index does not know yet. Shard builds do not index."""
+    with activate(profiler):
+        return _build_site(
+            base_path, force, jobs, checksum, profiler, block_cache, block_cache_bytes, shard, shard_costs, fingerprint, gzip_level,
+            minify, search and shard is None,
+        )
+
+def _build_site(
+        base_path: str, force: bool, jobs: int, checksum: bool, profiler: Profiler,
+        block_cache: bool, block_cache_bytes: int, shard: tuple[int, int], shard_costs: str, fingerprint: bool,
+        gzip_level: int, minify: bool, search: bool,
+) -> list[PageResult]:
+    public_path, manifest_path, cache_path, asset_map_path = PUBLIC_PATH, MANIFEST_PATH, BLOCK_CACHE_PATH, ASSET_MAP_PATH
+    if shard is not None:
+        public_path = shard_output_path(shard)
+        manifest_path = shard_path(MANIFEST_PATH, shard)
+        cache_path = shard_path(BLOCK_CACHE_PATH, shard)
+        asset_map_path = shard_path(ASSET_MAP_PATH, shard)
+
+    assets = None
+    if fingerprint:
+        with stage("asset_map"):
+            asset_map = AssetMap.load(asset_map_path)
+            assets = asset_map.update(STATIC_PATH)
+            asset_map.save()
+            resolver = FingerprintResolver(base_path, assets, asset_map.digest())
+    else:
+        resolver = resolver_for_base_path(base_path)
+
+    if shard is not None:
+        # static assets are copied once, by the merge
+        synced = SyncResult()
+    else:
+        with stage("static_sync"):
+            synced = sync_source_dir_to_destination_dir(STATIC_PATH, public_path, checksum, rename=assets)
+
+    # like the resolver key, minifying changes every page's output, so it is part of what a page was built with
+    render_key = f"{resolver.key}|minify" if minify else resolver.key
+
+    with stage("manifest_check"):
+        manifest = BuildManifest(manifest_path) if force else BuildManifest.load(manifest_path)
+        template_hash = load_template(TEMPLATE_PATH, resolver).digest
+        generator = generator_version()
+        pages = collect_pages(CONTENT_PATH, public_path)
+        total = len(pages)
+        if shard is not None:
+            pages = select_shard(pages, CONTENT_PATH, shard, load_costs(shard_costs) if shard_costs else None)
+        index = None
+        if search:
+            index = SearchIndex.load(SEARCH_STATE_PATH, generator)
+            index.prune({output for _, output in pages})
+
+        pending = []
+        entries = {}
+        for source, output in pages:
+            # the render key stands in for the base path: it also covers the asset names when fingerprinting
+            entry = manifest.make_entry(output, source, template_hash, render_key, generator)
+            if manifest.is_fresh(output, entry) and (index is None or index.is_current(output, entry["source_hash"])):
+                continue
+            pending.append(PageJob(source, output, TEMPLATE_PATH, base_path, profiler is not None, minify, search))
+            entries[output] = entry
+
+    # only pay for loading the cache when something actually needs rendering
+    cache = None
+    if block_cache and pending:
+        with stage("block_cache_load"):
+            # cached blocks hold resolved URLs, so they are only valid for this resolver
+            cache = load_block_cache(cache_path, f"{generator}:{resolver.key}", block_cache_bytes)
+
+    start = time.perf_counter()
+    with stage("render_pages"):
+        results = render_pages(pending, jobs, cache, cache_path, resolver if fingerprint else None)
+    elapsed = time.perf_counter() - start
+
+    hits = misses = 0
+    for result in results:
+        if profiler is not None and result.events:
+            profiler.merge(result.events)
+        if cache is not None and result.cache_entries:
+            cache.merge(result.cache_entries)
+        hits += result.cache_hits
+        misses += result.cache_misses
+        manifest.record(result.output, entries[result.output])
+        if index is not None:
+            index.update(result.output, entries[result.output]["source_hash"], result.title, result.terms)
+
+    keep = synced.files | {_relative_path(output, public_path) for _, output in pages}
+    indexed = None
+    if index is not None:
+        with stage("search_index"):
+            indexed = index.write(public_path, resolver)
+            index.save()
+        keep |= indexed.files
+    compressed = None
+    if gzip_level is not None and shard is None:
+        with stage("precompress"):
+            compressed = compress_outputs(public_path, keep, gzip_level, max(jobs, os.cpu_count() or 1))
+        keep |= compressed.files
+
+    with stage("finalize"):
+        manifest.prune({output for _, output in pages})
+        manifest.save()
+        if shard is not None:
+            write_site_shard_manifest(public_path, shard, pages, results, render_key, template_hash, generator, assets)
+            keep.add(SHARD_MANIFEST_NAME)
+        removed = remove_orphans(public_path, keep)
+        if cache is not None:
+            save_block_cache(cache, cache_path)
+
+    if shard is not None:
+        print(f"Shard {format_shard(shard)}: {len(pages)} of {total} pages into {public_path}, {len(removed)} removed")
+    else:
+        print(f"Static: {len(synced.copied)} copied, {synced.unchanged} unchanged, {len(removed)} removed")
+    modified = sum(result.changed for result in results)
+    print(f"Built {len(results)} of {len(pages)} pages, {modified} outputs modified")
+    if minify and results:
+        for line in minify_report(results):
+            print(line)
+    if indexed is not None:
+        print(f"Search: {len(index.pages)} pages in {indexed.shards} shards, {len(indexed.written)} shards written")
+    if compressed is not None:
+        print(f"Gzip: {len(compressed.compressed)} compressed ({compressed.bytes_in} -> {compressed.bytes_out} bytes), {compressed.unchanged} unchanged")
+    if cache is not None:
+        blocks, size = cache.totals()
+        print(f"Block cache: {hits} hits, {misses} misses, {cache.evictions} evictions, {blocks} blocks ({size} bytes)")
+    if jobs > 1:
+        for line in worker_report(results, elapsed):
+            print(line)
+    return results
+
+def write_site_shard_manifest(
+        public_path: str, shard: tuple[int, int], pages: list[tuple[str, str]], results: list[PageResult],
+        base_path: str, template_hash: str, generator: str, assets: dict[str, str] = None,
+):
+    """Records every page of `shard` with its output hash and latest render time, for `merge_shards` to verify and for later builds to balance shards by. `assets` are the fingerprinted names the pages link to, if any, for the merge to copy the static files under."""
+    path = os.path.join(public_path, SHARD_MANIFEST_NAME)
+    try:
+        previous = load_shard_manifest(path)["pages"]
+    except ShardError:
+        previous = {}
+    seconds = {result.output: result.seconds for result in results}
+    os.makedirs(public_path, exist_ok=True)
+    entries = shard_pages(pages, CONTENT_PATH, public_path, seconds, previous)
+    write_shard_manifest(path, shard, entries, base_path, template_hash, generator, assets)
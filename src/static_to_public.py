@@ -1,6 +1,8 @@
 import os
 import shutil
 
+from build_manifest import hash_file
+
 def copy_source_dir_to_destination_dir(source: str, destination: str):
     if os.path.exists(destination):
         shutil.rmtree(destination)
@@ -10,4 +12,79 @@ def copy_source_dir_to_destination_dir(source: str, destination: str):
         if os.path.isfile(file_path):
             shutil.copy(file_path, os.path.join(destination, file))
         else:
-            copy_source_dir_to_destination_dir(file_path, os.path.join(destination, file))
\ No newline at end of file
+            copy_source_dir_to_destination_dir(file_path, os.path.join(destination, file))
+
+class SyncResult:
+    """What a sync did: `files` holds every synced path (relative to the destination), `copied` the ones that were actually written."""
+    def __init__(self):
+        self.files = set()
+        self.copied = []
+        self.unchanged = 0
+
+def is_unchanged(source_path: str, destination_path: str, checksum: bool = False) -> bool:
+    """Compares size and mtime (copies keep the source's mtime). With `checksum`, files whose size matches but mtime differs are compared by content hash as well."""
+    try:
+        destination_stat = os.stat(destination_path)
+    except FileNotFoundError:
+        return False
+    source_stat = os.stat(source_path)
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if source_stat.st_mtime_ns == destination_stat.st_mtime_ns:
+        return True
+    if checksum and hash_file(source_path) == hash_file(destination_path):
+        os.utime(destination_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        return True
+    return False
+
+def sync_source_dir_to_destination_dir(
+        source: str, destination: str, checksum: bool = False, result: SyncResult = None, relative: str = "",
+        rename: dict[str, str] = None,
+) -> SyncResult:
+    """Copies only new or changed files from `source` into `destination`, leaving everything else in `destination` untouched. Unlike `copy_source_dir_to_destination_dir` nothing is deleted here - see `remove_orphans`.
+
+    `rename` maps a file's path relative to `source` to the path it is also copied to (in the same directory), e.g. its fingerprinted name from `assets.AssetMap`. The original name is kept as well, for references nothing rewrites, like `url(...)` in a stylesheet or a link in raw HTML."""
+    if result is None:
+        result = SyncResult()
+    if os.path.isfile(destination):
+        os.remove(destination)
+    os.makedirs(destination, exist_ok=True)
+    for file in os.listdir(source):
+        file_path = os.path.join(source, file)
+        relative_path = os.path.join(relative, file)
+        if os.path.isfile(file_path):
+            _sync_file(file_path, destination, file, relative_path, checksum, result)
+            target = rename.get(relative_path) if rename else None
+            if target is not None:
+                _sync_file(file_path, destination, os.path.basename(target), target, checksum, result)
+        else:
+            sync_source_dir_to_destination_dir(file_path, os.path.join(destination, file), checksum, result, relative_path, rename)
+    return result
+
+def _sync_file(file_path: str, destination: str, name: str, relative_path: str, checksum: bool, result: SyncResult):
+    destination_path = os.path.join(destination, name)
+    result.files.add(relative_path)
+    if os.path.isdir(destination_path):
+        shutil.rmtree(destination_path)
+    if is_unchanged(file_path, destination_path, checksum):
+        result.unchanged += 1
+    else:
+        tmp_path = os.path.join(destination, f".{name}.tmp")
+        shutil.copy2(file_path, tmp_path)
+        os.replace(tmp_path, destination_path)
+        result.copied.append(relative_path)
+
+def remove_orphans(destination: str, keep: set[str]) -> list[str]:
+    """Deletes every file under `destination` whose path (relative to `destination`) is not in `keep`, then any directories left empty. Returns the removed paths."""
+    removed = []
+    for dirpath, dirnames, filenames in os.walk(destination, topdown=False):
+        # `relpath` is slow, so it is worked out once per directory rather than per file
+        relative_dir = os.path.relpath(dirpath, destination)
+        for filename in filenames:
+            relative_path = filename if relative_dir == os.curdir else os.path.join(relative_dir, filename)
+            if relative_path not in keep:
+                os.remove(os.path.join(dirpath, filename))
+                removed.append(relative_path)
+        if dirpath != destination and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return removed
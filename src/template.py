@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+
+from exceptions import TemplateError
+
+TAG_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}|\{%\s*include\s+"([^"]+)"\s*%\}')
+
+class Template:
+    """A template compiled into a flat list of parts, where literal chunks are stored as-is and slots are filled in at render time. For example:
+    ```
+    <title>{{ Title }}</title>{% include "footer.html" %}
+    ```
+    compiles (with the partial inlined) to:
+    ```
+    ["<title>", None, "</title><footer>...</footer>"]
+    ```
+    with the slot `(1, "Title")`. Rendering (`stream`) writes the literal parts and the variables in order, without ever joining the page into one string.
+    """
+    def __init__(self, parts: list, slots: list[tuple[int, str]], digest: str, dependencies: dict[str, int]):
+        self.parts = parts
+        self.slots = slots
+        self.digest = digest
+        self.dependencies = dependencies
+
+    def stream(self, write, variables: dict):
+        """Passes each literal part and variable to `write` in order; an undefined variable raises `TemplateError`. A variable may also be a callable, which is invoked with `write` so large content (e.g. a rendered page body) can be streamed into the output in place."""
+        names = iter([name for _, name in self.slots])
+        for part in self.parts:
+            if part is not None:
+                write(part)
+                continue
+            name = next(names)
+            try:
+                value = variables[name]
+            except KeyError:
+                raise TemplateError(f"undefined template variable: {name}") from None
+            if callable(value):
+                value(write)
+            else:
+                write(value)
+
+    def is_stale(self) -> bool:
+        """Returns True when the template or any partial it includes changed on disk since it was compiled."""
+        for path, mtime_ns in self.dependencies.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)')
+
+def _resolve_urls(text: str, resolve_url) -> str:
+    return URL_ATTRIBUTE_PATTERN.sub(lambda m: f'{m[1]}="{resolve_url(m[2])}', text)
+
+def _parse(path: str, resolve_url, parts: list, slots: list, dependencies: dict, digest, including: tuple):
+    path = os.path.abspath(path)
+    if path in including:
+        raise TemplateError(f"recursive include: {path}")
+    try:
+        with open(path) as f:
+            source = f.read()
+        dependencies[path] = os.stat(path).st_mtime_ns
+    except OSError as e:
+        raise TemplateError(f"cannot read template {path}: {e}") from e
+    digest.update(source.encode())
+
+    def add_literal(text: str):
+        if not text:
+            return
+        if resolve_url is not None:
+            text = _resolve_urls(text, resolve_url)
+        if parts and parts[-1] is not None:
+            parts[-1] += text
+        else:
+            parts.append(text)
+
+    position = 0
+    for match in TAG_PATTERN.finditer(source):
+        add_literal(source[position:match.start()])
+        name, include = match.groups()
+        if name is not None:
+            slots.append((len(parts), name))
+            parts.append(None)
+        else:
+            include_path = os.path.join(os.path.dirname(path), include)
+            _parse(include_path, resolve_url, parts, slots, dependencies, digest, including + (path,))
+        position = match.end()
+    add_literal(source[position:])
+
+def compile_template(path: str, resolve_url=None) -> Template:
+    """Parses the template at `path` (inlining any `{% include "file" %}` partials, resolved relative to the including file) into a `Template`. When a `resolve_url` callable (e.g. a `UrlResolver`) is given, the `href`/`src` attributes in the template's own markup are passed through it once here instead of on every page."""
+    parts = []
+    slots = []
+    dependencies = {}
+    digest = hashlib.sha256()
+    _parse(path, resolve_url, parts, slots, dependencies, digest, ())
+    return Template(parts, slots, digest.hexdigest(), dependencies)
+
+_cache = {}
+
+def load_template(path: str, resolve_url=None) -> Template:
+    """Returns the compiled template for `path`, compiling it at most once per process unless the file (or one of its partials) changes. Templates are cached per resolver `key`."""
+    key = (os.path.abspath(path), getattr(resolve_url, "key", resolve_url))
+    template = _cache.get(key)
+    if template is None or template.is_stale():
+        template = compile_template(path, resolve_url)
+        _cache[key] = template
+    return template
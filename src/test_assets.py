@@ -0,0 +1,95 @@
+import contextlib
+import io
+import os
+import unittest
+
+from assets import ASSET_MAP_PATH, AssetMap, fingerprinted_name
+from site_build import build_site
+from test_support import TEMPLATE, TempDirTestCase
+
+class TestAssetMap(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = self.path("static")
+        self.map_path = self.path("assets.json")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png")
+        self.write("static/robots.txt", "User-agent: *")
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("images/tom.png", "1f2e3d4c5b6a7788"), "images/tom.1f2e3d4c5b6a.png")
+
+    def test_only_fingerprintable_assets_are_renamed(self):
+        names = AssetMap(self.map_path).update(self.static)
+        self.assertEqual(set(names), {"index.css", os.path.join("images", "a.png")})
+        self.assertRegex(names["index.css"], r"^index\.[0-9a-f]{12}\.css$")
+
+    def test_unchanged_assets_are_not_rehashed(self):
+        asset_map = AssetMap(self.map_path)
+        asset_map.update(self.static)
+        asset_map.save()
+        loaded = AssetMap.load(self.map_path)
+        loaded.entries["index.css"]["hash"] = "0" * 64
+        self.assertEqual(loaded.update(self.static)["index.css"], "index.000000000000.css")
+
+    def test_digest_follows_content(self):
+        asset_map = AssetMap(self.map_path)
+        asset_map.update(self.static)
+        before = asset_map.digest()
+        self.write("static/index.css", "body { color: red }")
+        asset_map.update(self.static)
+        self.assertNotEqual(asset_map.digest(), before)
+
+class TestFingerprintedBuild(TempDirTestCase):
+    chdir = True
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("static/favicon.ico", "ico")
+        self.write("content/index.md", "# Home\n\n![Tom](/images/tom.png)\n")
+        self.write("static/images/tom.png", "png")
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return build_site("/site/", fingerprint=True)
+
+    def names(self):
+        return AssetMap.load(ASSET_MAP_PATH).update("static")
+
+    def read_page(self):
+        with open("docs/index.html") as f:
+            return f.read()
+
+    def test_links_point_at_fingerprinted_assets(self):
+        self.build()
+        names = self.names()
+        page = self.read_page()
+        self.assertIn(f'href="/site/{names["index.css"]}"', page)
+        self.assertIn(f'src="/site/{names[os.path.join("images", "tom.png")]}"', page)
+        self.assertTrue(os.path.exists(os.path.join("docs", names["index.css"])))
+        # the original names stay, for `url(...)` in stylesheets and links in raw HTML
+        self.assertTrue(os.path.exists(os.path.join("docs", "index.css")))
+        self.assertTrue(os.path.exists(os.path.join("docs", "favicon.ico")))
+
+    def test_changed_asset_is_renamed_and_pages_rebuilt(self):
+        self.build()
+        old = self.names()["index.css"]
+        self.write("static/index.css", "body { color: red }")
+        results = self.build()
+        new = self.names()["index.css"]
+        self.assertNotEqual(old, new)
+        self.assertEqual([result.output for result in results], [os.path.join("./docs", "index.html")])
+        self.assertIn(f'href="/site/{new}"', self.read_page())
+        self.assertFalse(os.path.exists(os.path.join("docs", old)))
+
+    def test_unchanged_assets_skip_pages(self):
+        self.build()
+        mtime_ns = os.stat(ASSET_MAP_PATH).st_mtime_ns
+        self.assertEqual(self.build(), [])
+        self.assertEqual(os.stat(ASSET_MAP_PATH).st_mtime_ns, mtime_ns)
+
+
+if __name__ == "__main__":
+    unittest.main()
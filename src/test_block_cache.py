@@ -0,0 +1,152 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import TEXT, BlockCache
+from markdown_to_html_node import markdown_to_html_node
+
+MARKDOWN = """# Title
+
+A **bold** paragraph with a [link](/x).
+
+- one
+- two
+
+```
+code
+```
+"""
+
+class TestBlockCache(unittest.TestCase):
+    def test_miss_then_hit(self):
+        cache = BlockCache()
+        self.assertIsNone(cache.get("block"))
+        cache.put("block", "<p>block</p>")
+        self.assertEqual(cache.get("block"), "<p>block</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "aaaa")
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.size, 8)
+
+    def test_size_is_in_encoded_bytes(self):
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "ééé")
+        self.assertEqual(cache.size, 6)
+        # 5 characters would fit, 11 bytes do not
+        cache.put("b", "xxxxx")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.size, 5)
+
+    def test_text_lookups_are_not_counted(self):
+        cache = BlockCache()
+        cache.put("block", "<p>block</p>")
+        cache.get("block")
+        cache.get("block", TEXT)
+        cache.put("block", "block", TEXT)
+        cache.get("block", TEXT)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.misses, 4)
+        self.assertEqual(markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.hits, 4)
+
+    def test_cached_plain_text_matches_uncached(self):
+        expected = []
+        markdown_to_html_node(MARKDOWN, plain_text=expected)
+        self.assertEqual(" ".join(expected), "Title A bold paragraph with a link. one two code\n")
+        cache = BlockCache()
+        # blocks cached without their text are rendered again once text is wanted
+        markdown_to_html_node(MARKDOWN, cache)
+        for _ in range(2):
+            plain_text = []
+            markdown_to_html_node(MARKDOWN, cache, plain_text=plain_text)
+            self.assertEqual(" ".join(plain_text), " ".join(expected))
+        self.assertEqual(cache.get("# Title", TEXT), "Title")
+
+class TestSavedBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_and_load(self):
+        cache = BlockCache.load(self.path, "v1")
+        cache.put("a", "x")
+        cache.save(self.path)
+        self.assertEqual(BlockCache.load(self.path, "v1").get("a"), "x")
+        self.assertEqual(BlockCache.load(self.path, "v1").totals(), (1, 1))
+        self.assertIsNone(BlockCache.load(self.path, "v2").get("a"))
+
+    def test_other_namespace_or_corrupt_file_is_replaced(self):
+        with open(self.path, "w") as f:
+            f.write("not a database")
+        cache = BlockCache.load(self.path, "v1")
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "x")
+        cache.save(self.path)
+        cache = BlockCache.load(self.path, "v2")
+        cache.put("b", "y")
+        cache.save(self.path)
+        self.assertIsNone(BlockCache.load(self.path, "v2").get("a"))
+        self.assertEqual(BlockCache.load(self.path, "v2").totals(), (1, 1))
+
+    def test_save_evicts_least_recently_used(self):
+        cache = BlockCache.load(self.path, max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.save(self.path)
+        # a new build uses `a`, so `b` is the oldest once `c` no longer fits
+        cache = BlockCache.load(self.path, max_bytes=10)
+        self.assertEqual(cache.get("a"), "aaaa")
+        cache.put("c", "cccc")
+        cache.save(self.path)
+        self.assertEqual((cache.evictions, cache.totals()), (1, (2, 8)))
+        cache = BlockCache.load(self.path, max_bytes=10)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual([cache.get("a"), cache.get("c")], ["aaaa", "cccc"])
+
+    def test_nothing_to_save_leaves_the_file_alone(self):
+        cache = BlockCache.load(self.path)
+        cache.put("a", "x")
+        cache.save(self.path)
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        cache = BlockCache.load(self.path)
+        cache.get("b")
+        cache.save(self.path)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime_ns)
+
+    def test_worker_entries_are_merged_and_saved(self):
+        cache = BlockCache.load(self.path, max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.save(self.path)
+        worker = BlockCache.load(self.path, max_bytes=10)
+        worker.get("a")
+        worker.put("c", "cc")
+        added = worker.take_added()
+        self.assertEqual(added, [(worker.key("c"), "cc"), (worker.key("a"), None)])
+        self.assertEqual(worker.take_added(), [])
+        cache.merge(added)
+        cache.put("d", "dd")
+        cache.save(self.path)
+        # `b` is the only entry no build used since it was added
+        cache = BlockCache.load(self.path, max_bytes=10)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual([cache.get("a"), cache.get("c"), cache.get("d")], ["aaaa", "cc", "dd"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import io
+import os
+import threading
+import unittest
+
+from build_client import request
+from build_daemon import BuildDaemon
+from test_support import TEMPLATE, TempDirTestCase
+
+class TestBuildDaemon(TempDirTestCase):
+    chdir = True
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        for i in range(3):
+            self.write(f"content/post{i}/index.md", f"# Post {i}\n\nA [link](/post{i}).\n")
+        self.daemon = BuildDaemon()
+        self.thread = threading.Thread(target=self.daemon.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.daemon.shutdown()
+        self.thread.join()
+        self.daemon.server_close()
+
+    def build(self, *argv):
+        output = io.StringIO()
+        reply = request({"command": "build", "cwd": self.root, "argv": list(argv)}, output=output)
+        return reply, output.getvalue()
+
+    def test_build_and_incremental_build(self):
+        reply, output = self.build("/site/")
+        self.assertEqual(reply["status"], 0)
+        self.assertIn("Built 3 of 3 pages", output)
+        with open("docs/post1/index.html") as f:
+            self.assertIn('<a href="./site/post1">link</a>', f.read())
+
+        reply, output = self.build("/site/")
+        self.assertEqual(reply["status"], 0)
+        self.assertIn("Built 0 of 3 pages", output)
+        self.assertEqual(request({"command": "ping"})["builds"], 2)
+
+    def test_bad_arguments(self):
+        reply, output = self.build("--jobs", "many")
+        self.assertEqual(reply["status"], 2)
+        self.assertIn("invalid int value", output)
+
+    def test_render(self):
+        reply = request({"command": "render", "cwd": self.root, "source": "content/post0/index.md", "basepath": "/site/"})
+        self.assertEqual(reply["status"], 0)
+        self.assertTrue(reply["html"].startswith('<html><title>Post 0</title><link href="./site/index.css" />'))
+        self.assertFalse(os.path.exists("docs"))
+
+    def test_other_project_is_refused(self):
+        reply = request({"command": "build", "cwd": os.path.dirname(self.root), "argv": []})
+        self.assertEqual(reply["status"], 2)
+
+    def test_second_daemon_is_refused(self):
+        with self.assertRaises(OSError):
+            BuildDaemon()
+
+
+if __name__ == "__main__":
+    unittest.main()
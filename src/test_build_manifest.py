@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from build_manifest import BuildManifest, hash_file
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "index.md")
+        self.output = os.path.join(self.tmp.name, "index.html")
+        self.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        with open(self.source, "w") as f:
+            f.write("# Title\n")
+        with open(self.output, "w") as f:
+            f.write("<h1>Title</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_entry(self, manifest, template_hash="t", base_path="/"):
+        return manifest.make_entry(self.output, self.source, template_hash, base_path, "g")
+
+    def test_new_page_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        self.assertFalse(manifest.is_fresh(self.output, self.make_entry(manifest)))
+
+    def test_recorded_page_is_fresh_after_reload(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.output, self.make_entry(manifest))
+        manifest.save()
+        reloaded = BuildManifest.load(self.manifest_path)
+        self.assertTrue(reloaded.is_fresh(self.output, self.make_entry(reloaded)))
+
+    def test_unchanged_manifest_is_not_rewritten(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.output, self.make_entry(manifest))
+        manifest.save()
+        os.remove(self.manifest_path)
+        manifest.record(self.output, self.make_entry(manifest))
+        manifest.prune({self.output})
+        manifest.save()
+        self.assertFalse(os.path.exists(self.manifest_path))
+
+    def test_source_change_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.output, self.make_entry(manifest))
+        with open(self.source, "w") as f:
+            f.write("# Another title\n")
+        self.assertFalse(manifest.is_fresh(self.output, self.make_entry(manifest)))
+
+    def test_template_and_base_path_change_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.output, self.make_entry(manifest))
+        self.assertFalse(manifest.is_fresh(self.output, self.make_entry(manifest, template_hash="u")))
+        self.assertFalse(manifest.is_fresh(self.output, self.make_entry(manifest, base_path="/blog/")))
+
+    def test_missing_output_is_stale(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.output, self.make_entry(manifest))
+        os.remove(self.output)
+        self.assertFalse(manifest.is_fresh(self.output, self.make_entry(manifest)))
+
+    def test_unchanged_stat_reuses_hash(self):
+        manifest = BuildManifest(self.manifest_path)
+        entry = self.make_entry(manifest)
+        self.assertEqual(entry["source_hash"], hash_file(self.source))
+        entry["source_hash"] = "recorded"
+        manifest.record(self.output, entry)
+        self.assertEqual(self.make_entry(manifest)["source_hash"], "recorded")
+
+    def test_corrupt_manifest_loads_empty(self):
+        with open(self.manifest_path, "w") as f:
+            f.write("{not json")
+        self.assertEqual(BuildManifest.load(self.manifest_path).entries, {})
+
+    def test_prune(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record(self.output, self.make_entry(manifest))
+        manifest.prune(set())
+        self.assertEqual(manifest.entries, {})
+
+if __name__ == "__main__":
+    unittest.main()
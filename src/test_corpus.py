@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.corpus import CorpusConfig, generate_corpus
+from markdown_to_html_node import markdown_to_html_node
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def generate(self, root):
+        config = CorpusConfig(pages=10, blocks_per_page=20, static_files=2, static_size=16, link_density=0.2)
+        paths = generate_corpus(root, config)
+        documents = {}
+        for path in paths:
+            with open(path) as f:
+                documents[os.path.relpath(path, root)] = f.read()
+        return documents
+
+    def test_pages_render(self):
+        with tempfile.TemporaryDirectory() as root:
+            documents = self.generate(root)
+            self.assertEqual(len(documents), 10)
+            self.assertTrue(os.path.exists(os.path.join(root, "template.html")))
+            for document in documents.values():
+                self.assertTrue(markdown_to_html_node(document).to_html().startswith("<div><h1>"))
+
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            self.assertEqual(self.generate(first), self.generate(second))
+
+if __name__ == "__main__":
+    unittest.main()
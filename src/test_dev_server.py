@@ -0,0 +1,149 @@
+import gzip
+import http.client
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from dev_server import DevServer, FileBody, accepts_gzip, etag_matches, load_test, site_paths
+from precompress import compress_file
+from test_support import TempDirTestCase
+from watch import LIVE_RELOAD_SCRIPT, LiveReloadServer
+
+PAGE = "<html><body>" + "<p>Hello, world!</p>" * 50 + "</body></html>"
+
+class ServerTestCase(TempDirTestCase):
+    server_class = DevServer
+
+    def setUp(self):
+        super().setUp()
+        self.write("index.html", PAGE)
+        self.write("blog/tom/index.html", PAGE)
+        self.write("index.1f2e3d4c5b6a.css", "body { color: red }" * 20)
+        self.write("images/a.png", "png")
+        self.server = self.server_class(("127.0.0.1", 0), self.root)
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path, **headers):
+        self.connection.request("GET", path, headers=headers)
+        response = self.connection.getresponse()
+        return response, response.read()
+
+class TestDevServer(ServerTestCase):
+    def test_serves_index_with_validators(self):
+        response, body = self.get("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body.decode(), PAGE)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertEqual(response.getheader("Cache-Control"), "no-cache")
+        self.assertIsNotNone(response.getheader("ETag"))
+
+    def test_if_none_match_gets_304(self):
+        response, _ = self.get("/blog/tom/")
+        response, body = self.get("/blog/tom/", **{"If-None-Match": response.getheader("ETag")})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(body, b"")
+
+    def test_gzip_variant(self):
+        response, body = self.get("/", **{"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body).decode(), PAGE)
+        identity, _ = self.get("/")
+        self.assertNotEqual(response.getheader("ETag"), identity.getheader("ETag"))
+
+    def test_precompressed_file_is_used(self):
+        path = os.path.join(self.root, "index.html")
+        compress_file(path)
+        # a .gz that does not match the page proves the file on disk was sent rather than one compressed in memory
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(b"from disk"))
+        stat = os.stat(path)
+        os.utime(path + ".gz", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        _, body = self.get("/", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(gzip.decompress(body), b"from disk")
+
+    @patch("dev_server.MAX_CACHED_FILE_BYTES", 100)
+    def test_large_file_is_streamed_and_compressed_once(self):
+        for _ in range(2):
+            response, body = self.get("/blog/tom/")
+            self.assertEqual(body.decode(), PAGE)
+            self.assertEqual(response.getheader("Content-Length"), str(len(PAGE)))
+            _, body = self.get("/blog/tom/", **{"Accept-Encoding": "gzip"})
+            self.assertEqual(gzip.decompress(body).decode(), PAGE)
+        self.assertEqual((self.server.cache.hits, self.server.cache.misses), (3, 1))
+        entry = self.server.cache.get(os.path.join(self.root, "blog", "tom", "index.html"))
+        self.assertIsInstance(entry.body, FileBody)
+        # only the gzip variant is held in memory
+        self.assertEqual(self.server.cache.size, len(entry.gzip_body))
+
+    @patch("dev_server.MAX_CACHED_FILE_BYTES", 100)
+    def test_large_file_streams_its_precompressed_sibling(self):
+        path = os.path.join(self.root, "index.html")
+        compress_file(path)
+        _, body = self.get("/", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(gzip.decompress(body).decode(), PAGE)
+        self.assertEqual(self.get("/")[1].decode(), PAGE)
+        self.assertEqual(self.server.cache.size, 0)
+
+    def test_changed_file_is_reloaded(self):
+        response, _ = self.get("/")
+        path = self.write("index.html", "<p>new</p>")
+        os.utime(path, ns=(0, 1))
+        response, body = self.get("/", **{"If-None-Match": response.getheader("ETag")})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"<p>new</p>")
+
+    def test_directory_without_slash_redirects(self):
+        response, _ = self.get("/blog/tom?x=1")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/blog/tom/?x=1")
+
+    def test_fingerprinted_assets_are_immutable(self):
+        response, _ = self.get("/index.1f2e3d4c5b6a.css")
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+
+    def test_missing_and_outside_paths(self):
+        self.assertEqual(self.get("/nope.html")[0].status, 404)
+        self.assertEqual(self.get("/../etc/passwd")[0].status, 404)
+        self.assertEqual(self.get("/%2e%2e/etc/passwd")[0].status, 404)
+
+    def test_load_test(self):
+        paths = site_paths(self.root)
+        self.assertEqual(paths, ["/", "/blog/tom/", "/images/a.png", "/index.1f2e3d4c5b6a.css"])
+        result = load_test(f"http://127.0.0.1:{self.server.server_address[1]}/", paths, connections=4, requests=200, revalidate=True)
+        self.assertEqual(result.requests, 200)
+        self.assertEqual(result.errors, 0)
+        self.assertGreater(result.statuses[304], 0)
+
+class TestHeaders(unittest.TestCase):
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("br;q=1.0, gzip;q=0.8"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("br"))
+        self.assertFalse(accepts_gzip(""))
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a", "b"', '"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+
+class TestLiveReloadServer(ServerTestCase):
+    server_class = LiveReloadServer
+
+    def test_pages_get_the_reload_script(self):
+        _, body = self.get("/", **{"Accept-Encoding": "gzip"})
+        self.assertIn(LIVE_RELOAD_SCRIPT, gzip.decompress(body).decode())
+
+
+if __name__ == "__main__":
+    unittest.main()
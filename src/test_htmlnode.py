@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawNode, escape_attribute, escape_text, write_html
 from textnode import TextNode
 
 class TestHTMLNode(unittest.TestCase):
@@ -28,6 +29,11 @@ class TestHTMLNode(unittest.TestCase):
             ' href="https://www.google.com" target="_blank"', node.props_to_html()
         )
 
+    def test_non_string_props(self):
+        node = LeafNode("img", "", {"width": 100, "alt": None})
+        self.assertEqual(node.to_html(), '<img width="100" alt="None"></img>')
+        self.assertEqual(HTMLNode("td", "x", None, {"colspan": 2}).props_to_html(), ' colspan="2"')
+
     def test_values(self):
         node = HTMLNode(
             "div",
@@ -67,6 +73,26 @@ class TestLeafNode(unittest.TestCase):
         node = LeafNode("a", None)
         self.assertRaises(ValueError, node.to_html)
 
+    def test_escapes_value(self):
+        self.assertEqual(LeafNode("code", "a < b && c > d").to_html(), "<code>a &lt; b &amp;&amp; c &gt; d</code>")
+        self.assertEqual(LeafNode(None, "<script>").to_html(), "&lt;script&gt;")
+
+    def test_escapes_attributes(self):
+        node = LeafNode("a", "x", {"href": '/search?q="a"&b=<c>'})
+        self.assertEqual(node.to_html(), '<a href="/search?q=&quot;a&quot;&amp;b=&lt;c&gt;">x</a>')
+
+    def test_raw_node_is_not_escaped(self):
+        self.assertEqual(RawNode("<p>a &amp; b</p>").to_html(), "<p>a &amp; b</p>")
+
+class TestEscape(unittest.TestCase):
+    def test_nothing_to_escape_returns_same_string(self):
+        text = "plain text with 'quotes' and \"double quotes\""
+        self.assertIs(escape_text(text), text)
+
+    def test_ampersand_first(self):
+        self.assertEqual(escape_text("&lt;"), "&amp;lt;")
+        self.assertEqual(escape_attribute('"&"'), "&quot;&amp;&quot;")
+
 class TestParentNode(unittest.TestCase):
     def test_to_html_with_children(self):
         child_node = LeafNode("span", "child")
@@ -166,5 +192,29 @@ class TestParentNode(unittest.TestCase):
         )
         self.assertEqual(parent_div.to_html(), expected_html)
 
+    def test_write_html_chunks(self):
+        node = ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")], {"class": "x"})
+        chunks = []
+        write_html(node, chunks.append)
+        self.assertEqual(chunks, ['<p class="x">', "<b>Bold</b>", " text", "</p>"])
+
+    def test_deeply_nested_parents(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "deep"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_write_html_to_file(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, str(i))]) for i in range(3)])
+        buffer = io.StringIO()
+        write_html(node, buffer.write)
+        self.assertEqual(buffer.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+
+    def test_nodes_are_slotted(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from benchmarks.startup import RENDER_MODULES, check, import_times
+from build_manifest import generator_version
+from make_runner import SRC_DIR, make_runner
+from test_support import TEMPLATE, TempDirTestCase
+
+class TestRunner(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        for i in range(3):
+            self.write(f"content/post{i}/index.md", f"# Post {i}\n\nA [link](/post{i}) & more.\n")
+        self.runner = os.path.join(self.root, "ssg.pyz")
+        self.version = make_runner(self.runner)
+
+    def run_build(self, *command):
+        return subprocess.run(
+            [sys.executable, *command, "/site/"], cwd=self.root, capture_output=True, text=True, check=True,
+        )
+
+    def read(self, name):
+        with open(os.path.join(self.root, name)) as f:
+            return f.read()
+
+    def test_runner_builds_like_main(self):
+        self.assertEqual(self.version, generator_version())
+        self.run_build(os.path.join(SRC_DIR, "main.py"))
+        expected = self.read("docs/post1/index.html")
+        # same generator version, so the runner sees every page as up to date
+        self.assertIn("Built 0 of 3 pages", self.run_build(self.runner).stdout)
+        self.assertIn("Built 3 of 3 pages", self.run_build(self.runner, "--force").stdout)
+        self.assertEqual(self.read("docs/post1/index.html"), expected)
+
+    def test_no_change_build_skips_rendering_stack(self):
+        self.run_build(self.runner)
+        for command in (self.runner, os.path.join(SRC_DIR, "main.py")):
+            imports = import_times(self.run_build("-X", "importtime", command).stderr)
+            self.assertIn("site_build", imports)
+            self.assertEqual(RENDER_MODULES & imports.keys(), set())
+
+    def test_startup_check(self):
+        result = {"entry": "ssg.pyz", "median_ms": 80.0, "import_ms": 40.0, "render_modules": []}
+        interpreter = {**result, "entry": "interpreter", "median_ms": 500.0}
+        self.assertEqual(check([interpreter, result], None, 0.25, max_ms=100), [])
+        self.assertEqual(check([result], None, 0.25, max_ms=50), ["ssg.pyz: median_ms 80.0 exceeds 50"])
+        self.assertEqual(check([result], [{**result, "median_ms": 60.0}], 0.25, max_ms=0), [
+            "ssg.pyz: median_ms 80.0 exceeds baseline 60.0 by more than 25%",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import tracemalloc
+import unittest
+
+from markdown_generate import generate_page
+from test_support import TEMPLATE, TempDirTestCase
+
+MARKDOWN = """# Big page
+
+Intro with a [link](/blog) and ![img](/images/a.png).
+
+```
+code with
+
+blank lines
+```
+
+- one
+- two
+"""
+
+class TestGeneratePage(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", TEMPLATE)
+
+    def generate(self, source, dest, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(source, self.template, dest, "/site/", **kwargs)
+        with open(dest) as f:
+            return f.read()
+
+    def test_output(self):
+        source = self.write("index.md", MARKDOWN)
+        html = self.generate(source, self.path("out/index.html"))
+        self.assertTrue(html.startswith('<html><title>Big page</title><link href="/site/index.css" /><body><div><h1>Big page</h1>'))
+        self.assertIn('<a href="/site/blog">link</a>', html)
+        self.assertIn("<pre><code>code with\n\nblank lines\n</code></pre>", html)
+
+    def test_escapes_title_and_text(self):
+        source = self.write("index.md", "# Fish & <Chips>\n\n1 < 2\n")
+        html = self.generate(source, self.path("out/index.html"))
+        self.assertIn("<title>Fish &amp; &lt;Chips&gt;</title>", html)
+        self.assertIn("<p>1 &lt; 2</p>", html)
+
+    def test_stream_matches_whole_file(self):
+        source = self.write("index.md", MARKDOWN)
+        whole = self.generate(source, self.path("whole.html"), stream=False)
+        streamed = self.generate(source, self.path("streamed.html"), stream=True)
+        self.assertEqual(whole, streamed)
+
+    def test_stream_splits_lines_like_whole_file(self):
+        source = self.write("index.md", "# Page\x0cbreak\n\n- one\u2028still one\n- two\n")
+        whole = self.generate(source, self.path("whole.html"), stream=False)
+        self.assertEqual(whole, self.generate(source, self.path("streamed.html"), stream=True))
+        self.assertIn("<title>Page\x0cbreak</title>", whole)
+        self.assertIn("<li>one\u2028still one</li>", whole)
+
+    def test_stream_memory_is_bounded_by_block(self):
+        paragraph = "A fairly long paragraph of text with **bold** words. " * 20
+        source = self.write("big.md", "# Big\n\n" + f"{paragraph}\n\n" * 500)
+        size = os.path.getsize(source)
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, self.template, self.path("big.html"), "/", stream=True)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, size / 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,8 @@
+import io
 import unittest
 from blocktype import BlockType, block_to_block_type
 from htmlnode import HTMLNode, LeafNode
-from markdown_split import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks
+from markdown_split import split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, scan_blocks, iter_blocks
 from textnode import TextNode, TextType
 from exceptions import InvalidMarkdownError
 from markdown_to_html_node import markdown_to_html_node
@@ -272,6 +273,34 @@ class TestTextToTextNodes(unittest.TestCase):
         with self.assertRaises(InvalidMarkdownError):
             text_to_textnodes(text)
 
+    def test_empty_text(self):
+        self.assertEqual(text_to_textnodes(""), [])
+
+    def test_adjacent_delimiters(self):
+        nodes = text_to_textnodes("**bold**_italic_`code`")
+        expected = [
+            TextNode("bold", TextType.BOLD),
+            TextNode("italic", TextType.ITALIC),
+            TextNode("code", TextType.CODE),
+        ]
+        self.assertEqual(nodes, expected)
+
+    def test_link_url_with_underscore(self):
+        nodes = text_to_textnodes("see [docs](https://example.com/a_b) now")
+        expected = [
+            TextNode("see ", TextType.TEXT),
+            TextNode("docs", TextType.LINK, "https://example.com/a_b"),
+            TextNode(" now", TextType.TEXT),
+        ]
+        self.assertEqual(nodes, expected)
+
+    def test_many_links(self):
+        text = "[a](1) " * 2000
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 4000)
+        self.assertEqual(nodes[0], TextNode("a", TextType.LINK, "1"))
+        self.assertEqual(nodes[-1], TextNode(" ", TextType.TEXT))
+
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
         md = """
@@ -473,5 +502,79 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+class TestScanBlocks(unittest.TestCase):
+    def test_types_and_text(self):
+        md = """
+# Heading
+
+Paragraph text
+over two lines
+
+- one
+- two
+
+1. first
+2. second
+
+> quoted
+"""
+        self.assertEqual(scan_blocks(md), [
+            (BlockType.HEADING, "# Heading"),
+            (BlockType.PARAGRAPH, "Paragraph text\nover two lines"),
+            (BlockType.UNORDERED_LIST, "- one\n- two"),
+            (BlockType.ORDERED_LIST, "1. first\n2. second"),
+            (BlockType.QUOTE, "> quoted"),
+        ])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "```\nfirst\n\n\nsecond\n```\n\nafter"
+        self.assertEqual(scan_blocks(md), [
+            (BlockType.CODE, "```\nfirst\n\n\nsecond\n```"),
+            (BlockType.PARAGRAPH, "after"),
+        ])
+
+    def test_unterminated_fence_splits_on_blank_lines(self):
+        self.assertEqual(scan_blocks("```\nopen\n\nafter"), [
+            (BlockType.PARAGRAPH, "```\nopen"),
+            (BlockType.PARAGRAPH, "after"),
+        ])
+
+    def test_whitespace_only_lines_separate_blocks(self):
+        self.assertEqual(scan_blocks("one\n   \ntwo\r\n"), [
+            (BlockType.PARAGRAPH, "one"),
+            (BlockType.PARAGRAPH, "two"),
+        ])
+
+    def test_scan_blocks_matches_iter_blocks(self):
+        documents = [
+            "```\na\n  \n\nb\n```\nafter the fence\n\nnext",
+            "  ```py\n\n\n```   \n\n- one\n- two\n",
+            "```x```\n\n```\nopen\n\n# Title\n\n```\n",
+            "\n \n> one\n>two\n\t\n1. a\n2. b",
+        ]
+        for md in documents:
+            self.assertEqual(scan_blocks(md), list(iter_blocks(md.split("\n"))), md)
+
+    def test_iter_blocks_from_lines_with_newlines(self):
+        lines = ["# Title\n", "\n", "text\n"]
+        self.assertEqual(list(iter_blocks(lines)), [
+            (BlockType.HEADING, "# Title"),
+            (BlockType.PARAGRAPH, "text"),
+        ])
+
+    def test_only_newlines_end_lines(self):
+        md = "# Title\n\n- one\x0cstill one\n- two\u2028too\n\n> quote\x85more"
+        expected = [
+            (BlockType.HEADING, "# Title"),
+            (BlockType.UNORDERED_LIST, "- one\x0cstill one\n- two\u2028too"),
+            (BlockType.QUOTE, "> quote\x85more"),
+        ]
+        self.assertEqual(scan_blocks(md), expected)
+        self.assertEqual(list(iter_blocks(io.StringIO(md))), expected)
+
+    def test_code_with_blank_lines_renders(self):
+        html = markdown_to_html_node("```\na\n\nb\n```").to_html()
+        self.assertEqual(html, "<div><pre><code>a\n\nb\n</code></pre></div>")
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+from minify import BUFFER_SIZE, HtmlMinifier, MinifyStats, minify_html
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_whitespace_between_block_tags_is_dropped(self):
+        html = "<!doctype html>\n<html>\n  <head>\n    <title>Hi</title>\n  </head>\n  <body>\n    <p>text</p>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<!doctype html><html><head><title>Hi</title></head><body><p>text</p></body></html>")
+
+    def test_whitespace_next_to_inline_tags_collapses_to_one_space(self):
+        self.assertEqual(
+            minify_html("<p>a  <b>bold</b>\n\n<i>it</i>   text</p>"),
+            "<p>a <b>bold</b> <i>it</i> text</p>",
+        )
+
+    def test_non_breaking_space_is_kept(self):
+        self.assertEqual(minify_html("<p>a\u00a0 b</p>"), "<p>a\u00a0 b</p>")
+
+    def test_comments_are_removed(self):
+        self.assertEqual(minify_html("<p>a <!-- note --> b</p><!--[if IE]>x<![endif]-->"), "<p>a b</p><!--[if IE]>x<![endif]-->")
+
+    def test_code_blocks_are_preserved(self):
+        html = "<div>\n  <pre><code>func main() {\n    <b>x</b>  y\n}\n</code></pre>\n  <p>a  <code>x   y</code></p>\n</div>"
+        self.assertEqual(
+            minify_html(html),
+            "<div><pre><code>func main() {\n    <b>x</b>  y\n}\n</code></pre><p>a <code>x y</code></p></div>",
+        )
+
+    def test_script_is_preserved(self):
+        html = "<body>\n<script>\n  if (a < b) { f(); }\n</script>\n</body>"
+        self.assertEqual(minify_html(html), "<body><script>\n  if (a < b) { f(); }\n</script></body>")
+
+    def test_attributes_are_untouched(self):
+        self.assertEqual(minify_html('<img alt="two  spaces"  src="/a.png">'), '<img alt="two  spaces"  src="/a.png">')
+
+class TestHtmlMinifier(unittest.TestCase):
+    HTML = (
+        "<html>\n  <body>\n    <!-- a comment -->\n    <p>Some <b>bold</b>   text</p>\n"
+        "    <pre><code>keep   this\n</code></pre>\n  </body>\n</html>\n"
+    )
+
+    EDGES = [
+        "<p>a </p>", "<p> a</p>", "</div> <p>x</p>", "<div>x </div><p> y</p>", "<b>x</b> <i>y</i>",
+        "<p>a <b>b</b> </p>", "x <br/> y", "<li>a</li> \n <li>b</li>", "<p>a <!-- c --> </p>",
+        "<p>  x</p>", '<div class="a b"> x\n</div>', "<P> x </P>",
+    ]
+
+    def minify_in_chunks(self, html, size):
+        parts = []
+        minifier = HtmlMinifier(parts.append)
+        for i in range(0, len(html), size):
+            minifier.write(html[i:i + size])
+        minifier.close()
+        return "".join(parts)
+
+    def test_any_chunking_gives_the_same_output(self):
+        for html in [self.HTML] + self.EDGES:
+            expected = minify_html(html)
+            # a small buffer puts buffer boundaries everywhere, including next to every space
+            for buffer_size in (1, 2, 7, BUFFER_SIZE):
+                with patch("minify.BUFFER_SIZE", buffer_size):
+                    for size in (1, 2, 5, 13):
+                        self.assertEqual(self.minify_in_chunks(html, size), expected, (html, buffer_size, size))
+
+    def test_lone_space_next_to_block_tag_is_kept(self):
+        self.assertEqual(minify_html("<p>text </p>"), "<p>text </p>")
+        self.assertEqual(minify_html("</div> <p>x</p>"), "</div> <p>x</p>")
+        self.assertEqual(minify_html("<p>text \n</p>"), "<p>text</p>")
+
+    def test_stats_count_removed_bytes(self):
+        stats = MinifyStats()
+        parts = []
+        minifier = HtmlMinifier(parts.append, stats)
+        minifier.write(self.HTML)
+        minifier.close()
+        self.assertEqual(stats.saved, len(self.HTML) - len("".join(parts)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from output_writer import AtomicOutput, DEFAULT_MODE, write_if_changed
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "out", "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        output = AtomicOutput(self.path)
+        with output as f:
+            f.write(text)
+        return output.changed
+
+    def test_new_file_is_written(self):
+        self.assertTrue(self.write("<p>a</p>"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>a</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), DEFAULT_MODE)
+
+    def test_identical_content_keeps_mtime(self):
+        self.write("<p>a</p>")
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(self.write("<p>a</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_changed_content_is_replaced(self):
+        self.write("<p>a</p>")
+        self.assertTrue(self.write("<p>b</p>"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>b</p>")
+
+    def test_error_leaves_destination_untouched(self):
+        self.write("<p>a</p>")
+        with self.assertRaises(RuntimeError):
+            with AtomicOutput(self.path) as f:
+                f.write("partial")
+                raise RuntimeError("render failed")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>a</p>")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_write_if_changed(self):
+        self.assertTrue(write_if_changed(self.path, "data"))
+        self.assertFalse(write_if_changed(self.path, b"data"))
+        self.assertTrue(write_if_changed(self.path, "other"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import gzip
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+
+from page_server import PageServer, page_paths
+
+TEMPLATE = "<html><head><title>{{ Title }}</title><link href=\"/index.css\"></head><body>{{ Content }}</body></html>"
+
+class TestPageServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("template.html", TEMPLATE)
+        self.write("content/index.md", "# Home\n\n[Tom](/blog/tom)")
+        self.write("content/blog/tom/index.md", "# Tom\n\nHello, Tom.")
+        self.write("content/about.md", "# About\n\nAbout us.")
+        self.write("static/index.css", "body { color: red }")
+        self.server = PageServer(("127.0.0.1", 0), self.root, base_path="/preview/")
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True).start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def write(self, name, text, mtime_ns=None):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def get(self, path, **headers):
+        self.connection.request("GET", path, headers=headers)
+        response = self.connection.getresponse()
+        return response, response.read().decode()
+
+    def test_renders_pages_on_first_request(self):
+        self.assertEqual(self.server.pages.renders, 0)
+        response, body = self.get("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertIn("<title>Home</title>", body)
+        self.assertIn('href="/preview/blog/tom"', body)
+        self.assertIn('href="/preview/index.css"', body)
+        self.assertIn("Hello, Tom.", self.get("/blog/tom/")[1])
+        self.assertIn("About us.", self.get("/about.html")[1])
+        self.assertEqual(self.server.pages.renders, 3)
+
+    def test_cached_until_the_source_changes(self):
+        response, _ = self.get("/blog/tom/")
+        etag = response.getheader("ETag")
+        self.assertEqual(self.get("/blog/tom/", **{"If-None-Match": etag})[0].status, 304)
+        self.assertEqual(self.server.pages.renders, 1)
+
+        # a new mtime with the same bytes is only hashed
+        self.write("content/blog/tom/index.md", "# Tom\n\nHello, Tom.", mtime_ns=10**18)
+        self.assertEqual(self.get("/blog/tom/", **{"If-None-Match": etag})[0].status, 304)
+        self.assertEqual(self.server.pages.renders, 1)
+
+        self.write("content/blog/tom/index.md", "# Tom\n\nBye, Tom.", mtime_ns=2 * 10**18)
+        response, body = self.get("/blog/tom/", **{"If-None-Match": etag})
+        self.assertEqual(response.status, 200)
+        self.assertIn("Bye, Tom.", body)
+        self.assertEqual(self.server.pages.renders, 2)
+
+    def test_template_change_renders_again(self):
+        self.get("/")
+        self.write("template.html", "<main>{{ Content }}</main>", mtime_ns=10**18)
+        _, body = self.get("/")
+        self.assertTrue(body.startswith("<main>"))
+        self.assertEqual(self.server.pages.renders, 2)
+
+    def test_static_files_and_gzip(self):
+        response, body = self.get("/index.css")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, "body { color: red }")
+        self.connection.request("GET", "/", headers={"Accept-Encoding": "gzip"})
+        response = self.connection.getresponse()
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertIn("<title>Home</title>", gzip.decompress(response.read()).decode())
+
+    def test_missing_pages_and_sources(self):
+        self.assertEqual(self.get("/blog/tom")[0].status, 301)
+        self.assertEqual(self.get("/nope/")[0].status, 404)
+        self.assertEqual(self.get("/blog/tom/index.md")[0].status, 404)
+        self.assertEqual(self.get("/../template.html")[0].status, 404)
+
+    def test_render_error_is_not_cached(self):
+        self.write("content/broken.md", "no title here")
+        response, _ = self.get("/broken.html")
+        self.assertEqual(response.status, 500)
+        self.write("content/broken.md", "# Fixed", mtime_ns=10**18)
+        self.assertEqual(self.get("/broken.html")[0].status, 200)
+
+    def test_page_paths(self):
+        self.assertEqual(page_paths(self.root), ["/", "/about.html", "/blog/tom/", "/index.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
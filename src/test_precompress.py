@@ -0,0 +1,78 @@
+import contextlib
+import gzip
+import io
+import os
+import unittest
+
+from precompress import compress_outputs
+from site_build import build_site
+from test_support import TEMPLATE, TempDirTestCase
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.files = {"index.html", "index.css", "images/a.png"}
+        for name in self.files:
+            self.write(name, f"<p>{name}</p>" * 50)
+
+    def read_gz(self, name):
+        with gzip.open(os.path.join(self.root, name + ".gz"), "rt") as f:
+            return f.read()
+
+    def test_text_outputs_get_gz_siblings(self):
+        result = compress_outputs(self.root, self.files)
+        self.assertEqual(result.files, {"index.html.gz", "index.css.gz"})
+        self.assertEqual(sorted(result.compressed), ["index.css", "index.html"])
+        self.assertLess(result.bytes_out, result.bytes_in)
+        self.assertEqual(self.read_gz("index.html"), "<p>index.html</p>" * 50)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "images", "a.png.gz")))
+
+    def test_only_changed_outputs_are_recompressed(self):
+        compress_outputs(self.root, self.files)
+        self.assertEqual(compress_outputs(self.root, self.files).unchanged, 2)
+        self.write("index.css", "body { color: red }")
+        result = compress_outputs(self.root, self.files)
+        self.assertEqual(result.compressed, ["index.css"])
+        self.assertEqual(self.read_gz("index.css"), "body { color: red }")
+
+    def test_output_is_deterministic(self):
+        compress_outputs(self.root, self.files)
+        with open(os.path.join(self.root, "index.html.gz"), "rb") as f:
+            first = f.read()
+        os.remove(os.path.join(self.root, "index.html.gz"))
+        compress_outputs(self.root, self.files, workers=1)
+        with open(os.path.join(self.root, "index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+class TestGzipBuild(TempDirTestCase):
+    chdir = True
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n")
+        self.write("content/about/index.md", "# About\n")
+
+    def build(self, gzip_level=6):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            build_site("/", gzip_level=gzip_level)
+        return output.getvalue()
+
+    def test_gz_siblings_are_kept_and_refreshed(self):
+        self.assertIn("Gzip: 3 compressed", self.build())
+        self.assertIn("Gzip: 0 compressed", self.build())
+        self.write("content/about/index.md", "# About us\n")
+        self.assertIn("Gzip: 1 compressed", self.build())
+        with gzip.open("docs/about/index.html.gz", "rt") as f:
+            self.assertIn("About us", f.read())
+
+    def test_build_without_gzip_removes_gz_files(self):
+        self.build()
+        self.build(gzip_level=None)
+        self.assertFalse(os.path.exists("docs/index.html.gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
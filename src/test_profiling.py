@@ -0,0 +1,67 @@
+import unittest
+
+import profiling
+from profiling import Profiler, activate, stage
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_records_event(self):
+        profiler = Profiler()
+        with profiler.stage("parse"):
+            pass
+        event = profiler.events[0]
+        self.assertEqual(event["name"], "parse")
+        self.assertIsNone(event["page"])
+        self.assertGreaterEqual(event["wall_ns"], 0)
+
+    def test_nested_stages_inherit_page(self):
+        profiler = Profiler()
+        with activate(profiler):
+            with stage("page", page="index.md"):
+                with stage("parse"):
+                    pass
+            with stage("finalize"):
+                pass
+        pages = {event["name"]: event["page"] for event in profiler.events}
+        self.assertEqual(pages, {"parse": "index.md", "page": "index.md", "finalize": None})
+
+    def test_inactive_stage_is_noop(self):
+        self.assertIsNone(profiling._active)
+        with stage("parse"):
+            pass
+
+    def test_hooks_see_recorded_and_merged_events(self):
+        seen = []
+        profiler = Profiler()
+        profiler.add_hook(lambda event: seen.append(event["name"]))
+        with profiler.stage("read"):
+            pass
+        profiler.merge([{"name": "remote", "page": "a.md", "pid": 1, "start_ns": 0, "wall_ns": 5, "cpu_ns": 5}])
+        self.assertEqual(seen, ["read", "remote"])
+
+    def test_summary_and_slowest_pages(self):
+        profiler = Profiler()
+        profiler.merge([
+            {"name": "page", "page": "a.md", "pid": 1, "start_ns": 0, "wall_ns": 10, "cpu_ns": 8},
+            {"name": "page", "page": "b.md", "pid": 1, "start_ns": 10, "wall_ns": 30, "cpu_ns": 20},
+        ])
+        self.assertEqual(profiler.summary(), [
+            {"name": "page", "calls": 2, "wall_ns": 40, "cpu_ns": 28, "max_wall_ns": 30},
+        ])
+        self.assertEqual(profiler.slowest_pages(1), [("b.md", 30)])
+
+    def test_chrome_trace(self):
+        profiler = Profiler()
+        profiler.merge([{"name": "page", "page": "a.md", "pid": 7, "start_ns": 2000, "wall_ns": 3000, "cpu_ns": 1000}])
+        self.assertEqual(profiler.to_chrome_trace()["traceEvents"], [{
+            "name": "page",
+            "cat": "build",
+            "ph": "X",
+            "ts": 2.0,
+            "dur": 3.0,
+            "pid": 7,
+            "tid": 7,
+            "args": {"cpu_ms": 0.001, "page": "a.md"},
+        }])
+
+if __name__ == "__main__":
+    unittest.main()
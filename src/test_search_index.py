@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import unittest
+
+from search_index import (
+    SEARCH_DIRECTORY, SearchIndex, decode_postings, encode_postings, search, shard_name, term_counts, tokenize,
+)
+from url_resolver import UrlResolver
+
+class TestTerms(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hello, World! a snake_case 42 x"), ["hello", "world", "snake_case", "42"])
+        self.assertEqual(tokenize("Café crème — naïve"), ["café", "crème", "naïve"])
+        self.assertEqual(tokenize("a" * 33 + " ok"), ["ok"])
+
+    def test_term_counts_match_tokenize(self):
+        for text in ["The cat and the hat. THE END", "Ünïcödé and ascii, ünïcödé"]:
+            expected = {}
+            for term in tokenize(text):
+                expected[term] = expected.get(term, 0) + 1
+            self.assertEqual(term_counts(text), expected)
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("ab"), "ab")
+        self.assertEqual(shard_name("4x"), "4x")
+        self.assertEqual(shard_name("é"), "_c3a9")
+        self.assertEqual(shard_name("_a"), "_5f61")
+
+    def test_postings_round_trip(self):
+        postings = {7: 1, 2: 3, 40: 2}
+        self.assertEqual(encode_postings(postings), [2, 3, 5, 1, 33, 2])
+        self.assertEqual(decode_postings(encode_postings(postings)), postings)
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "docs")
+        self.state = os.path.join(self.tmp.name, "state.json")
+        self.resolve = UrlResolver("/site/")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def output(self, name):
+        return os.path.join(self.public, name, "index.html")
+
+    def build(self, pages):
+        """Writes the index for `pages` ({name: text}), updating only the pages whose text differs from the saved state."""
+        index = SearchIndex.load(self.state, "v1")
+        index.prune({self.output(name) for name in pages})
+        for name, text in pages.items():
+            if not index.is_current(self.output(name), text):
+                index.update(self.output(name), text, name.title(), term_counts(text))
+        result = index.write(self.public, self.resolve)
+        index.save()
+        return result
+
+    def search(self, query):
+        return search(os.path.join(self.public, SEARCH_DIRECTORY), query)
+
+    def test_write_and_search(self):
+        result = self.build({"tom": "Tom likes apples. Apples!", "ann": "Ann likes pears", "": "Home of Tom and Ann"})
+        self.assertIn(os.path.join(SEARCH_DIRECTORY, "ap.json"), result.files)
+        self.assertEqual(self.search("apples"), [("/site/tom/", "Tom")])
+        self.assertEqual(self.search("likes"), [("/site/ann/", "Ann"), ("/site/tom/", "Tom")])
+        # equal scores are ordered by URL
+        self.assertEqual(self.search("TOM"), [("/site/", ""), ("/site/tom/", "Tom")])
+        self.assertEqual(self.search("tom ann"), [("/site/", "")])
+        self.assertEqual(self.search("kiwis"), [])
+        with open(os.path.join(self.public, SEARCH_DIRECTORY, "ap.json")) as f:
+            self.assertEqual(json.load(f), {"apples": [0, 2]})
+
+    def test_only_changed_shards_are_written(self):
+        pages = {"tom": "Tom likes apples", "ann": "Ann likes pears"}
+        self.assertEqual(len(self.build(pages).written), 5)
+        self.assertEqual(self.build(pages).written, [])
+        pages["ann"] = "Ann likes plums"
+        result = self.build(pages)
+        self.assertEqual(result.written, ["pl"])
+        # left for the build to remove with the other orphans
+        self.assertNotIn(os.path.join(SEARCH_DIRECTORY, "pe.json"), result.files)
+        self.assertEqual(self.search("plums"), [("/site/ann/", "Ann")])
+        self.assertEqual(self.search("pears"), [])
+
+    def test_removed_pages_free_their_ids_and_shards(self):
+        self.build({"tom": "Tom likes apples", "ann": "Ann likes pears"})
+        result = self.build({"ann": "Ann likes pears", "bob": "Bob likes kiwis"})
+        self.assertNotIn(os.path.join(SEARCH_DIRECTORY, "ap.json"), result.files)
+        self.assertEqual(self.search("kiwis"), [("/site/bob/", "Bob")])
+        self.assertEqual(self.search("likes"), [("/site/ann/", "Ann"), ("/site/bob/", "Bob")])
+        with open(os.path.join(self.public, SEARCH_DIRECTORY, "pages.json")) as f:
+            self.assertEqual(len(json.load(f)), 2)
+
+    def test_missing_shard_rewrites_everything(self):
+        pages = {"tom": "Tom likes apples", "ann": "Ann likes pears"}
+        self.build(pages)
+        os.remove(os.path.join(self.public, SEARCH_DIRECTORY, "ap.json"))
+        pages["ann"] = "Ann likes plums"
+        self.build(pages)
+        self.assertEqual(self.search("apples"), [("/site/tom/", "Tom")])
+
+    def test_other_generator_discards_state(self):
+        self.build({"tom": "Tom likes apples"})
+        self.assertEqual(SearchIndex.load(self.state, "v1").pages.keys(), {self.output("tom")})
+        self.assertEqual(SearchIndex.load(self.state, "v2").pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
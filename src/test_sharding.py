@@ -0,0 +1,143 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from exceptions import ShardError
+from merge_shards import MERGED_MANIFEST_PATH, merge_shards
+from sharding import SHARD_MANIFEST_NAME, assign_shards, load_costs, parse_shard, shard_path
+from site_build import build_site
+from test_support import TEMPLATE, TempDirTestCase
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class TestPartition(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("1/4"), (0, 4))
+        self.assertEqual(parse_shard("4/4"), (3, 4))
+        for text in ["0/4", "5/4", "1/0", "1", "a/b"]:
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_path(self):
+        self.assertEqual(shard_path("./.build_manifest.json", (1, 4)), "./.build_manifest.shard-2-of-4.json")
+
+    def test_hash_partition_is_stable(self):
+        keys = [f"post{i}/index.md" for i in range(50)]
+        assignment = assign_shards(keys, 4)
+        self.assertEqual(assignment, assign_shards(list(reversed(keys)), 4))
+        self.assertEqual(set(assignment.values()), {0, 1, 2, 3})
+        # adding a page does not move any other page
+        grown = assign_shards(keys + ["new/index.md"], 4)
+        self.assertEqual({key: grown[key] for key in keys}, assignment)
+
+    def test_weighted_partition_balances_cost(self):
+        costs = {"big.md": 10.0, "a.md": 4.0, "b.md": 3.0, "c.md": 3.0}
+        assignment = assign_shards(list(costs), 2, costs)
+        self.assertEqual(assignment["big.md"], 0)
+        self.assertEqual({key for key, index in assignment.items() if index == 1}, {"a.md", "b.md", "c.md"})
+
+class TestShardedBuild(TempDirTestCase):
+    """Builds a small site as N shards, each in its own process like separate CI machines would, and merges them."""
+    chdir = True
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        for i in range(12):
+            self.write(f"content/post{i}/index.md", f"# Post {i}\n\nSome **bold** text and a [link](/post{i}).\n")
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def build_shards(self, count, *args):
+        processes = [
+            subprocess.Popen(
+                [sys.executable, os.path.join(SRC_DIR, "main.py"), "/site/", "--shard", f"{i}/{count}", *args],
+                stdout=subprocess.DEVNULL,
+            )
+            for i in range(1, count + 1)
+        ]
+        for process in processes:
+            self.assertEqual(process.wait(), 0)
+        return [os.path.join("shards", str(i)) for i in range(1, count + 1)]
+
+    def test_merged_shards_match_single_build(self):
+        shard_dirs = self.build_shards(3)
+        merge_shards(shard_dirs)
+        merged = self.read_tree("docs")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_site("./site/", force=True)
+        self.assertEqual(merged, self.read_tree("docs"))
+        self.assertEqual(len(load_costs(MERGED_MANIFEST_PATH)), 12)
+
+    def test_fingerprinted_shards(self):
+        merge_shards(self.build_shards(2, "--fingerprint"))
+        merged = self.read_tree("docs")
+        self.assertIn("index.62368a1a2925.css", merged)
+        self.assertIn("index.css", merged)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_site("./site/", force=True, fingerprint=True)
+        self.assertEqual(merged, self.read_tree("docs"))
+
+    def test_fingerprinted_static_changed_before_merge(self):
+        shard_dirs = self.build_shards(2, "--fingerprint")
+        self.write("static/index.css", "body { color: red }")
+        with self.assertRaisesRegex(ShardError, "changed since the shards were built"):
+            merge_shards(shard_dirs)
+
+    def test_shards_are_disjoint(self):
+        shard_dirs = self.build_shards(3)
+        pages = []
+        for shard_dir in shard_dirs:
+            with open(os.path.join(shard_dir, SHARD_MANIFEST_NAME)) as f:
+                pages.extend(json.load(f)["pages"])
+        self.assertEqual(len(pages), 12)
+        self.assertEqual(len(set(pages)), 12)
+
+    def test_weighted_shards_from_merged_manifest(self):
+        merge_shards(self.build_shards(2))
+        shard_dirs = self.build_shards(2, "--shard-costs", MERGED_MANIFEST_PATH)
+        merge_shards(shard_dirs)
+        self.assertEqual(len([name for name in self.read_tree("docs") if name.endswith(".html")]), 12)
+
+    def test_missing_shard(self):
+        shard_dirs = self.build_shards(3)
+        with self.assertRaisesRegex(ShardError, "missing shard 2/3"):
+            merge_shards([shard_dirs[0], shard_dirs[2]])
+
+    def test_duplicate_shard(self):
+        shard_dirs = self.build_shards(2)
+        with self.assertRaisesRegex(ShardError, "given 2 times"):
+            merge_shards(shard_dirs + [shard_dirs[0]])
+
+    def test_tampered_output(self):
+        shard_dirs = self.build_shards(2)
+        with open(os.path.join(shard_dirs[0], SHARD_MANIFEST_NAME)) as f:
+            page = next(iter(json.load(f)["pages"]))
+        with open(os.path.join(shard_dirs[0], page), "a") as f:
+            f.write("<!-- edited -->")
+        with self.assertRaisesRegex(ShardError, "does not match"):
+            merge_shards(shard_dirs)
+
+    def test_page_without_shard(self):
+        shard_dirs = self.build_shards(2)
+        self.write("content/late/index.md", "# Late\n")
+        with self.assertRaisesRegex(ShardError, "late/index.html was not built by any shard"):
+            merge_shards(shard_dirs)
+
+
+if __name__ == "__main__":
+    unittest.main()
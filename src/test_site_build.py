@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from site_build import PageJob, PageResult, collect_pages, minify_report, render_pages, worker_report
+
+TEMPLATE = "<html>\n  <title>{{ Title }}</title>\n  <body>{{ Content }}</body>\n</html>\n"
+
+class TestSiteBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        for i in range(6):
+            page_dir = os.path.join(self.content, f"post{i}")
+            os.makedirs(page_dir)
+            with open(os.path.join(page_dir, "index.md"), "w") as f:
+                f.write(f"# Post {i}\n\nSome **bold** text and a [link](/post{i}).\n\n- one\n- two\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, public, workers):
+        pages = collect_pages(self.content, public)
+        jobs = [PageJob(source, output, self.template, "/") for source, output in pages]
+        return render_pages(jobs, workers)
+
+    def read_tree(self, root):
+        files = {}
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_collect_pages(self):
+        pages = collect_pages(self.content, "docs")
+        self.assertEqual(len(pages), 6)
+        self.assertIn((os.path.join(self.content, "post0", "index.md"), os.path.join("docs", "post0", "index.html")), pages)
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        self.build(serial, 1)
+        results = self.build(parallel, 3)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_worker_report(self):
+        results = [
+            PageResult("a.md", "a.html", 1, 0.5),
+            PageResult("b.md", "b.html", 1, 0.5),
+            PageResult("c.md", "c.html", 2, 0.25),
+        ]
+        self.assertEqual(worker_report(results, 1.0), [
+            "  worker 1: 2 pages in 1.000s (2.0 pages/s)",
+            "  worker 2: 1 pages in 0.250s (4.0 pages/s)",
+            "  total: 3 pages in 1.000s (3.0 pages/s)",
+        ])
+
+    def test_minified_pages_report_savings(self):
+        public = os.path.join(self.tmp.name, "public")
+        pages = collect_pages(self.content, public)
+        results = render_pages([PageJob(source, output, self.template, "/", minify=True) for source, output in pages], 2)
+        for result in results:
+            self.assertEqual(result.saved, 8)
+            self.assertEqual(result.size, os.path.getsize(result.output))
+            with open(result.output) as f:
+                self.assertTrue(f.read().startswith("<html><title>Post"))
+
+    def test_search_jobs_return_terms(self):
+        public = os.path.join(self.tmp.name, "public")
+        pages = collect_pages(self.content, public)
+        results = render_pages([PageJob(source, output, self.template, "/", search=True) for source, output in pages], 2)
+        for i, result in enumerate(sorted(results, key=lambda result: result.source)):
+            self.assertEqual(result.title, f"Post {i}")
+            self.assertEqual(result.terms, {"post": 1, "some": 1, "bold": 1, "text": 1, "and": 1, "link": 1, "one": 1, "two": 1})
+        self.assertIsNone(self.build(public, 1)[0].terms)
+
+    def test_search_terms_ignore_mid_word_markup(self):
+        source = os.path.join(self.content, "post0", "index.md")
+        with open(source, "w") as f:
+            f.write("# Post\n\nIt is un_believ_able and **sur**prising.\n\n- one\n- two\n")
+        output = os.path.join(self.tmp.name, "public", "index.html")
+        (result,) = render_pages([PageJob(source, output, self.template, "/", search=True)], 1)
+        self.assertEqual(result.terms, {"post": 1, "it": 1, "is": 1, "unbelievable": 1, "and": 1, "surprising": 1, "one": 1, "two": 1})
+
+    def test_minify_report(self):
+        results = [PageResult("a.md", "a.html", 1, 0.5, size=90, saved=10), PageResult("b.md", "b.html", 1, 0.5, size=100)]
+        self.assertEqual(minify_report(results), [
+            "Minify: 200 -> 190 bytes, 10 saved (5.0%)",
+            "  a.html: 100 -> 90 bytes, 10 saved (10.0%)",
+            "  b.html: 100 -> 100 bytes, 0 saved (0.0%)",
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
 from markdown_extract import extract_title
 from exceptions import InvalidHTMLError
+from static_to_public import sync_source_dir_to_destination_dir, remove_orphans
 
 class TestStaticToPublic(unittest.TestCase):
     def TestExtractTitle(self):
@@ -55,5 +58,62 @@ Vestibulum convallis, lorem a semper suscipit, orci quam aliquet ipsum, nec laci
         with self.assertRaises(InvalidHTMLError):
             title = extract_title(md)
 
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.destination = os.path.join(self.tmp.name, "docs")
+        self.write(self.source, "index.css", "body {}")
+        self.write(self.source, "images/a.png", "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, root, name, text):
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_first_sync_copies_everything(self):
+        result = sync_source_dir_to_destination_dir(self.source, self.destination)
+        self.assertEqual(sorted(result.copied), [os.path.join("images", "a.png"), "index.css"])
+        self.assertEqual(result.files, {os.path.join("images", "a.png"), "index.css"})
+
+    def test_second_sync_copies_only_changes(self):
+        sync_source_dir_to_destination_dir(self.source, self.destination)
+        page = self.write(self.destination, "index.html", "<html></html>")
+        self.write(self.source, "index.css", "body { color: red }")
+        result = sync_source_dir_to_destination_dir(self.source, self.destination)
+        self.assertEqual(result.copied, ["index.css"])
+        self.assertEqual(result.unchanged, 1)
+        self.assertTrue(os.path.exists(page))
+
+    def test_checksum_skips_touched_but_identical(self):
+        sync_source_dir_to_destination_dir(self.source, self.destination)
+        os.utime(os.path.join(self.source, "index.css"), ns=(0, 0))
+        result = sync_source_dir_to_destination_dir(self.source, self.destination, checksum=True)
+        self.assertEqual(result.copied, [])
+
+    def test_remove_orphans(self):
+        result = sync_source_dir_to_destination_dir(self.source, self.destination)
+        self.write(self.destination, "index.html", "<html></html>")
+        self.write(self.destination, "old/index.html", "<html></html>")
+        removed = remove_orphans(self.destination, result.files | {"index.html"})
+        self.assertEqual(removed, [os.path.join("old", "index.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.destination, "old")))
+        self.assertTrue(os.path.exists(os.path.join(self.destination, "index.html")))
+
+    def test_rename(self):
+        png = os.path.join("images", "a.png")
+        renamed = os.path.join("images", "a.1234.png")
+        result = sync_source_dir_to_destination_dir(self.source, self.destination, rename={png: renamed})
+        self.assertEqual(result.files, {renamed, png, "index.css"})
+        self.assertTrue(os.path.exists(os.path.join(self.destination, renamed)))
+        # kept for references that are not rewritten
+        self.assertTrue(os.path.exists(os.path.join(self.destination, png)))
+        self.assertEqual(sync_source_dir_to_destination_dir(self.source, self.destination, rename={png: renamed}).copied, [])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,27 @@
+import os
+import tempfile
+import unittest
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css" /><body>{{ Content }}</body></html>'
+
+class TempDirTestCase(unittest.TestCase):
+    """Gives each test a fresh temporary directory, `self.root`, to write a site into. With `chdir` set, the test also runs from inside it, like `main.py` run from a site's checkout."""
+    chdir = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.realpath(self.tmp.name)
+        if self.chdir:
+            self.addCleanup(os.chdir, os.getcwd())
+            os.chdir(self.root)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def write(self, name, text):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
@@ -0,0 +1,75 @@
+import os
+import unittest
+
+from exceptions import TemplateError
+from template import compile_template, load_template
+from test_support import TempDirTestCase
+from url_resolver import UrlResolver
+
+def render(template, variables: dict) -> str:
+    parts = []
+    template.stream(parts.append, variables)
+    return "".join(parts)
+
+class TestTemplate(TempDirTestCase):
+    def test_render_variables(self):
+        path = self.write("t.html", "<title>{{ Title }}</title><main>{{Content}}</main>{{ Title }}")
+        template = compile_template(path)
+        self.assertEqual(
+            render(template, {"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><main><p>x</p></main>Hi",
+        )
+
+    def test_arbitrary_variables(self):
+        path = self.write("t.html", "<p>{{ Author }}</p>")
+        self.assertEqual(render(compile_template(path), {"Author": "Tolkien"}), "<p>Tolkien</p>")
+
+    def test_undefined_variable(self):
+        path = self.write("t.html", "{{ Missing }}")
+        with self.assertRaises(TemplateError):
+            render(compile_template(path), {})
+
+    def test_include_partial(self):
+        self.write("partials/footer.html", "<footer>{{ Title }}</footer>")
+        path = self.write("t.html", '<h1>{{ Title }}</h1>{% include "partials/footer.html" %}')
+        template = compile_template(path)
+        self.assertEqual(render(template, {"Title": "T"}), "<h1>T</h1><footer>T</footer>")
+        self.assertEqual(len(template.dependencies), 2)
+
+    def test_literals_are_merged(self):
+        self.write("a.html", "<a>")
+        path = self.write("t.html", '<div>{% include "a.html" %}</div>')
+        self.assertEqual(compile_template(path).parts, ["<div><a></div>"])
+
+    def test_recursive_include(self):
+        path = self.write("t.html", '{% include "t.html" %}')
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_resolver_rewrites_template_markup_only(self):
+        path = self.write("t.html", '<link href="/index.css" /><img src="/a.png" /><a href="https://x.org">{{ Content }}')
+        template = compile_template(path, UrlResolver("/site/"))
+        self.assertEqual(
+            render(template, {"Content": '<a href="/x">'}),
+            '<link href="/site/index.css" /><img src="/site/a.png" /><a href="https://x.org"><a href="/x">',
+        )
+
+    def test_stream(self):
+        path = self.write("t.html", "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        chunks = []
+        compile_template(path).stream(chunks.append, {
+            "Title": "Hi",
+            "Content": lambda write: (write("<p>"), write("x"), write("</p>")),
+        })
+        self.assertEqual(chunks, ["<title>", "Hi", "</title><main>", "<p>", "x", "</p>", "</main>"])
+
+    def test_load_template_is_cached_until_changed(self):
+        path = self.write("t.html", "one")
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+        self.write("t.html", "two")
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(render(load_template(path), {}), "two")
+
+if __name__ == "__main__":
+    unittest.main()
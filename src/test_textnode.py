@@ -67,7 +67,16 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(html_node.value, "")
         self.assertEqual(html_node.props["src"], "https://www.example.com/bg.png")
         self.assertEqual(html_node.props["alt"], "Alt text")
-        
+
+    def test_resolve_url(self):
+        resolve = lambda url: "/site" + url
+        link = text_node_to_html_node(TextNode("Home", TextType.LINK, "/blog"), resolve)
+        image = text_node_to_html_node(TextNode("Alt", TextType.IMAGE, "/a.png"), resolve)
+        self.assertEqual(link.props["href"], "/site/blog")
+        self.assertEqual(image.props["src"], "/site/a.png")
+
+    def test_slotted(self):
+        self.assertFalse(hasattr(TextNode("text", TextType.TEXT), "__dict__"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+import unittest
+
+from url_resolver import FingerprintResolver, UrlResolver, resolver_for_base_path
+
+class TestUrlResolver(unittest.TestCase):
+    def test_root_relative_urls_get_base_path(self):
+        resolve = UrlResolver("/site/")
+        self.assertEqual(resolve("/blog/tom"), "/site/blog/tom")
+        self.assertEqual(resolve("/"), "/site/")
+
+    def test_other_urls_are_left_alone(self):
+        resolve = UrlResolver("/site/")
+        for url in ["https://boot.dev", "//cdn.example.com/a.js", "images/a.png", "#top", "mailto:a@b.c"]:
+            self.assertEqual(resolve(url), url)
+
+    def test_memoized(self):
+        resolve = UrlResolver("/site/")
+        resolve("/a")
+        self.assertEqual(resolve._memo, {"/a": "/site/a"})
+
+    def test_shared_per_base_path(self):
+        self.assertIs(resolver_for_base_path("/x/"), resolver_for_base_path("/x/"))
+        self.assertEqual(resolver_for_base_path("/x/").key, "/x/")
+
+class TestFingerprintResolver(unittest.TestCase):
+    def test_assets_get_fingerprinted_names(self):
+        resolve = FingerprintResolver("/site/", {"index.css": "index.abc.css", "images/a.png": "images/a.def.png"}, "123")
+        self.assertEqual(resolve("/index.css"), "/site/index.abc.css")
+        self.assertEqual(resolve("/images/a.png?v=2#x"), "/site/images/a.def.png?v=2#x")
+        self.assertEqual(resolve("/blog/tom"), "/site/blog/tom")
+        self.assertEqual(resolve("index.css"), "index.css")
+
+    def test_key_includes_digest(self):
+        self.assertEqual(FingerprintResolver("/site/", {}, "123").key, "/site/#123")
+
+
+if __name__ == "__main__":
+    unittest.main()
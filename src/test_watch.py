@@ -0,0 +1,26 @@
+import unittest
+
+from watch import changed_paths, inject_live_reload, LIVE_RELOAD_SCRIPT
+
+class TestWatch(unittest.TestCase):
+    def test_changed_paths(self):
+        old = {"a.md": (1, 10), "b.md": (1, 10), "c.md": (1, 10)}
+        new = {"a.md": (1, 10), "b.md": (2, 10), "d.md": (1, 5)}
+        self.assertEqual(changed_paths(old, new), {"b.md", "c.md", "d.md"})
+
+    def test_no_changes(self):
+        old = {"a.md": (1, 10)}
+        self.assertEqual(changed_paths(old, dict(old)), set())
+
+    def test_inject_before_body_close(self):
+        html = "<html><body><p>x</p></body></html>"
+        self.assertEqual(
+            inject_live_reload(html),
+            f"<html><body><p>x</p>{LIVE_RELOAD_SCRIPT}</body></html>",
+        )
+
+    def test_inject_without_body(self):
+        self.assertEqual(inject_live_reload("<p>x</p>"), f"<p>x</p>{LIVE_RELOAD_SCRIPT}")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,6 +10,8 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str = None):
         """Represents the various types of inline text that can exist in HTML and Markdown."""
         self.text = text
@@ -24,7 +26,7 @@ class TextNode:
     def __repr__(self):
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
-def text_node_to_html_node(text_node: "TextNode") -> "HTMLNode":
+def text_node_to_html_node(text_node: "TextNode", resolve_url=None) -> "HTMLNode":
     """Handles each type of the `TextType` enum. If it gets a `TextNode` that is none of those types, it should `raise` an excaption. Otherwise, it should return a new `LeafNode` object.
     - `TextType.TEXT`: Returns a `LeafNode` with no tag, just a raw text value.
     - `TextType.BOLD`: Returns a `LeafNode` with a "b" tag and the text.
@@ -32,6 +34,8 @@ def text_node_to_html_node(text_node: "TextNode") -> "HTMLNode":
     - `TextType.CODE`: Returns a `LeafNode` with a "code" tag and the text.
     - `TextType.LINK`: Returns a `LeafNode` with an "a" tag, the anchor text, and an "href" prop.
     - `TextType.IMAGE`: Returns a `LeafNode` with an "img" tag, an empty string value, and "src" (image URL) and "alt" (alt text) props.
+
+    If `resolve_url` is given (e.g. a `UrlResolver`), link and image URLs are passed through it, so they are rewritten where they are created rather than by searching the finished page.
     """
     match text_node.text_type:
         case TextType.TEXT:
@@ -43,10 +47,12 @@ def text_node_to_html_node(text_node: "TextNode") -> "HTMLNode":
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            url = resolve_url(text_node.url) if resolve_url and text_node.url else text_node.url
+            return LeafNode("a", text_node.text, {"href": url})
         case TextType.IMAGE:
+            url = resolve_url(text_node.url) if resolve_url and text_node.url else text_node.url
             return LeafNode("img", "", {
-            "src": text_node.url,
+            "src": url,
             "alt": text_node.text,
         })
         case _:
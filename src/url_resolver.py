@@ -0,0 +1,56 @@
+from functools import lru_cache
+
+class UrlResolver:
+    """Maps a URL as written in content or the template to the URL used in the built site. The default mapping prefixes root-relative URLs (`/blog/tom`) with the site's `base_path` and leaves everything else (absolute, protocol-relative and relative URLs) alone:
+    ```
+    resolve = UrlResolver("/static-site-generator/")
+    resolve("/images/tom.png")   # "/static-site-generator/images/tom.png"
+    resolve("https://boot.dev")  # "https://boot.dev"
+    ```
+    Results are memoized, since the same few URLs (home, stylesheet, section indexes) appear on most pages. Subclasses can override `resolve` to plug in other mappings; `key` must then identify the mapping, because rendered HTML is cached under it.
+    """
+    def __init__(self, base_path: str = "/"):
+        self.base_path = base_path
+        self.key = base_path
+        self._memo = {}
+
+    def __call__(self, url: str) -> str:
+        resolved = self._memo.get(url)
+        if resolved is None:
+            resolved = self._memo[url] = self.resolve(url)
+        return resolved
+
+    def resolve(self, url: str) -> str:
+        if url.startswith("/") and not url.startswith("//"):
+            return self.base_path + url[1:]
+        return url
+
+class FingerprintResolver(UrlResolver):
+    """Also points root-relative references to static assets at their content-hashed names (see `assets.AssetMap`), keeping any query string or fragment:
+    ```
+    resolve = FingerprintResolver("/", {"index.css": "index.1f2e3d4c5b6a.css"}, "9a8b7c")
+    resolve("/index.css")  # "/index.1f2e3d4c5b6a.css"
+    ```
+    `digest` identifies the mapping and becomes part of `key`.
+    """
+    def __init__(self, base_path: str, names: dict[str, str], digest: str):
+        super().__init__(base_path)
+        self.names = names
+        self.key = f"{base_path}#{digest}"
+
+    def resolve(self, url: str) -> str:
+        if url.startswith("/") and not url.startswith("//"):
+            end = len(url)
+            for separator in "?#":
+                index = url.find(separator)
+                if index != -1:
+                    end = min(end, index)
+            renamed = self.names.get(url[1:end])
+            if renamed is not None:
+                url = f"/{renamed}{url[end:]}"
+        return super().resolve(url)
+
+@lru_cache(maxsize=None)
+def resolver_for_base_path(base_path: str) -> UrlResolver:
+    """One shared resolver per base path, so its memo lasts for the whole build."""
+    return UrlResolver(base_path)
@@ -0,0 +1,131 @@
+import argparse
+import os
+import threading
+import time
+
+from dev_server import DevRequestHandler, DevServer
+from get_file_paths import get_file_paths
+from site_build import build_site, CONTENT_PATH, STATIC_PATH, TEMPLATE_PATH, PUBLIC_PATH
+from template import load_template
+from url_resolver import resolver_for_base_path
+from exceptions import TemplateError
+
+RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = f'<script>new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();</script>'
+
+def watched_files(base_path: str) -> list[str]:
+    """Every input a build depends on: content, static assets, the template and any partials it includes."""
+    files = get_file_paths(CONTENT_PATH) + get_file_paths(STATIC_PATH)
+    try:
+        files.extend(load_template(TEMPLATE_PATH, resolver_for_base_path(base_path)).dependencies)
+    except TemplateError:
+        files.append(TEMPLATE_PATH)
+    return files
+
+def snapshot(paths: list[str]) -> dict[str, tuple[int, int]]:
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+def changed_paths(old: dict, new: dict) -> set[str]:
+    """Paths that were added, removed or modified between two snapshots."""
+    changed = {path for path in new if old.get(path) != new[path]}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+def inject_live_reload(html: str) -> str:
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+class LiveReloadServer(DevServer):
+    """Serves `docs/` like `dev_server.DevServer`, with a live-reload script added to every page, and tells open pages to reload after every rebuild. Pages subscribe through a server-sent events stream at `RELOAD_PATH`."""
+    def __init__(self, address, directory: str):
+        super().__init__(address, directory, html_filter=inject_live_reload, handler=LiveReloadHandler)
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify_reload(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait_for_reload(self, generation: int, timeout: float) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+class LiveReloadHandler(DevRequestHandler):
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            return self.stream_reloads()
+        return super().do_GET()
+
+    def stream_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        # the stream has no length, so the connection cannot be reused after it
+        self.send_header("Connection", "close")
+        self.end_headers()
+        generation = self.server.generation
+        try:
+            while True:
+                current = self.server.wait_for_reload(generation, timeout=15)
+                if current != generation:
+                    self.wfile.write(b"data: reload\n\n")
+                    self.wfile.flush()
+                    return
+                # keep-alive comment, also detects closed tabs
+                self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+def watch(base_path: str, port: int, interval: float = 0.2, jobs: int = 1):
+    """Builds once, serves `docs/` on `port` and polls the inputs every `interval` seconds. Any change triggers an incremental build - only pages whose source, template or partials changed are re-rendered and only changed static files are copied - followed by a reload of every open page."""
+    build_site(base_path, jobs=jobs)
+    server = LiveReloadServer(("", port), PUBLIC_PATH)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Watching {CONTENT_PATH}, {STATIC_PATH} and {TEMPLATE_PATH}; serving http://localhost:{port}")
+
+    state = snapshot(watched_files(base_path))
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(watched_files(base_path))
+            changed = changed_paths(state, current)
+            if not changed:
+                continue
+            state = current
+            start = time.perf_counter()
+            try:
+                build_site(base_path, jobs=jobs)
+            except Exception as e:
+                print(f"Build failed: {e}")
+                continue
+            server.notify_reload()
+            print(f"Rebuilt after {len(changed)} change(s) in {time.perf_counter() - start:.3f}s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the site on every change and live-reload open pages.")
+    parser.add_argument("basepath", nargs="?", default=None, help="URL prefix for root-relative links")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between polls")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N")
+    args = parser.parse_args()
+    base_path = "./" if args.basepath is None else "." + args.basepath
+    watch(base_path, args.port, args.interval, args.jobs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+#!/bin/bash
+
+python3 src/watch.py "$@"
\ No newline at end of file